@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark the n-gram fuzzy index against the fuzzywuzzy full scan
+Runs on a synthetic card catalog; no Telegram/Firebase connection needed
+"""
+
+import os
+import random
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fuzzywuzzy import fuzz, process
+from bot.utils.fuzzy_index import FuzzyIndex
+
+PREFIXES = ["Sacrificial", "Favonius", "Gilded", "Thundering", "Crimson", "Frozen", "Wandering",
+            "Emblem of", "Lithic", "Abyssal", "Heart of", "Blessing of", "Liyue", "Mondstadt",
+            "Inazuma", "Sumeru", "Fontaine", "Natlan", "Elemental", "Toss-Up", "Quick", "Strategic"]
+NOUNS = ["Greatsword", "Bow", "Catalyst", "Polearm", "Dreams", "Fury", "Resonance", "Harbor",
+         "Kitchen", "Knights", "Tavern", "Banquet", "Heritage", "Chalice", "Flame", "Sigil",
+         "Lantern", "Vermillion", "Instructor", "Berserker", "Exile", "Gladiator", "Shrine"]
+SUFFIXES = ["", "", "", "of Seals", "of the Abyss", "Rite", "Prime", "Echoes", "Reborn"]
+
+
+def generate_catalog(size, seed=7):
+    """Generate unique synthetic card names"""
+    rng = random.Random(seed)
+    names = {}
+    while len(names) < size:
+        parts = [rng.choice(PREFIXES), rng.choice(NOUNS), rng.choice(SUFFIXES)]
+        name = " ".join(p for p in parts if p)
+        if name in names.values():
+            name = f"{name} {rng.randint(2, 99)}"
+        names[f"card_{len(names)}"] = name
+    return names
+
+
+def make_queries(names, count, seed=11):
+    """Sample names and distort them like user-typed queries"""
+    rng = random.Random(seed)
+    values = list(names.values())
+    queries = []
+    for _ in range(count):
+        name = rng.choice(values).lower()
+        kind = rng.random()
+        if kind < 0.3 and len(name) > 4:
+            # Typo: drop one character
+            i = rng.randrange(len(name))
+            name = name[:i] + name[i + 1:]
+        elif kind < 0.6:
+            # Prefix as typed in an inline query
+            name = name[:rng.randint(3, max(3, len(name) - 1))]
+        elif kind < 0.8:
+            # Single word from the name
+            name = rng.choice(name.split())
+        queries.append(name)
+    return queries
+
+
+def run_benchmark(catalog_size, query_count, limit):
+    names = generate_catalog(catalog_size)
+    queries = make_queries(names, query_count)
+
+    print(f"🎴 Fuzzy search benchmark: {catalog_size} cards, {query_count} queries, top-{limit}")
+
+    start = time.perf_counter()
+    index = FuzzyIndex()
+    index.build(names.items())
+    build_time = time.perf_counter() - start
+    print(f"   Index build: {build_time * 1000:.1f} ms")
+
+    start = time.perf_counter()
+    baseline = [process.extract(q, names, scorer=fuzz.WRatio, limit=limit) for q in queries]
+    baseline_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed = [index.search(q, limit=limit) for q in queries]
+    indexed_time = time.perf_counter() - start
+
+    scored = sum(len(index.candidates(q, limit)) for q in queries)
+
+    # Ties can be ordered differently, so compare the ranked score lists
+    same_scores = sum(
+        1 for base, fast in zip(baseline, indexed)
+        if [score for _, score, _ in base] == [score for _, score in fast]
+    )
+    same_top1 = sum(
+        1 for base, fast in zip(baseline, indexed)
+        if base and fast and base[0][1] == fast[0][1]
+    )
+
+    print(f"\n{'='*60}")
+    print(f"fuzzywuzzy scan: {baseline_time * 1000 / query_count:.3f} ms/query, "
+          f"{catalog_size} scorer calls/query")
+    print(f"n-gram index:    {indexed_time * 1000 / query_count:.3f} ms/query, "
+          f"{scored / query_count:.0f} scorer calls/query")
+    print(f"Speedup:         {baseline_time / indexed_time:.1f}x")
+    print(f"Same top-{limit} scores: {same_scores}/{query_count}")
+    print(f"Same best score: {same_top1}/{query_count}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cards", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--limit", type=int, default=5)
+    args = parser.parse_args()
+    run_benchmark(args.cards, args.queries, args.limit)
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Load test for the bot's registered handlers
+Replays synthetic Telegram updates through GenshinTCGBot against a fake
+Bot API and a temporary SQLite store, and reports throughput, per-handler
+latency percentiles and event-loop blocking time
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram import Update
+from telegram.request import BaseRequest
+
+from benchmarks.bench_memory import generate_card_data
+
+LOAD_TEST_TOKEN = "123456:LOAD-TEST"
+DEFAULT_MIX = "search=40,inline=30,deck=20,text=10"
+TEXT_MESSAGES = ["hello", "how do I build a deck?", "find a card", "what can you do", "thanks"]
+
+
+class FakeBotAPI(BaseRequest):
+    """Answers Bot API calls locally after a fixed delay, counting calls per method"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = Counter()
+        self._message_id = 0
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    def _message(self, params: Dict) -> Dict:
+        self._message_id += 1
+        message = {
+            'message_id': self._message_id,
+            'date': int(time.time()),
+            'chat': {'id': params.get('chat_id', 0), 'type': 'private'},
+        }
+        if 'text' in params:
+            message['text'] = params['text']
+        if 'photo' in params:
+            message['photo'] = [{'file_id': f"photo_{self._message_id}", 'file_unique_id': str(self._message_id),
+                                 'width': 320, 'height': 320}]
+        return message
+
+    def _result(self, method: str, params: Dict):
+        if method == 'getMe':
+            return {'id': 123456, 'is_bot': True, 'first_name': "Load Test", 'username': "load_test_bot"}
+        if method.startswith('send'):
+            return self._message(params)
+        if method.startswith('edit') and 'inline_message_id' not in params:
+            return self._message(params)
+        return True
+
+    async def do_request(self, url, method, request_data=None, read_timeout=None, write_timeout=None,
+                         connect_timeout=None, pool_timeout=None) -> Tuple[int, bytes]:
+        endpoint = url.rsplit('/', 1)[-1]
+        self.calls[endpoint] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        params = request_data.parameters if request_data is not None else {}
+        return 200, json.dumps({'ok': True, 'result': self._result(endpoint, params)}).encode()
+
+
+class LoopMonitor:
+    """Measures how long the event loop was blocked by oversleeping a short timer"""
+
+    def __init__(self, interval: float = 0.005, threshold: float = 0.002):
+        self.interval = interval
+        self.threshold = threshold
+        self.blocked = 0.0
+        self.max_stall = 0.0
+        self.stalls = 0
+        self._task = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = time.perf_counter() - start - self.interval
+            if lag > self.threshold:
+                self.blocked += lag
+                self.stalls += 1
+                self.max_stall = max(self.max_stall, lag)
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+
+class StorageDbManager:
+    """db_manager stand-in over the temporary storage backend
+
+    Serves the card, deck and user operations the handlers use from the
+    SQLite store, as the same models db_manager returns, so the load test
+    never reaches Firebase.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    @staticmethod
+    def _to_deck(record: Dict):
+        from models.deck import Deck, DeckCard
+        return Deck(id=record['id'], name=record['name'], user_id=record['user_id'],
+                    cards=[DeckCard(**entry) for entry in record.get('cards', [])])
+
+    def get_card(self, card_id: str):
+        from models.card import CardFactory
+        record = self.storage.get_card(card_id)
+        return CardFactory.create_card(record) if record else None
+
+    def get_deck(self, deck_id: str):
+        record = self.storage.get_deck(deck_id)
+        return self._to_deck(record) if record else None
+
+    def get_user_decks(self, user_id: str) -> List:
+        return [self._to_deck(record) for record in self.storage.get_user_decks(user_id)]
+
+    def save_deck(self, deck) -> bool:
+        return self.storage.save_deck(deck.to_dict() if hasattr(deck, 'to_dict') else dict(deck))
+
+    def delete_deck(self, deck_id: str, user_id: str) -> bool:
+        return self.storage.delete_deck(deck_id, user_id)
+
+    def get_user(self, user_id: str):
+        return self.storage.get_user(user_id)
+
+
+def install_db_manager(storage):
+    """Point db_manager and the read-through cache in front of it at the temporary store
+
+    Must run before the handler modules are imported, since they bind
+    db_manager at import time.
+    """
+    import bot.utils.database as database
+    from bot.utils.cache import cached_db_manager
+
+    manager = StorageDbManager(storage)
+    database.db_manager = manager
+    cached_db_manager._manager = manager
+    return manager
+
+
+def parse_mix(mix: str) -> Dict[str, int]:
+    weights = {}
+    for part in mix.split(','):
+        kind, _, weight = part.partition('=')
+        if kind.strip() not in UPDATE_BUILDERS:
+            raise ValueError(f"Unknown update kind '{kind}', expected one of {', '.join(UPDATE_BUILDERS)}")
+        weights[kind.strip()] = int(weight or 1)
+    return weights
+
+
+def _user(user_id: int) -> Dict:
+    return {'id': user_id, 'is_bot': False, 'first_name': f"User {user_id}"}
+
+
+def _message(update_id: int, user_id: int, text: str) -> Dict:
+    message = {'message_id': update_id, 'date': int(time.time()), 'from': _user(user_id),
+               'chat': {'id': user_id, 'type': 'private'}, 'text': text}
+    if text.startswith('/'):
+        message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}]
+    return message
+
+
+def search_update(update_id, user_id, rng, names):
+    name = rng.choice(names)
+    return {'update_id': update_id, 'message': _message(update_id, user_id, f"/search {name[:rng.randint(3, len(name))]}")}
+
+
+def inline_update(update_id, user_id, rng, names):
+    name = rng.choice(names)
+    return {'update_id': update_id, 'inline_query': {
+        'id': str(update_id), 'from': _user(user_id), 'query': name[:rng.randint(1, len(name))], 'offset': ""}}
+
+
+def deck_update(update_id, user_id, rng, names):
+    # deck_show is the deck button handle_deck_callbacks answers without changing the store
+    data = f"deck_show_deck_{user_id}"
+    return {'update_id': update_id, 'callback_query': {
+        'id': str(update_id), 'from': _user(user_id), 'chat_instance': str(user_id), 'data': data,
+        'message': _message(update_id, user_id, "🃏 Your decks")}}
+
+
+def text_update(update_id, user_id, rng, names):
+    return {'update_id': update_id, 'message': _message(update_id, user_id, rng.choice(TEXT_MESSAGES))}
+
+
+UPDATE_BUILDERS = {'search': search_update, 'inline': inline_update, 'deck': deck_update, 'text': text_update}
+
+
+def generate_updates(count: int, users: int, mix: Dict[str, int], names: List[str], seed: int = 11):
+    """(kind, update dict) pairs drawn from the mix"""
+    rng = random.Random(seed)
+    kinds = rng.choices(list(mix), weights=list(mix.values()), k=count)
+    return [(kind, UPDATE_BUILDERS[kind](update_id, rng.randint(1, users), rng, names))
+            for update_id, kind in enumerate(kinds, 1)]
+
+
+def seed_store(card_count: int, users: int) -> List[str]:
+    """Fill the temporary store and the catalog; returns the card names"""
+    from bot.utils.storage import get_storage
+    from bot.utils.card_catalog import card_catalog
+
+    storage = get_storage()
+    cards = generate_card_data(card_count)
+    storage.save_cards(cards)
+    rng = random.Random(5)
+    for user_id in range(1, users + 1):
+        storage.save_deck({'id': f"deck_{user_id}", 'user_id': str(user_id), 'name': f"Deck {user_id}",
+                           'cards': [{'card_id': card['id'], 'card_name': card['name'], 'card_type': card['card_type'],
+                                      'quantity': 2} for card in rng.sample(cards, 15)]})
+    card_catalog.load_from_store()
+    return [card['name'] for card in cards]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def run_load(count, users, mix, cards, rate, api_latency, rate_limit):
+    from bot.utils.storage import get_storage
+
+    install_db_manager(get_storage())
+    from main import GenshinTCGBot
+    from bot.utils.metrics import metrics
+
+    names = seed_store(cards, users)
+    api = FakeBotAPI(api_latency)
+    bot = GenshinTCGBot()
+    application = bot.build_application(token=LOAD_TEST_TOKEN, request=api, rate_limit=rate_limit)
+    # register_handlers instruments every handler into the metrics registry
+    bot.register_handlers()
+    metrics.reset()
+
+    updates = [(kind, Update.de_json(data, application.bot))
+               for kind, data in generate_updates(count, users, mix, names)]
+    end_to_end: Dict[str, List[float]] = defaultdict(list)
+
+    async def handle(kind, update):
+        start = time.perf_counter()
+        await application.update_processor.process_update(update, application.process_update(update))
+        end_to_end[kind].append(time.perf_counter() - start)
+
+    monitor = LoopMonitor()
+    async with application:
+        monitor.start()
+        start = time.perf_counter()
+        tasks = []
+        for kind, update in updates:
+            tasks.append(asyncio.create_task(handle(kind, update)))
+            if rate:
+                await asyncio.sleep(1 / rate)
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+        await monitor.stop()
+
+    return elapsed, metrics.get_stats(), end_to_end, monitor, api
+
+
+def print_table(title, samples: Dict[str, List[float]]):
+    print(f"   {title}")
+    print(f"   {'':<28} {'count':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for label in sorted(samples):
+        values = sorted(samples[label])
+        print(f"   {label:<28} {len(values):>7} "
+              f"{percentile(values, 50) * 1000:8.2f} {percentile(values, 95) * 1000:8.2f} "
+              f"{percentile(values, 99) * 1000:8.2f}")
+
+
+def print_handler_table(stats: Dict[str, Dict]):
+    """Handler rows of Metrics.get_stats(); percentiles are histogram bucket bounds"""
+    print("   Handler latency (p50/p95/p99 are bucket upper bounds)")
+    print(f"   {'':<40} {'count':>7} {'errors':>7} {'avg ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name in sorted(stats):
+        family, _, label = name.partition(':')
+        if family != 'handler':
+            continue
+        row = stats[name]
+        print(f"   {label:<40} {row['count']:>7} {round(row['error_rate'] * row['count']):>7} {row['avg_ms']:8.2f} "
+              f"{row['p50_ms']:8.1f} {row['p95_ms']:8.1f} {row['p99_ms']:8.1f}")
+
+
+def run_benchmark(count, users, mix, cards, rate, api_latency, rate_limit):
+    print(f"🎴 Handler load test: {count} updates from {users} users, mix {mix}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # The store stand-in has to be chosen before the bot modules read their settings
+        os.environ['STORAGE_BACKEND'] = "sqlite"
+        os.environ['SQLITE_PATH'] = os.path.join(tmp_dir, "load_test.db")
+        elapsed, stats, end_to_end, monitor, api = asyncio.run(
+            run_load(count, users, parse_mix(mix), cards, rate, api_latency, rate_limit))
+
+        from bot.utils.storage import get_storage
+        get_storage().close()
+
+    print(f"   Throughput: {count / elapsed:.0f} updates/s ({elapsed:.2f}s total)")
+    print(f"   Event loop blocked: {monitor.blocked * 1000:.0f} ms in {monitor.stalls} stalls "
+          f"(longest {monitor.max_stall * 1000:.1f} ms)")
+    print(f"   Bot API calls: {dict(api.calls)}")
+    print_handler_table(stats)
+    print_table("End-to-end latency by update kind (incl. queueing)", end_to_end)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Handler load test with synthetic updates")
+    parser.add_argument("--updates", type=int, default=5000, help="Number of updates")
+    parser.add_argument("--users", type=int, default=500, help="Number of distinct users")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Update kinds and weights, e.g. search=40,inline=30")
+    parser.add_argument("--cards", type=int, default=1000, help="Cards in the store")
+    parser.add_argument("--rate", type=float, default=0, help="Arrival rate in updates/s (0 = all at once)")
+    parser.add_argument("--api-latency", type=float, default=0.0, help="Seconds per fake Bot API call")
+    parser.add_argument("--rate-limit", action="store_true", help="Keep the outbound send scheduler on")
+    args = parser.parse_args()
+    run_benchmark(args.updates, args.users, args.mix, args.cards, args.rate, args.api_latency, args.rate_limit)
+
+
+if __name__ == "__main__":
+    main()
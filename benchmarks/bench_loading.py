@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark bulk card loading as done by the catalog at startup
+Compares per-card construction with the bulk create_cards path
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.card_loader import create_cards
+from models.compact import CompactCard
+from benchmarks.bench_memory import generate_card_data
+
+
+class FakeSnapshot:
+    """Stands in for a Firestore DocumentSnapshot"""
+
+    def __init__(self, data):
+        self.id = data['id']
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data)
+
+
+def best_of(runs, func):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run_benchmark(card_count, runs):
+    snapshots = [FakeSnapshot(data) for data in generate_card_data(card_count)]
+    print(f"🎴 Card loading benchmark: {card_count} snapshots, best of {runs}")
+
+    timings = []
+    try:
+        from models.card import CardFactory
+        timings.append(("CardFactory.create_card", best_of(runs, lambda: [
+            CardFactory.create_card(dict(doc.to_dict(), id=doc.id)) for doc in snapshots])))
+    except ImportError:
+        pass
+    timings.append(("CompactCard.from_dict", best_of(runs, lambda: [
+        CompactCard.from_dict(dict(doc.to_dict(), id=doc.id)) for doc in snapshots])))
+    timings.append(("create_cards", best_of(runs, lambda: create_cards(snapshots))))
+
+    for label, seconds in timings:
+        print(f"   {label:<24} {seconds * 1000:8.1f} ms ({seconds / card_count * 1e6:.2f} µs/card)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk card loading benchmark")
+    parser.add_argument("--cards", type=int, default=5000, help="Number of cards")
+    parser.add_argument("--runs", type=int, default=5, help="Timed runs per path")
+    args = parser.parse_args()
+    run_benchmark(args.cards, args.runs)
+
+
+if __name__ == "__main__":
+    main()
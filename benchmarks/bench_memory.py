@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark the memory footprint of card and deck representations
+Compares the model dataclasses with the slotted compact versions
+"""
+
+import os
+import random
+import sys
+import tracemalloc
+import argparse
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.compact import CompactCard, CompactDeckCard
+
+ELEMENTS = ["PYRO", "HYDRO", "ANEMO", "ELECTRO", "DENDRO", "CRYO", "GEO"]
+WEAPONS = ["SWORD", "CLAYMORE", "POLEARM", "BOW", "CATALYST"]
+ACTION_TYPES = ["EQUIPMENT", "SUPPORT", "EVENT"]
+
+
+@dataclass
+class DictCard:
+    """Layout of the model dataclasses: one __dict__ per instance"""
+    id: str
+    name: str
+    card_type: str
+    cost: int
+    description: str
+    element: Optional[str] = None
+    weapon: Optional[str] = None
+    hp: Optional[int] = None
+    max_energy: Optional[int] = None
+    skills: List[dict] = field(default_factory=list)
+    image_url: Optional[str] = None
+
+
+@dataclass
+class DictDeckCard:
+    card_id: str
+    card_name: str
+    card_type: str
+    quantity: int = 1
+
+
+def generate_card_data(count, seed=7):
+    """Card dicts as they come out of the store; strings are fresh objects like after JSON decoding"""
+    rng = random.Random(seed)
+    cards = []
+    for i in range(count):
+        is_character = i % 4 == 0
+        data = {
+            'id': f"card_{i}",
+            'name': f"Card {i}",
+            'card_type': "".join(["CHAR", "ACTER"]) if is_character else "".join(rng.choice(ACTION_TYPES)),
+            'cost': rng.randint(0, 4),
+            'description': f"Deal {rng.randint(1, 5)} damage. Description of card {i}.",
+            'image_url': f"https://example.com/cards/card_{i}.png",
+        }
+        if is_character:
+            data.update({
+                'element': "".join(rng.choice(ELEMENTS)),
+                'weapon': "".join(rng.choice(WEAPONS)),
+                'hp': 10,
+                'max_energy': rng.randint(2, 3),
+                'skills': [{'name': f"Skill {i}", 'cost': 3}],
+            })
+        cards.append(data)
+    return cards
+
+
+def load_models(cards):
+    """Build cards with models.card when available, else with the equivalent dataclass"""
+    try:
+        from models.card import CardFactory
+        return "models.card", [CardFactory.create_card(dict(data)) for data in cards]
+    except ImportError:
+        return "dataclass", [DictCard(**data) for data in cards]
+
+
+def measure(build):
+    """Bytes allocated by build() that are still alive afterwards"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return objects, after - before
+
+
+def make_deck(rng, card_data, entry_type):
+    characters = [c for c in card_data if c['card_type'] == "CHARACTER"]
+    actions = [c for c in card_data if c['card_type'] != "CHARACTER"]
+    entries = [entry_type("".join(c['id']), c['name'], "".join(c['card_type']), 1)
+               for c in rng.sample(characters, 3)]
+    entries += [entry_type("".join(c['id']), c['name'], "".join(c['card_type']), 2)
+                for c in rng.sample(actions, 15)]
+    return entries
+
+
+def run_benchmark(card_count, deck_count):
+    card_data = generate_card_data(card_count)
+    print(f"🎴 Memory benchmark: {card_count} cards, {deck_count} decks")
+
+    # Card dicts are generated inside the measurement and dropped after
+    # loading, as after a store read, so retained strings are counted too
+    (label, _), baseline_bytes = measure(lambda: load_models(generate_card_data(card_count)))
+    compact, compact_bytes = measure(lambda: [CompactCard.from_dict(data) for data in generate_card_data(card_count)])
+    assert all(card.to_dict()['id'] == data['id'] for card, data in zip(compact, card_data))
+
+    print(f"   Per card ({label}): {baseline_bytes / card_count:.0f} bytes")
+    print(f"   Per card (compact):  {compact_bytes / card_count:.0f} bytes "
+          f"({100 * (1 - compact_bytes / baseline_bytes):.0f}% smaller)")
+
+    rng = random.Random(3)
+    _, deck_bytes = measure(lambda: [make_deck(rng, card_data, DictDeckCard) for _ in range(deck_count)])
+    rng = random.Random(3)
+    _, compact_deck_bytes = measure(lambda: [make_deck(rng, card_data, CompactDeckCard) for _ in range(deck_count)])
+
+    print(f"   Per deck (dataclass): {deck_bytes / deck_count:.0f} bytes")
+    print(f"   Per deck (compact):   {compact_deck_bytes / deck_count:.0f} bytes "
+          f"({100 * (1 - compact_deck_bytes / deck_bytes):.0f}% smaller)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Card and deck memory benchmark")
+    parser.add_argument("--cards", type=int, default=5000, help="Number of cards")
+    parser.add_argument("--decks", type=int, default=1000, help="Number of decks")
+    args = parser.parse_args()
+    run_benchmark(args.cards, args.decks)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+from bot.utils.storage import MAX_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_INTERVAL = 60
+
+
+class ActivityTracker:
+    """Write-behind buffer for user activity
+
+    Handlers record activity in memory; the buffer is flushed to the
+    users collection in batched writes every flush interval and on
+    shutdown, so each active user costs one write per interval instead
+    of one per message. Writes go through the configured storage backend;
+    passing a Firestore client as db writes to it directly.
+    """
+
+    def __init__(self, db=None, flush_interval: float = DEFAULT_FLUSH_INTERVAL, storage=None):
+        if storage is None and db is not None:
+            from bot.utils.storage import FirestoreBackend
+            storage = FirestoreBackend(db)
+        self._storage = storage
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.writes = 0
+
+    @property
+    def storage(self):
+        if self._storage is None:
+            from bot.utils.storage import get_storage
+            self._storage = get_storage()
+        return self._storage
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def record(self, user_id: str, messages: int = 1):
+        """Note activity for a user; never touches the database"""
+        with self._lock:
+            entry = self._pending.get(user_id)
+            if entry is None:
+                entry = self._pending[user_id] = {'last_active': None, 'message_count': 0}
+            entry['last_active'] = datetime.now()
+            entry['message_count'] += messages
+
+    def _restore(self, entries: Dict[str, Dict[str, Any]]):
+        """Put entries from a failed flush back into the buffer"""
+        with self._lock:
+            for user_id, entry in entries.items():
+                current = self._pending.get(user_id)
+                if current is None:
+                    self._pending[user_id] = entry
+                else:
+                    current['message_count'] += entry['message_count']
+
+    def flush(self) -> int:
+        """Write buffered activity in batches; returns the number of users written"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        items = list(pending.items())
+        written = 0
+        for start in range(0, len(items), MAX_BATCH_SIZE):
+            chunk = items[start:start + MAX_BATCH_SIZE]
+            try:
+                written += self.storage.record_activity(chunk)
+            except Exception as e:
+                logger.error(f"Error flushing user activity: {e}")
+                self._restore(dict(items[start:]))
+                break
+
+        self.writes += written
+        logger.debug(f"Flushed activity for {written} users")
+        return written
+
+    async def _flush_periodically(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await loop.run_in_executor(None, self.flush)
+            except Exception as e:
+                logger.error(f"Error in activity flush loop: {e}")
+
+    def start(self):
+        """Start the periodic flush on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._flush_periodically())
+
+    async def stop(self):
+        """Stop the periodic flush and write whatever is still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.get_running_loop().run_in_executor(None, self.flush)
+
+
+# Global activity tracker instance
+activity_tracker = ActivityTracker()
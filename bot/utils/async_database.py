@@ -0,0 +1,74 @@
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from bot.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 8
+
+
+class AsyncDatabaseManager:
+    """Awaitable facade over db_manager
+
+    Deck and card lookups go through the read-through cache. Every
+    db_manager operation is available under the same name as a
+    coroutine that runs the blocking Firestore call on a bounded thread
+    pool, so handlers never stall the event loop on database I/O:
+
+        deck = await async_db_manager.get_deck(deck_id)
+    """
+
+    def __init__(self, manager=None, max_workers: int = DEFAULT_MAX_WORKERS):
+        self._manager = manager
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def manager(self):
+        if self._manager is None:
+            from bot.utils.cache import cached_db_manager
+            self._manager = cached_db_manager
+        return self._manager
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="db")
+        return self._executor
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a blocking callable on the database thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), functools.partial(func, *args, **kwargs))
+
+    def __getattr__(self, name: str):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        method = getattr(self.manager, name)
+        if not callable(method):
+            raise AttributeError(f"db_manager.{name} is not an operation")
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            # Timed on the worker thread, so pool queueing isn't counted
+            with metrics.timer('storage', backend='db_manager', operation=name):
+                return method(*args, **kwargs)
+
+        @functools.wraps(method)
+        async def operation(*args, **kwargs):
+            return await self.run(timed, *args, **kwargs)
+
+        return operation
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+# Global async database instance
+async_db_manager = AsyncDatabaseManager()
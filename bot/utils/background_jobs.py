@@ -0,0 +1,154 @@
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor, Future
+from datetime import datetime
+from typing import Dict, Any, Optional, Callable
+
+logger = logging.getLogger(__name__)
+
+_current = threading.local()
+
+
+class JobProgress:
+    """Thread-safe progress counters for a background job"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = {}
+        self.stage = "queued"
+
+    def increment(self, key: str, amount: int = 1):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def set(self, key: str, value: int):
+        with self._lock:
+            self._counters[key] = value
+
+    def get(self, key: str) -> int:
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
+
+
+class Job:
+    """Handle for a function running on the job executor"""
+
+    def __init__(self, name: str):
+        self.id = uuid.uuid4().hex[:8]
+        self.name = name
+        self.status = "pending"
+        self.progress = JobProgress()
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now()
+        self.finished_at: Optional[datetime] = None
+        self.future: Optional[Future] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'name': self.name,
+            'status': self.status,
+            'stage': self.progress.stage,
+            'progress': self.progress.snapshot(),
+            'error': self.error,
+            'created_at': self.created_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+def current_progress() -> Optional[JobProgress]:
+    """Progress of the job running on this thread, if any"""
+    return getattr(_current, 'progress', None)
+
+
+def report_progress(key: str, amount: int = 1):
+    """Add to a progress counter of the current job (no-op outside jobs)"""
+    progress = current_progress()
+    if progress is not None:
+        progress.increment(key, amount)
+
+
+def report_stage(stage: str):
+    """Set the stage of the current job (no-op outside jobs)"""
+    progress = current_progress()
+    if progress is not None:
+        progress.stage = stage
+
+
+class JobManager:
+    """Runs long blocking work (like wiki scrapes) off the event loop"""
+
+    def __init__(self, max_workers: int = 1, history_size: int = 20):
+        self.max_workers = max_workers
+        self.history_size = history_size
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+        return self._executor
+
+    def submit(self, name: str, func: Callable, *args, **kwargs) -> Job:
+        """Start func in the background and return its job handle"""
+        job = Job(name)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune_history()
+        job.future = self._get_executor().submit(self._run, job, func, *args, **kwargs)
+        logger.info(f"Submitted background job {job.name} ({job.id})")
+        return job
+
+    def _run(self, job: Job, func: Callable, *args, **kwargs):
+        _current.progress = job.progress
+        job.status = "running"
+        job.progress.stage = "running"
+        try:
+            job.result = func(*args, **kwargs)
+            job.status = "completed"
+            logger.info(f"Background job {job.name} ({job.id}) completed")
+        except Exception as e:
+            job.error = str(e)
+            job.status = "failed"
+            logger.error(f"Background job {job.name} ({job.id}) failed: {e}")
+        finally:
+            job.progress.stage = job.status
+            job.finished_at = datetime.now()
+            _current.progress = None
+        return job.result
+
+    def _prune_history(self):
+        finished = [j for j in self._jobs.values() if j.done]
+        for job in finished[:max(0, len(self._jobs) - self.history_size)]:
+            del self._jobs[job.id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def running(self, name: str) -> Optional[Job]:
+        """Unfinished job with the given name, if any"""
+        with self._lock:
+            for job in self._jobs.values():
+                if job.name == name and not job.done:
+                    return job
+        return None
+
+    def shutdown(self, wait: bool = False):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+# Global job manager instance
+job_manager = JobManager()
@@ -0,0 +1,148 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Callable, Hashable, Tuple
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after a time-to-live"""
+
+    def __init__(self, max_size: int = 1000, ttl: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        with self._lock:
+            self._entries[key] = (self._clock() + (self.ttl if ttl is None else ttl), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
+
+
+# db_manager operations that change a deck; the deck id is their first argument
+DECK_MUTATIONS = ('delete_deck', 'update_deck', 'save_deck')
+
+
+class CachedDatabaseManager:
+    """Read-through cache in front of db_manager deck and card lookups
+
+    get_deck and get_card are served from TTL/LRU caches; every other
+    operation passes straight through. Deck mutations invalidate the
+    cached deck. Cached decks are shared and may be stale, so code that
+    edits and saves a deck reads it with get_deck_for_update instead.
+    """
+
+    def __init__(self, manager=None, deck_ttl: float = 30.0, card_ttl: float = 600.0,
+                 max_decks: int = 1000, max_cards: int = 2000):
+        self._manager = manager
+        self.decks = TTLCache(max_size=max_decks, ttl=deck_ttl)
+        self.cards = TTLCache(max_size=max_cards, ttl=card_ttl)
+
+    @property
+    def manager(self):
+        if self._manager is None:
+            from bot.utils.database import db_manager
+            self._manager = db_manager
+        return self._manager
+
+    def _read_through(self, cache: TTLCache, loader: Callable, key: str):
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        value = loader(key)
+        # Missing entities are not cached so a newly created one shows up at once
+        if value is not None:
+            cache.set(key, value)
+        return value
+
+    def get_deck(self, deck_id: str):
+        return self._read_through(self.decks, self.manager.get_deck, deck_id)
+
+    def get_card(self, card_id: str):
+        return self._read_through(self.cards, self.manager.get_card, card_id)
+
+    def get_deck_for_update(self, deck_id: str):
+        """Read a deck from the database, bypassing the cache, for a read-modify-write"""
+        self.invalidate_deck(deck_id)
+        return self.manager.get_deck(deck_id)
+
+    def invalidate_deck(self, deck_id: str):
+        self.decks.invalidate(deck_id)
+
+    def invalidate_card(self, card_id: str):
+        self.cards.invalidate(card_id)
+
+    def __getattr__(self, name: str):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        attr = getattr(self.manager, name)
+        if name not in DECK_MUTATIONS:
+            return attr
+
+        def mutation(deck_id, *args, **kwargs):
+            try:
+                return attr(deck_id, *args, **kwargs)
+            finally:
+                self.invalidate_deck(getattr(deck_id, 'id', deck_id))
+
+        return mutation
+
+    def get_cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {'decks': self.decks.get_stats(), 'cards': self.cards.get_stats()}
+
+
+# Global cached database instance
+cached_db_manager = CachedDatabaseManager()
@@ -0,0 +1,357 @@
+import logging
+import re
+import threading
+from typing import List, Dict, Any, Optional, Iterable, Set, Tuple
+
+from bot.utils.fuzzy_index import FuzzyIndex
+
+logger = logging.getLogger(__name__)
+
+# Prefixes longer than this are answered by filtering the longest indexed bucket
+MAX_PREFIX_LENGTH = 8
+
+
+def normalize_name(name: str) -> str:
+    """Normalize a card name for index lookups"""
+    if not name:
+        return ""
+    name = re.sub(r"[^\w\s]", " ", name.lower())
+    return " ".join(name.split())
+
+
+class CardCatalog:
+    """Process-local card catalog with prebuilt search indexes
+
+    With compact=True, cards loaded from the store are slotted
+    CompactCards built by the bulk loader instead of CardFactory models.
+    """
+
+    def __init__(self, max_prefix_length: int = MAX_PREFIX_LENGTH, compact: bool = False):
+        self.max_prefix_length = max_prefix_length
+        self.compact = compact
+        self.loaded = False
+        self.version = 0
+        self._lock = threading.RLock()
+        self._watch = None
+        # Set once the store watch has delivered the full collection, or to
+        # release waiters when the watch is stopped before that
+        self._synced = threading.Event()
+        self._watch_stopped = False
+        self._reset_indexes()
+
+    def _reset_indexes(self):
+        """Drop all cards and indexes"""
+        self._cards: Dict[str, Any] = {}
+        self._by_name: Dict[str, str] = {}
+        self._by_prefix: Dict[str, Set[str]] = {}
+        self._by_element: Dict[str, Set[str]] = {}
+        self._by_type: Dict[str, Set[str]] = {}
+        self._by_cost: Dict[int, Set[str]] = {}
+        self._fuzzy = FuzzyIndex()
+        # Catalog version at which each card was last (re)loaded
+        self._revisions: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._cards)
+
+    def __contains__(self, card_id: str) -> bool:
+        return card_id in self._cards
+
+    @staticmethod
+    def _index_keys(card) -> Dict[str, Any]:
+        """Extract the indexed attributes of a card"""
+        element = getattr(card, 'element', None)
+        card_type = getattr(card, 'card_type', None)
+        return {
+            'name': normalize_name(getattr(card, 'name', '')),
+            'element': element.upper() if element else None,
+            'card_type': card_type.upper() if card_type else None,
+            'cost': getattr(card, 'cost', None),
+        }
+
+    def _name_prefixes(self, normalized: str) -> Set[str]:
+        """Prefixes of the full name and of every word in it"""
+        prefixes = set()
+        starts = [0] + [m.end() for m in re.finditer(r" ", normalized)]
+        for start in starts:
+            word = normalized[start:start + self.max_prefix_length]
+            for i in range(1, len(word) + 1):
+                prefixes.add(word[:i])
+        return prefixes
+
+    def _add_to_indexes(self, card):
+        keys = self._index_keys(card)
+        card_id = card.id
+
+        self._cards[card_id] = card
+        if keys['name']:
+            self._by_name[keys['name']] = card_id
+            self._fuzzy.add(card_id, card.name)
+            for prefix in self._name_prefixes(keys['name']):
+                self._by_prefix.setdefault(prefix, set()).add(card_id)
+        if keys['element']:
+            self._by_element.setdefault(keys['element'], set()).add(card_id)
+        if keys['card_type']:
+            self._by_type.setdefault(keys['card_type'], set()).add(card_id)
+        if keys['cost'] is not None:
+            self._by_cost.setdefault(keys['cost'], set()).add(card_id)
+
+    def _remove_from_indexes(self, card_id: str):
+        card = self._cards.pop(card_id, None)
+        if card is None:
+            return
+        keys = self._index_keys(card)
+
+        if keys['name']:
+            if self._by_name.get(keys['name']) == card_id:
+                del self._by_name[keys['name']]
+            self._fuzzy.remove(card_id)
+            for prefix in self._name_prefixes(keys['name']):
+                self._discard(self._by_prefix, prefix, card_id)
+        self._discard(self._by_element, keys['element'], card_id)
+        self._discard(self._by_type, keys['card_type'], card_id)
+        self._discard(self._by_cost, keys['cost'], card_id)
+
+    @staticmethod
+    def _discard(index: Dict[Any, Set[str]], key, card_id: str):
+        bucket = index.get(key)
+        if bucket is not None:
+            bucket.discard(card_id)
+            if not bucket:
+                del index[key]
+
+    def load(self, cards: Iterable[Any]):
+        """Replace the catalog contents with the given cards"""
+        with self._lock:
+            self._reset_indexes()
+            for card in cards:
+                self._add_to_indexes(card)
+            self.loaded = True
+            self.version += 1
+            self._revisions = dict.fromkeys(self._cards, self.version)
+        logger.info(f"Card catalog loaded with {len(self._cards)} cards")
+
+    def upsert(self, card):
+        """Add a card or replace the stored version of it"""
+        with self._lock:
+            self._remove_from_indexes(card.id)
+            self._add_to_indexes(card)
+            self.version += 1
+            self._revisions[card.id] = self.version
+
+    def remove(self, card_id: str) -> bool:
+        """Remove a card from the catalog"""
+        with self._lock:
+            if card_id not in self._cards:
+                return False
+            self._remove_from_indexes(card_id)
+            self._revisions.pop(card_id, None)
+            self.version += 1
+            return True
+
+    def get(self, card_id: str):
+        """Get a card by id"""
+        return self._cards.get(card_id)
+
+    def revision(self, card_id: str) -> int:
+        """Content revision of a card; changes whenever the card is replaced"""
+        return self._revisions.get(card_id, 0)
+
+    def get_by_name(self, name: str):
+        """Get a card by exact (normalized) name"""
+        card_id = self._by_name.get(normalize_name(name))
+        return self._cards.get(card_id) if card_id else None
+
+    def all_cards(self) -> List[Any]:
+        """All cards sorted by name"""
+        with self._lock:
+            cards = list(self._cards.values())
+        return sorted(cards, key=lambda c: c.name)
+
+    def _prefix_ids(self, prefix: str) -> Set[str]:
+        """Ids of cards whose name or one of its words starts with prefix"""
+        normalized = normalize_name(prefix)
+        if not normalized:
+            return set()
+
+        bucket = self._by_prefix.get(normalized[:self.max_prefix_length], set())
+        if len(normalized) <= self.max_prefix_length:
+            return set(bucket)
+
+        # Long prefix: confirm candidates from the longest indexed bucket
+        matches = set()
+        for card_id in bucket:
+            name = normalize_name(self._cards[card_id].name)
+            if name.startswith(normalized) or f" {normalized}" in f" {name}":
+                matches.add(card_id)
+        return matches
+
+    def _filter_ids(self, element: Optional[str] = None, card_type: Optional[str] = None,
+                    cost: Optional[int] = None) -> Optional[Set[str]]:
+        """Intersect the attribute indexes; None means no filter was given"""
+        buckets = []
+        if element:
+            buckets.append(self._by_element.get(element.upper(), set()))
+        if card_type:
+            buckets.append(self._by_type.get(card_type.upper(), set()))
+        if cost is not None:
+            buckets.append(self._by_cost.get(cost, set()))
+        if not buckets:
+            return None
+
+        buckets.sort(key=len)
+        result = set(buckets[0])
+        for bucket in buckets[1:]:
+            result &= bucket
+        return result
+
+    def search_prefix(self, prefix: str, limit: Optional[int] = None) -> List[Any]:
+        """Cards whose name (or a word in it) starts with prefix"""
+        return self.search(prefix, limit=limit)
+
+    def filter(self, element: Optional[str] = None, card_type: Optional[str] = None,
+               cost: Optional[int] = None, limit: Optional[int] = None) -> List[Any]:
+        """Cards matching all of the given attributes"""
+        return self.search("", element=element, card_type=card_type, cost=cost, limit=limit)
+
+    def search(self, query: str = "", element: Optional[str] = None, card_type: Optional[str] = None,
+               cost: Optional[int] = None, limit: Optional[int] = None) -> List[Any]:
+        """Exact, prefix and filtered lookup
+
+        An exact name match is returned first, followed by prefix matches
+        sorted by name. Filters narrow both.
+        """
+        with self._lock:
+            filtered = self._filter_ids(element, card_type, cost)
+
+            if query and query.strip():
+                ids = self._prefix_ids(query)
+                if filtered is not None:
+                    ids &= filtered
+                exact_id = self._by_name.get(normalize_name(query))
+            else:
+                ids = filtered if filtered is not None else set(self._cards)
+                exact_id = None
+
+            cards = sorted((self._cards[i] for i in ids if i != exact_id), key=lambda c: c.name)
+            if exact_id in ids:
+                cards.insert(0, self._cards[exact_id])
+
+        return cards[:limit] if limit else cards
+
+    def fuzzy_search(self, query: str, limit: int = 10, score_cutoff: int = 60) -> List[Tuple[Any, int]]:
+        """Best fuzzy name matches as (card, score) pairs"""
+        with self._lock:
+            matches = self._fuzzy.search(query, limit=limit, score_cutoff=score_cutoff)
+            return [(self._cards[card_id], score) for card_id, score in matches]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Summary of catalog contents"""
+        with self._lock:
+            return {
+                'total_cards': len(self._cards),
+                'by_type': {k: len(v) for k, v in self._by_type.items()},
+                'by_element': {k: len(v) for k, v in self._by_element.items()},
+                'version': self.version,
+            }
+
+    def load_from_store(self) -> bool:
+        """Load every card from the configured storage backend"""
+        try:
+            from bot.utils.storage import get_storage
+            from models.card_loader import create_cards
+
+            self.load(create_cards(get_storage().stream_cards(), factory=self._card_factory()))
+            return True
+
+        except Exception as e:
+            logger.error(f"Error loading card catalog: {e}")
+            return False
+
+    def watch_store(self) -> bool:
+        """Load the catalog from the cards collection and keep it in sync
+
+        The snapshot listener's first callback carries the whole
+        collection and replaces the catalog in one load(), so no separate
+        full read is needed. After that every write to the collection
+        (including saves from the data processor) is pushed as a change.
+        """
+        try:
+            from config.firebase_config import firebase_manager
+            from bot.utils.storage import CARDS_COLLECTION
+
+            if self._watch is not None:
+                return True
+
+            self._synced.clear()
+            self._watch_stopped = False
+            self._watch = firebase_manager.db.collection(CARDS_COLLECTION).on_snapshot(self._on_snapshot)
+            logger.info("Card catalog is watching the cards collection")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error watching cards collection: {e}")
+            return False
+
+    def stop_watching(self):
+        """Detach the snapshot listener and release threads waiting for the first sync"""
+        if self._watch is not None:
+            try:
+                self._watch.unsubscribe()
+            except Exception as e:
+                logger.error(f"Error stopping card catalog watch: {e}")
+            self._watch = None
+        if not self._synced.is_set():
+            self._watch_stopped = True
+            self._synced.set()
+
+    def wait_until_synced(self, timeout: Optional[float] = None) -> bool:
+        """Block until the store watch has loaded the full collection
+
+        Returns False on timeout, or early if stop_watching() is called first.
+        """
+        return self._synced.wait(timeout) and not self._watch_stopped
+
+    def _on_snapshot(self, doc_snapshots, changes, read_time):
+        """Apply collection changes pushed by Firestore"""
+        from models.card_loader import create_cards
+
+        factory = self._card_factory()
+        if not self._synced.is_set():
+            # The first snapshot reports every document as ADDED; load them at once
+            # instead of one upsert (and version bump) per card
+            try:
+                self.load(create_cards(doc_snapshots, factory=factory))
+                self._synced.set()
+            except Exception as e:
+                logger.error(f"Error loading card catalog from store watch: {e}")
+            return
+
+        for change in changes:
+            try:
+                doc = change.document
+                if change.type.name == 'REMOVED':
+                    self.remove(doc.id)
+                else:
+                    for card in create_cards([doc], factory=factory):
+                        self.upsert(card)
+            except Exception as e:
+                logger.error(f"Error applying card catalog change: {e}")
+
+    def upsert_records(self, records: Iterable[Dict[str, Any]]):
+        """Apply saved card dicts to stores that don't push changes"""
+        from models.card_loader import create_cards
+
+        for card in create_cards(records, factory=self._card_factory()):
+            self.upsert(card)
+
+    def _card_factory(self):
+        """Model factory for store data; None means compact cards"""
+        if self.compact:
+            return None
+        from models.card import CardFactory
+        return CardFactory
+
+
+# Global catalog instance
+card_catalog = CardCatalog(compact=True)
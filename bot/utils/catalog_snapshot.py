@@ -0,0 +1,104 @@
+import json
+import logging
+import mmap
+import os
+import time
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOT_PATH = os.path.join("data", "catalog_snapshot.jsonl")
+
+# Bumped when the line format changes; older snapshots are ignored
+SNAPSHOT_FORMAT = 1
+
+
+class CatalogSnapshot:
+    """Local JSON-lines copy of the card catalog
+
+    The first line is a header with the format version, save time and
+    card count; every following line is one card dict. Loading it at
+    startup lets search work before Firestore answers, or while it is
+    down. The file is memory-mapped and decoded line by line.
+    """
+
+    def __init__(self, path: str = DEFAULT_SNAPSHOT_PATH):
+        self.path = path
+        self.saved_version: Optional[int] = None
+        self.header: Dict[str, Any] = {}
+
+    @property
+    def exists(self) -> bool:
+        return os.path.exists(self.path) and os.path.getsize(self.path) > 0
+
+    def save(self, catalog) -> bool:
+        """Write the catalog atomically; skipped when nothing changed since the last save"""
+        if not catalog.loaded or catalog.version == self.saved_version:
+            return False
+        try:
+            version = catalog.version
+            cards = catalog.all_cards()
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                header = {'format': SNAPSHOT_FORMAT, 'saved_at': datetime.now().isoformat(), 'cards': len(cards)}
+                f.write(json.dumps(header) + "\n")
+                for card in cards:
+                    data = card.to_dict() if hasattr(card, 'to_dict') else dict(vars(card))
+                    f.write(json.dumps(data, ensure_ascii=False, default=str) + "\n")
+            os.replace(tmp_path, self.path)
+            self.saved_version = version
+            self.header = header
+            logger.info(f"Saved catalog snapshot with {len(cards)} cards")
+            return True
+        except Exception as e:
+            logger.error(f"Error saving catalog snapshot: {e}")
+            return False
+
+    def load(self, catalog) -> bool:
+        """Fill the catalog from the snapshot; False if there is no usable snapshot"""
+        if not self.exists:
+            return False
+        try:
+            from models.card_loader import create_cards
+
+            start = time.perf_counter()
+            parsed = 0
+
+            def records(lines):
+                nonlocal parsed
+                for line in lines:
+                    if line.strip():
+                        parsed += 1
+                        yield json.loads(line)
+
+            with open(self.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                header = json.loads(data.readline())
+                if header.get('format') != SNAPSHOT_FORMAT:
+                    logger.warning(f"Ignoring catalog snapshot with format {header.get('format')}")
+                    return False
+                cards = create_cards(records(iter(data.readline, b'')))
+
+            # Lines, not cards: malformed records are dropped by create_cards but were written
+            if parsed != header.get('cards'):
+                logger.warning(f"Ignoring truncated catalog snapshot ({parsed}/{header.get('cards')} records)")
+                return False
+            if len(cards) < parsed:
+                logger.warning(f"Skipped {parsed - len(cards)} malformed records in catalog snapshot")
+
+            catalog.load(cards)
+            self.saved_version = catalog.version
+            self.header = header
+            logger.info(f"Loaded {len(cards)} cards from catalog snapshot saved at {header.get('saved_at')} "
+                        f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+            return True
+        except Exception as e:
+            logger.error(f"Error loading catalog snapshot: {e}")
+            return False
+
+
+# Global catalog snapshot instance
+catalog_snapshot = CatalogSnapshot()
@@ -0,0 +1,127 @@
+import heapq
+import logging
+from collections import Counter
+from typing import List, Dict, Tuple, Callable, Iterable, Set
+
+from fuzzywuzzy import fuzz, utils
+
+logger = logging.getLogger(__name__)
+
+
+def extract_grams(text: str, n: int = 3) -> Set[str]:
+    """Split text into padded per-word n-grams
+
+    Words are padded with n-1 leading spaces and one trailing space, so
+    short queries still share grams with the start of matching words.
+    """
+    grams = set()
+    for word in utils.full_process(text).split():
+        padded = " " * (n - 1) + word + " "
+        for i in range(len(padded) - n + 1):
+            grams.add(padded[i:i + n])
+    return grams
+
+
+class FuzzyIndex:
+    """N-gram index that shortlists candidates before fuzzy scoring
+
+    Instead of scoring the query against every name, candidates are
+    gathered from the postings of the query's n-grams and only the ones
+    sharing the most grams are scored with the fuzzywuzzy scorer.
+    """
+
+    def __init__(self, scorer: Callable[[str, str], int] = fuzz.WRatio, n: int = 3,
+                 candidate_factor: int = 20, min_candidates: int = 100,
+                 common_gram_ratio: float = 0.2):
+        self.scorer = scorer
+        self.n = n
+        self.candidate_factor = candidate_factor
+        self.min_candidates = min_candidates
+        self.common_gram_ratio = common_gram_ratio
+        self._texts: Dict[str, str] = {}
+        self._grams: Dict[str, Set[str]] = {}
+        self._postings: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def build(self, items: Iterable[Tuple[str, str]]):
+        """Rebuild the index from (key, text) pairs"""
+        self._texts = {}
+        self._grams = {}
+        self._postings = {}
+        for key, text in items:
+            self.add(key, text)
+
+    def add(self, key: str, text: str):
+        """Index text under key, replacing any previous text"""
+        if key in self._texts:
+            self.remove(key)
+
+        grams = extract_grams(text, self.n)
+        self._texts[key] = text
+        self._grams[key] = grams
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(key)
+
+    def remove(self, key: str) -> bool:
+        """Remove key from the index"""
+        if key not in self._texts:
+            return False
+
+        del self._texts[key]
+        for gram in self._grams.pop(key):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(key)
+                if not posting:
+                    del self._postings[gram]
+        return True
+
+    def candidates(self, query: str, limit: int) -> List[str]:
+        """Shortlist of keys sharing n-grams with the query"""
+        query_grams = extract_grams(query, self.n)
+        postings = sorted((self._postings[g] for g in query_grams if g in self._postings), key=len)
+        if not postings:
+            return []
+
+        # Skip very common grams when rarer ones are enough to find matches
+        common_limit = max(1, int(len(self._texts) * self.common_gram_ratio))
+        rare = [p for p in postings if len(p) <= common_limit]
+        if len(rare) >= 2:
+            postings = rare
+
+        overlap = Counter()
+        for posting in postings:
+            overlap.update(posting)
+
+        # Rank by containment in either direction: partial matches score
+        # high in fuzzywuzzy when a short name is contained in the query
+        query_size = len(query_grams)
+        grams = self._grams
+        scores = {key: max(count / query_size, count / len(grams[key])) for key, count in overlap.items()}
+        shortlist_size = max(limit * self.candidate_factor, self.min_candidates)
+        if len(scores) <= shortlist_size:
+            return list(scores)
+
+        shortlist = heapq.nlargest(shortlist_size, scores, key=scores.get)
+        # Every name tied with the cutoff is kept: e.g. all names containing
+        # a one-word query score 1.0, and cutting between them is arbitrary
+        cutoff = scores[shortlist[-1]]
+        shortlisted = set(shortlist)
+        shortlist.extend(key for key, score in scores.items() if score == cutoff and key not in shortlisted)
+        return shortlist
+
+    def search(self, query: str, limit: int = 10, score_cutoff: int = 0) -> List[Tuple[str, int]]:
+        """Ranked (key, score) pairs for the best fuzzy matches"""
+        if not utils.full_process(query):
+            return []
+
+        results = []
+        for key in self.candidates(query, limit):
+            score = self.scorer(query, self._texts[key])
+            if score >= score_cutoff:
+                results.append((key, score))
+
+        results.sort(key=lambda item: (-item[1], self._texts[item[0]]))
+        return results[:limit]
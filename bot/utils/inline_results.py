@@ -0,0 +1,73 @@
+import logging
+from typing import Dict, Any, Callable, List, Optional, Sequence, Tuple
+
+from bot.utils.cache import TTLCache
+from bot.utils.card_catalog import normalize_name
+
+logger = logging.getLogger(__name__)
+
+# Telegram accepts at most 50 results per answer
+PAGE_SIZE = 20
+MAX_RESULTS = 200
+
+# Seconds Telegram may cache an answer on its side; results are not personal
+INLINE_CACHE_TIME = 300
+
+
+class InlineResultCache:
+    """Server-side cache of inline query results, answered one page at a time
+
+    The full result list for a query is built once and kept under the
+    normalized query, the filters and the catalog version, so typing,
+    backspacing and scrolling through results reuse it. Each answer
+    serializes only the page asked for and hands Telegram a next_offset
+    for the rest.
+    """
+
+    def __init__(self, page_size: int = PAGE_SIZE, max_results: int = MAX_RESULTS,
+                 max_queries: int = 1000, ttl: float = INLINE_CACHE_TIME, catalog=None):
+        self.page_size = min(page_size, 50)
+        self.max_results = max_results
+        self._catalog = catalog
+        self._results = TTLCache(max_size=max_queries, ttl=ttl)
+
+    @property
+    def catalog(self):
+        if self._catalog is None:
+            from bot.utils.card_catalog import card_catalog
+            self._catalog = card_catalog
+        return self._catalog
+
+    def _key(self, query: str, filters: Dict[str, Any]) -> Tuple:
+        return (normalize_name(query), tuple(sorted(filters.items())), self.catalog.version)
+
+    @staticmethod
+    def _parse_offset(offset: Optional[str]) -> int:
+        return int(offset) if offset and offset.isdigit() else 0
+
+    def get_page(self, query: str, offset: Optional[str], build: Callable[[], Sequence[Any]],
+                 **filters) -> Tuple[List[Any], str]:
+        """One page of results and the next_offset ('' on the last page)"""
+        key = self._key(query, filters)
+        results = self._results.get(key)
+        if results is None:
+            results = list(build())[:self.max_results]
+            self._results.set(key, results)
+
+        start = self._parse_offset(offset)
+        page = results[start:start + self.page_size]
+        end = start + len(page)
+        return page, str(end) if end < len(results) else ''
+
+    async def answer(self, inline_query, build: Callable[[], Sequence[Any]], **filters):
+        """Answer an inline query with the requested page of cached results"""
+        page, next_offset = self.get_page(inline_query.query, inline_query.offset, build, **filters)
+        await inline_query.answer(page, cache_time=INLINE_CACHE_TIME, is_personal=False,
+                                  next_offset=next_offset)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return self._results.get_stats()
+
+
+# Global inline result cache instance
+inline_result_cache = InlineResultCache()
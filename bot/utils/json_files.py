@@ -0,0 +1,29 @@
+import json
+import logging
+import os
+from typing import Dict, Any
+
+logger = logging.getLogger(__name__)
+
+
+def load_json(path: str) -> Dict[str, Any]:
+    """Read a JSON file, starting empty when it is missing or unreadable"""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        logger.error(f"Error reading {path}, starting empty: {e}")
+        return {}
+
+
+def save_json(path: str, data: Dict[str, Any]):
+    """Write atomically so a crash never leaves a truncated file"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, sort_keys=True)
+    os.replace(tmp_path, path)
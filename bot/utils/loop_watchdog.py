@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Innermost frames kept from the stack of the blocking code
+STACK_LIMIT = 25
+
+
+class LoopWatchdog:
+    """Detects event-loop stalls and captures the stack of the blocking code
+
+    A heartbeat coroutine ticks on the loop every interval and a daemon
+    thread checks its age. Once the heartbeat is older than threshold the
+    thread grabs the loop thread's current stack (the synchronous call
+    holding the loop) and logs it, so even a loop that never recovers is
+    reported. When the loop comes back the heartbeat records how long the
+    stall lasted.
+    """
+
+    def __init__(self, threshold: float = 0.25, interval: Optional[float] = None, max_reports: int = 20):
+        self.threshold = threshold
+        self.interval = interval or min(threshold / 4, 0.05)
+        self.reports: deque = deque(maxlen=max_reports)
+        self.stalls = 0
+        self.total_blocked = 0.0
+        self.longest = 0.0
+        self._lock = threading.Lock()
+        self._last_beat = time.monotonic()
+        self._stack: Optional[str] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self):
+        """Start watching the running event loop"""
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        logger.info(f"Event loop watchdog started (threshold {self.threshold * 1000:.0f} ms)")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._stop.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._thread.join(timeout=1)
+        self._thread = None
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            with self._lock:
+                lag = now - self._last_beat - self.interval
+                self._last_beat = now
+            if lag > self.threshold:
+                self._record(lag)
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                stalled_for = time.monotonic() - self._last_beat
+                if stalled_for <= self.threshold + self.interval or self._stack is not None:
+                    continue
+                frame = sys._current_frames().get(self._loop_thread_id)
+                stack = self._stack = "".join(traceback.format_stack(frame, limit=STACK_LIMIT)) if frame else ""
+            logger.warning(f"Event loop blocked for over {stalled_for * 1000:.0f} ms in:\n{stack}")
+
+    def _record(self, lag: float):
+        with self._lock:
+            stack, self._stack = self._stack, None
+            self.stalls += 1
+            self.total_blocked += lag
+            self.longest = max(self.longest, lag)
+            self.reports.append({
+                'at': datetime.now().isoformat(timespec='seconds'),
+                'duration_ms': round(lag * 1000, 1),
+                # Stalls shorter than one watchdog check can end before a stack is taken
+                'stack': stack,
+            })
+        logger.warning(f"Event loop stall of {lag * 1000:.0f} ms")
+
+    def recent(self, limit: int = 5) -> List[Dict[str, Any]]:
+        """Latest stall reports, newest first"""
+        with self._lock:
+            return list(self.reports)[::-1][:limit]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'running': self.running,
+            'threshold_ms': round(self.threshold * 1000, 1),
+            'stalls': self.stalls,
+            'total_blocked_ms': round(self.total_blocked * 1000, 1),
+            'longest_ms': round(self.longest * 1000, 1),
+        }
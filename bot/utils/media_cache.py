@@ -0,0 +1,127 @@
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+from telegram import InlineQueryResultCachedPhoto, InlineQueryResultPhoto
+from telegram.error import BadRequest
+
+from bot.utils.json_files import load_json, save_json
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FILE_ID_PATH = os.path.join("data", "file_ids.json")
+
+# New file_ids are written to disk after this many, and on shutdown
+SAVE_EVERY = 20
+
+
+def _is_url(image: str) -> bool:
+    return image.startswith(('http://', 'https://'))
+
+
+class FileIdCache:
+    """Persistent mapping from card images to Telegram file_ids
+
+    An image (a URL or a local file path) is transferred to Telegram the
+    first time it is sent; the file_id from that message is stored and
+    every later send, including inline results, reuses it. file_ids
+    belong to the bot that received them, so entries are kept per bot.
+    """
+
+    def __init__(self, path: str = DEFAULT_FILE_ID_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = load_json(path)
+        self._unsaved = 0
+        self.uploads = 0
+        self.reuses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _key(bot_id: int, image: str) -> str:
+        return f"{bot_id}:{image}"
+
+    def get(self, bot_id: int, image: str) -> Optional[str]:
+        """Cached file_id for an image, if it was sent before"""
+        entry = self._entries.get(self._key(bot_id, image))
+        return entry['file_id'] if entry else None
+
+    def remember(self, bot_id: int, image: str, message) -> Optional[str]:
+        """Store the file_id of the largest photo size in a sent message"""
+        if not message or not getattr(message, 'photo', None):
+            return None
+        photo = message.photo[-1]
+        with self._lock:
+            self._entries[self._key(bot_id, image)] = {
+                'file_id': photo.file_id,
+                'file_unique_id': photo.file_unique_id,
+                'saved_at': datetime.now().isoformat(),
+            }
+            self._unsaved += 1
+            save_now = self._unsaved >= SAVE_EVERY
+        if save_now:
+            self.save()
+        return photo.file_id
+
+    def forget(self, bot_id: int, image: str):
+        with self._lock:
+            if self._entries.pop(self._key(bot_id, image), None) is not None:
+                self._unsaved += 1
+
+    async def send_photo(self, bot, chat_id, image: str, **kwargs):
+        """Send a card image, reusing its file_id after the first transfer"""
+        file_id = self.get(bot.id, image)
+        if file_id:
+            try:
+                message = await bot.send_photo(chat_id=chat_id, photo=file_id, **kwargs)
+                self.reuses += 1
+                return message
+            except BadRequest as e:
+                # The file_id is no longer usable; fall back to a fresh transfer
+                logger.warning(f"Cached file_id for {image} rejected: {e}")
+                self.forget(bot.id, image)
+
+        if _is_url(image):
+            message = await bot.send_photo(chat_id=chat_id, photo=image, **kwargs)
+        else:
+            with open(image, 'rb') as f:
+                message = await bot.send_photo(chat_id=chat_id, photo=f, **kwargs)
+        self.uploads += 1
+        self.remember(bot.id, image, message)
+        return message
+
+    def inline_photo(self, bot_id: int, result_id: str, image: str,
+                     thumbnail_url: Optional[str] = None, **kwargs):
+        """Inline result for a card image: cached by file_id when possible
+
+        Returns None when the image was never sent and is not a URL, since
+        inline results can't upload files.
+        """
+        file_id = self.get(bot_id, image)
+        if file_id:
+            return InlineQueryResultCachedPhoto(id=result_id, photo_file_id=file_id, **kwargs)
+        if _is_url(image):
+            return InlineQueryResultPhoto(id=result_id, photo_url=image,
+                                          thumbnail_url=thumbnail_url or image, **kwargs)
+        return None
+
+    def save(self):
+        with self._lock:
+            if not self._unsaved:
+                return
+            try:
+                save_json(self.path, self._entries)
+                self._unsaved = 0
+            except Exception as e:
+                logger.error(f"Error saving file_id cache: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {'file_ids': len(self._entries), 'uploads': self.uploads, 'reuses': self.reuses}
+
+
+# Global file_id cache instance
+file_id_cache = FileIdCache()
@@ -0,0 +1,281 @@
+import bisect
+import functools
+import inspect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds, from in-memory lookups to slow network calls
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+BUCKET_LABELS = tuple(f'le="{bound}"' for bound in BUCKETS) + ('le="+Inf"',)
+
+# Timed call families: metric name prefix and help text
+FAMILIES = {
+    'handler': ('tcgbot_handler', "Telegram update handler callbacks"),
+    'storage': ('tcgbot_storage', "Storage backend and database calls"),
+    'bot_api': ('tcgbot_bot_api', "Outbound Bot API requests"),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# A gauge callback returns one number, or label value -> number
+GaugeValue = Union[float, Dict[str, float]]
+
+
+class Histogram:
+    """Cumulative latency histogram in Prometheus layout"""
+
+    __slots__ = ('counts', 'sum', 'count', 'errors')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.errors = 0
+
+    def observe(self, seconds: float, error: bool = False):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+        if error:
+            self.errors += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bucket bound below which a fraction q of calls finished"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Labels, extra: str = "") -> str:
+    parts = [f'{key}="{_escape(value)}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Metrics:
+    """Call counts, errors and latency histograms per family and label set
+
+    Thread-safe, so storage calls running on the database thread pool
+    record into the same registry as handlers on the event loop.
+    Gauges are callbacks read at scrape time, so components keep their
+    own counters and only expose them here. render() produces the
+    Prometheus text exposition format.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {family: {} for family in FAMILIES}
+        self._gauges: Dict[str, Tuple[str, str, Optional[str], Callable[[], GaugeValue]]] = {}
+        self.started_at = time.time()
+
+    def register_gauge(self, name: str, description: str, collect: Callable[[], GaugeValue],
+                       label: Optional[str] = None, counter: bool = False):
+        """Export collect() as name; with label, collect returns label value -> number
+
+        counter marks values that only grow (totals), so Prometheus handles
+        their reset on restart. Registering a name again replaces it.
+        """
+        with self._lock:
+            self._gauges[name] = ('counter' if counter else 'gauge', description, label, collect)
+
+    def gauge_values(self) -> Dict[str, GaugeValue]:
+        """Current value of every registered gauge; failing callbacks are left out"""
+        with self._lock:
+            gauges = dict(self._gauges)
+        return self._collect(gauges)
+
+    @staticmethod
+    def _collect(gauges) -> Dict[str, GaugeValue]:
+        values = {}
+        for name, (_, _, _, collect) in gauges.items():
+            try:
+                values[name] = collect()
+            except Exception as e:
+                logger.error(f"Error collecting metric {name}: {e}")
+        return values
+
+    def observe(self, family: str, seconds: float, error: bool = False, **labels: str):
+        key = tuple(sorted((name, str(value)) for name, value in labels.items()))
+        with self._lock:
+            histogram = self._histograms[family].get(key)
+            if histogram is None:
+                histogram = self._histograms[family][key] = Histogram()
+            histogram.observe(seconds, error)
+
+    @contextmanager
+    def timer(self, family: str, **labels: str):
+        """Time the enclosed block; an exception counts as an error"""
+        start = time.perf_counter()
+        error = False
+        try:
+            yield
+        except Exception:
+            error = True
+            raise
+        finally:
+            self.observe(family, time.perf_counter() - start, error, **labels)
+
+    def histogram(self, family: str, **labels: str) -> Optional[Histogram]:
+        key = tuple(sorted((name, str(value)) for name, value in labels.items()))
+        return self._histograms[family].get(key)
+
+    def reset(self):
+        with self._lock:
+            for histograms in self._histograms.values():
+                histograms.clear()
+
+    def render(self) -> str:
+        """All metrics in Prometheus text format"""
+        with self._lock:
+            # Copy under the lock so a scrape never sees a half-updated histogram
+            snapshot = {family: [(labels, list(h.counts), h.sum, h.count, h.errors) for labels, h in histograms.items()]
+                        for family, histograms in self._histograms.items()}
+            gauges = dict(self._gauges)
+        # Callbacks take their components' locks, so they run outside ours
+        gauge_values = self._collect(gauges)
+
+        lines: List[str] = []
+        for family, items in snapshot.items():
+            prefix, description = FAMILIES[family]
+            lines.append(f"# HELP {prefix}_duration_seconds Latency of {description.lower()}")
+            lines.append(f"# TYPE {prefix}_duration_seconds histogram")
+            for labels, counts, total, count, _ in items:
+                cumulative = 0
+                for bound, bucket_count in zip(BUCKET_LABELS, counts):
+                    cumulative += bucket_count
+                    lines.append(f"{prefix}_duration_seconds_bucket{_format_labels(labels, bound)} {cumulative}")
+                lines.append(f"{prefix}_duration_seconds_sum{_format_labels(labels)} {total:.6f}")
+                lines.append(f"{prefix}_duration_seconds_count{_format_labels(labels)} {count}")
+            lines.append(f"# HELP {prefix}_errors_total Failed {description.lower()}")
+            lines.append(f"# TYPE {prefix}_errors_total counter")
+            for labels, _, _, _, errors in items:
+                lines.append(f"{prefix}_errors_total{_format_labels(labels)} {errors}")
+
+        for name, value in gauge_values.items():
+            kind, description, label, _ = gauges[name]
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+            if label is None:
+                lines.append(f"{name} {value:g}")
+                continue
+            for label_value, number in sorted(value.items()):
+                lines.append(f"{name}{_format_labels(((label, str(label_value)),))} {number:g}")
+
+        lines.append("# HELP tcgbot_start_time_seconds Unix time the bot process started")
+        lines.append("# TYPE tcgbot_start_time_seconds gauge")
+        lines.append(f"tcgbot_start_time_seconds {self.started_at:.0f}")
+        return "\n".join(lines) + "\n"
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-call summary: count, error rate and approximate p50/p95/p99 in ms"""
+        stats = {}
+        with self._lock:
+            for family, histograms in self._histograms.items():
+                for labels, histogram in histograms.items():
+                    name = f"{family}:" + ",".join(value for _, value in labels if value)
+                    stats[name] = {
+                        'count': histogram.count,
+                        'error_rate': round(histogram.errors / histogram.count, 4) if histogram.count else 0.0,
+                        'avg_ms': round(histogram.sum / histogram.count * 1000, 2) if histogram.count else None,
+                        'p50_ms': _bound_ms(histogram.quantile(0.5)),
+                        'p95_ms': _bound_ms(histogram.quantile(0.95)),
+                        'p99_ms': _bound_ms(histogram.quantile(0.99)),
+                    }
+        return stats
+
+
+def _bound_ms(bound: Optional[float]) -> Optional[float]:
+    return None if bound is None else bound * 1000
+
+
+def callback_prefix(data: Optional[str]) -> str:
+    """Low-cardinality label for callback data: its first two words (deck_show, rules_basics)"""
+    if not data:
+        return ""
+    return "_".join(data.split("_")[:2])
+
+
+def instrument_handlers(application, registry: Optional[Metrics] = None):
+    """Wrap every registered handler callback to record its latency and errors
+
+    Callback query handlers are also labelled with the callback data
+    prefix, so e.g. deck_show and deck_delete are told apart.
+    """
+    registry = registry or metrics
+    for handlers in application.handlers.values():
+        for handler in handlers:
+            if getattr(handler.callback, '_metrics_wrapped', False):
+                continue
+            handler.callback = _timed_callback(registry, handler.callback)
+
+
+def _timed_callback(registry: Metrics, callback):
+    name = getattr(callback, '__name__', type(callback).__name__)
+
+    @functools.wraps(callback)
+    async def timed(update, context):
+        query = getattr(update, 'callback_query', None)
+        prefix = callback_prefix(query.data) if query is not None else ""
+        with registry.timer('handler', handler=name, callback=prefix):
+            return await callback(update, context)
+
+    timed._metrics_wrapped = True
+    return timed
+
+
+class TimedStorage:
+    """Storage backend proxy that times every public call
+
+    Generators such as stream_cards are timed until they are exhausted.
+    """
+
+    def __init__(self, backend, registry: Optional[Metrics] = None):
+        self._backend = backend
+        self._registry = registry or metrics
+        self.name = backend.name
+
+    @property
+    def backend(self):
+        return self._backend
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._backend, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+
+        registry = self._registry
+        labels = {'backend': self.name, 'operation': name}
+
+        if inspect.isgeneratorfunction(attr):
+            @functools.wraps(attr)
+            def timed_stream(*args, **kwargs):
+                with registry.timer('storage', **labels):
+                    yield from attr(*args, **kwargs)
+            return timed_stream
+
+        @functools.wraps(attr)
+        def timed(*args, **kwargs):
+            with registry.timer('storage', **labels):
+                return attr(*args, **kwargs)
+        return timed
+
+
+# Global metrics instance
+metrics = Metrics()
@@ -0,0 +1,75 @@
+import asyncio
+import logging
+from typing import Optional
+
+from bot.utils.metrics import Metrics, metrics
+
+logger = logging.getLogger(__name__)
+
+METRICS_PATH = '/metrics'
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class MetricsServer:
+    """Serves the metrics registry at GET /metrics for a Prometheus scraper
+
+    Meant to listen on a local interface only; each connection gets one
+    response and is closed.
+    """
+
+    def __init__(self, registry: Optional[Metrics] = None, listen: str = '127.0.0.1', port: int = 9464):
+        self.registry = registry or metrics
+        self.listen = listen
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def running(self) -> bool:
+        return self._server is not None
+
+    async def start(self):
+        """Start listening for scrapes"""
+        self._server = await asyncio.start_server(self._handle_connection, self.listen, self.port)
+        # Port 0 picks a free port; report the real one
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Metrics server listening on {self.listen}:{self.port}{METRICS_PATH}")
+
+    async def stop(self):
+        if self._server is None:
+            return
+        self._server.close()
+        await self._server.wait_closed()
+        self._server = None
+        logger.info("Metrics server stopped")
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=10)
+            # Headers are not needed; drain them so the client sees a clean response
+            while (await asyncio.wait_for(reader.readline(), timeout=10)) not in (b'\r\n', b'\n', b''):
+                pass
+
+            parts = request_line.decode('latin-1').split()
+            if len(parts) != 3:
+                status, body = "400 Bad Request", b""
+            elif parts[1].split('?', 1)[0] != METRICS_PATH:
+                status, body = "404 Not Found", b""
+            elif parts[0] != 'GET':
+                status, body = "405 Method Not Allowed", b""
+            else:
+                status, body = "200 OK", self.registry.render().encode('utf-8')
+
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                f"Content-Type: {CONTENT_TYPE}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: close\r\n\r\n".encode('latin-1') + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        except Exception as e:
+            logger.error(f"Error serving metrics: {e}")
+        finally:
+            writer.close()
@@ -0,0 +1,88 @@
+import asyncio
+import cProfile
+import logging
+import os
+import pstats
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE_DIR = os.path.join("data", "profiles")
+
+MAX_PROFILE_SECONDS = 300
+
+
+def top_functions(stats: pstats.Stats, limit: int = 15) -> List[Tuple[str, int, float, float]]:
+    """(function, calls, own seconds, cumulative seconds), most cumulative time first"""
+    rows = []
+    for (filename, line, name), (_, calls, own, cumulative, _) in stats.stats.items():
+        location = f"{os.path.basename(filename)}:{line}" if line else filename
+        rows.append((f"{name} ({location})", calls, own, cumulative))
+    rows.sort(key=lambda row: row[3], reverse=True)
+    return rows[:limit]
+
+
+class LoopProfiler:
+    """On-demand cProfile session for the event loop thread
+
+    profile() turns cProfile on for the thread running the event loop,
+    so every handler and callback that runs during the window is
+    recorded, then writes a .prof file (open it with pstats or snakeviz)
+    and returns the hottest functions. One session runs at a time.
+    """
+
+    def __init__(self, output_dir: str = DEFAULT_PROFILE_DIR, max_seconds: float = MAX_PROFILE_SECONDS):
+        self.output_dir = output_dir
+        self.max_seconds = max_seconds
+        self._profile: Optional[cProfile.Profile] = None
+
+    @property
+    def running(self) -> bool:
+        return self._profile is not None
+
+    async def profile(self, seconds: float, limit: int = 15) -> Dict[str, Any]:
+        """Profile the loop for seconds; must be awaited on the loop being profiled"""
+        result = {'success': False, 'path': None, 'seconds': 0.0, 'top': [], 'error': None}
+        if self._profile is not None:
+            result['error'] = "A profile is already running"
+            return result
+
+        seconds = max(0.1, min(float(seconds), self.max_seconds))
+        self._profile = cProfile.Profile()
+        try:
+            try:
+                self._profile.enable()
+            except ValueError as e:
+                # Another profiler or tracer is active on this thread
+                result['error'] = str(e)
+                return result
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                self._profile.disable()
+
+            os.makedirs(self.output_dir, exist_ok=True)
+            path = os.path.join(self.output_dir, f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prof")
+            self._profile.dump_stats(path)
+            result.update(success=True, path=path, seconds=seconds,
+                          top=top_functions(pstats.Stats(self._profile), limit))
+            logger.info(f"Saved {seconds:.0f}s event loop profile to {path}")
+        except Exception as e:
+            result['error'] = str(e)
+            logger.error(f"Error profiling event loop: {e}")
+        finally:
+            self._profile = None
+        return result
+
+
+def format_top(top: List[Tuple[str, int, float, float]]) -> str:
+    """Plain-text table of top_functions() rows"""
+    lines = [f"{'cum ms':>8} {'own ms':>8} {'calls':>7}  function"]
+    for function, calls, own, cumulative in top:
+        lines.append(f"{cumulative * 1000:8.1f} {own * 1000:8.1f} {calls:7d}  {function}")
+    return "\n".join(lines)
+
+
+# Global loop profiler instance
+loop_profiler = LoopProfiler()
@@ -0,0 +1,76 @@
+import logging
+import threading
+from typing import Dict, Any, Callable, NamedTuple, Optional, Tuple
+
+from telegram import InlineKeyboardMarkup
+
+from bot.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Rendered messages only go stale through card changes, so the TTL is a backstop
+DEFAULT_TTL = 24 * 60 * 60
+
+
+class RenderedMessage(NamedTuple):
+    """A finished card message, ready to send or edit into place"""
+    text: str
+    parse_mode: Optional[str] = 'Markdown'
+    reply_markup: Optional[InlineKeyboardMarkup] = None
+
+    def as_kwargs(self) -> Dict[str, Any]:
+        """Keyword arguments for reply_text / edit_message_text"""
+        return {'text': self.text, 'parse_mode': self.parse_mode, 'reply_markup': self.reply_markup}
+
+
+class CardRenderCache:
+    """Cache of rendered card messages keyed by card id, view and content version
+
+    Handlers pass a render function; it only runs when the card has no
+    rendering for the requested view (e.g. 'detail' for show_card_,
+    'stats' for card_stats_) at its current version. The version follows
+    the catalog revision of the card and is bumped again whenever the card
+    writer saves the card, so re-scraped cards are rendered afresh.
+    """
+
+    def __init__(self, max_size: int = 2000, ttl: float = DEFAULT_TTL, catalog=None):
+        self._catalog = catalog
+        self._entries = TTLCache(max_size=max_size, ttl=ttl)
+        self._lock = threading.Lock()
+        self._generations: Dict[str, int] = {}
+
+    @property
+    def catalog(self):
+        if self._catalog is None:
+            from bot.utils.card_catalog import card_catalog
+            self._catalog = card_catalog
+        return self._catalog
+
+    def version(self, card_id: str) -> Tuple[int, int]:
+        """Current content version of a card"""
+        return self.catalog.revision(card_id), self._generations.get(card_id, 0)
+
+    def get_or_render(self, card, view: str, render: Callable[[Any], RenderedMessage]) -> RenderedMessage:
+        """Rendered message for a card view, rendering it only on a miss"""
+        key = (card.id, view, self.version(card.id))
+        rendered = self._entries.get(key)
+        if rendered is None:
+            # Renderings of older versions are never asked for again and age out of the LRU
+            rendered = render(card)
+            self._entries.set(key, rendered)
+        return rendered
+
+    def invalidate(self, card_id: str):
+        """Drop every rendering of a card"""
+        with self._lock:
+            self._generations[card_id] = self._generations.get(card_id, 0) + 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return self._entries.get_stats()
+
+
+# Global render cache instance
+card_render_cache = CardRenderCache()
@@ -0,0 +1,229 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Dict, Any, Optional, Callable, Coroutine, Hashable, List, Union
+
+from telegram.error import BadRequest, RetryAfter
+from telegram.ext import BaseRateLimiter
+
+from bot.utils.cache import TTLCache
+from bot.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Bot API limits: ~30 messages per second overall, about one per second in a
+# private chat (short bursts are tolerated) and 20 per minute in a group
+GLOBAL_MAX_RATE = 30
+PRIVATE_MAX_RATE = 3
+PRIVATE_TIME_PERIOD = 3.0
+GROUP_MAX_RATE = 20
+GROUP_TIME_PERIOD = 60.0
+
+# Idle per-chat limiters are pruned once there are more than this many
+MAX_CHAT_LIMITERS = 1024
+
+EDIT_ENDPOINTS = ('editMessageText', 'editMessageCaption', 'editMessageReplyMarkup', 'editMessageMedia')
+
+# Request fields that decide what an edited message looks like
+EDIT_FIELDS = ('text', 'caption', 'parse_mode', 'entities', 'caption_entities',
+               'disable_web_page_preview', 'media', 'reply_markup')
+
+NOT_MODIFIED = 'message is not modified'
+
+ApiResult = Union[bool, Dict[str, Any], List[Dict[str, Any]]]
+
+
+class WindowLimiter:
+    """Allows at most max_rate acquisitions per sliding time period, in FIFO order"""
+
+    def __init__(self, max_rate: int, time_period: float, clock: Callable[[], float] = time.monotonic):
+        self.max_rate = max_rate
+        self.time_period = time_period
+        self._clock = clock
+        self._sent: deque = deque()
+        self._lock = asyncio.Lock()
+
+    def _expire(self, now: float):
+        while self._sent and self._sent[0] <= now - self.time_period:
+            self._sent.popleft()
+
+    @property
+    def idle(self) -> bool:
+        self._expire(self._clock())
+        return not self._sent and not self._lock.locked()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = self._clock()
+                self._expire(now)
+                if len(self._sent) < self.max_rate:
+                    self._sent.append(now)
+                    return
+                await asyncio.sleep(self._sent[0] + self.time_period - now)
+
+
+def _field_value(value: Any) -> Any:
+    if hasattr(value, 'to_json'):
+        return value.to_json()
+    if isinstance(value, (list, tuple)):
+        return tuple(_field_value(item) for item in value)
+    return repr(value)
+
+
+class SendScheduler(BaseRateLimiter):
+    """Outbound scheduler for every Bot API request the application makes
+
+    Requests aimed at a chat wait for a per-chat slot and then a global
+    slot, so bursts are spread out at the API ceiling instead of being
+    answered with 429s. A RetryAfter pauses all sending for the time
+    Telegram asks for and the request is retried. Edits that would not
+    change a message are dropped, and an edit still waiting for a slot is
+    skipped when a newer edit to the same message arrives.
+    """
+
+    def __init__(self, global_max_rate: int = GLOBAL_MAX_RATE,
+                 private_max_rate: int = PRIVATE_MAX_RATE, private_time_period: float = PRIVATE_TIME_PERIOD,
+                 group_max_rate: int = GROUP_MAX_RATE, group_time_period: float = GROUP_TIME_PERIOD,
+                 max_retries: int = 3):
+        self._global = WindowLimiter(global_max_rate, 1.0)
+        self.private_limits = (private_max_rate, private_time_period)
+        self.group_limits = (group_max_rate, group_time_period)
+        self.max_retries = max_retries
+        self._chats: Dict[Hashable, WindowLimiter] = {}
+        # Last content sent to each message, to spot edits that change nothing
+        self._last_edits = TTLCache(max_size=5000, ttl=3600)
+        self._latest_edit: Dict[Hashable, int] = {}
+        self._edit_sequence = 0
+        self._paused_until = 0.0
+        self.pending = 0
+        self.sent = 0
+        self.retries = 0
+        self.dropped_edits = 0
+        self.coalesced_edits = 0
+
+    async def initialize(self) -> None:
+        """Nothing to set up; limiters are created on demand"""
+
+    async def shutdown(self) -> None:
+        """Nothing to free"""
+
+    def _chat_limiter(self, chat_id: Union[int, str]) -> WindowLimiter:
+        limiter = self._chats.get(chat_id)
+        if limiter is None:
+            if len(self._chats) >= MAX_CHAT_LIMITERS:
+                for key in [key for key, other in self._chats.items() if other.idle]:
+                    del self._chats[key]
+            # Negative ids and @usernames are groups or channels
+            is_group = isinstance(chat_id, str) or chat_id < 0
+            max_rate, time_period = self.group_limits if is_group else self.private_limits
+            limiter = self._chats[chat_id] = WindowLimiter(max_rate, time_period)
+        return limiter
+
+    @staticmethod
+    def _chat_id(data: Dict[str, Any]) -> Optional[Union[int, str]]:
+        chat_id = data.get('chat_id')
+        if chat_id is None:
+            return None
+        try:
+            return int(chat_id)
+        except (TypeError, ValueError):
+            return str(chat_id)
+
+    @staticmethod
+    def _message_key(endpoint: str, data: Dict[str, Any]) -> Optional[Hashable]:
+        if endpoint not in EDIT_ENDPOINTS:
+            return None
+        if data.get('inline_message_id'):
+            return ('inline', data['inline_message_id'])
+        if data.get('chat_id') is not None and data.get('message_id') is not None:
+            return (str(data['chat_id']), int(data['message_id']))
+        return None
+
+    @staticmethod
+    def _fingerprint(endpoint: str, data: Dict[str, Any]) -> tuple:
+        return (endpoint,) + tuple((field, _field_value(data[field])) for field in EDIT_FIELDS if field in data)
+
+    async def _wait_if_paused(self):
+        while True:
+            delay = self._paused_until - time.monotonic()
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+
+    def _pause(self, retry_after: Any):
+        seconds = retry_after.total_seconds() if hasattr(retry_after, 'total_seconds') else float(retry_after)
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds + 0.1)
+        self.retries += 1
+        logger.warning(f"Flood control hit, pausing outbound requests for {seconds}s")
+
+    async def process_request(
+        self,
+        callback: Callable[..., Coroutine[Any, Any, ApiResult]],
+        args: Any,
+        kwargs: Dict[str, Any],
+        endpoint: str,
+        data: Dict[str, Any],
+        rate_limit_args: Optional[int],
+    ) -> ApiResult:
+        max_retries = self.max_retries if rate_limit_args is None else rate_limit_args
+        chat_id = self._chat_id(data)
+        message_key = self._message_key(endpoint, data)
+        fingerprint = None
+        sequence = None
+        if message_key is not None:
+            fingerprint = self._fingerprint(endpoint, data)
+            if message_key not in self._latest_edit and self._last_edits.get(message_key) == fingerprint:
+                self.dropped_edits += 1
+                return True
+            self._edit_sequence += 1
+            sequence = self._latest_edit[message_key] = self._edit_sequence
+
+        self.pending += 1
+        try:
+            for attempt in range(max_retries + 1):
+                if chat_id is not None:
+                    await self._chat_limiter(chat_id).acquire()
+                if sequence is not None and self._latest_edit.get(message_key) != sequence:
+                    # A newer edit to this message is queued; it makes this one pointless
+                    self.coalesced_edits += 1
+                    return True
+                if chat_id is not None:
+                    await self._global.acquire()
+                await self._wait_if_paused()
+
+                try:
+                    with metrics.timer('bot_api', method=endpoint):
+                        result = await callback(*args, **kwargs)
+                except RetryAfter as e:
+                    if attempt == max_retries:
+                        logger.error(f"Giving up on {endpoint} after {max_retries} flood control retries")
+                        raise
+                    self._pause(e.retry_after)
+                    continue
+                except BadRequest as e:
+                    if message_key is not None and NOT_MODIFIED in str(e).lower():
+                        self._last_edits.set(message_key, fingerprint)
+                        self.dropped_edits += 1
+                        return True
+                    raise
+
+                if message_key is not None:
+                    self._last_edits.set(message_key, fingerprint)
+                self.sent += 1
+                return result
+        finally:
+            self.pending -= 1
+            if sequence is not None and self._latest_edit.get(message_key) == sequence:
+                del self._latest_edit[message_key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'pending': self.pending,
+            'sent': self.sent,
+            'retries': self.retries,
+            'dropped_edits': self.dropped_edits,
+            'coalesced_edits': self.coalesced_edits,
+            'chats_tracked': len(self._chats),
+        }
@@ -0,0 +1,399 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+from bot.utils.card_catalog import normalize_name
+from bot.utils.metrics import TimedStorage
+
+logger = logging.getLogger(__name__)
+
+CARDS_COLLECTION = 'cards'
+DECKS_COLLECTION = 'decks'
+USERS_COLLECTION = 'users'
+
+# Firestore rejects batches with more than 500 writes
+MAX_BATCH_SIZE = 500
+
+DEFAULT_SQLITE_PATH = os.path.join("data", "genshin_tcg.db")
+
+ActivityEntry = Tuple[str, Dict[str, Any]]
+
+
+class StorageBackend(ABC):
+    """Persistence for cards, decks and users
+
+    Records are plain dicts carrying their id under 'id'; converting them
+    to models is up to the caller.
+    """
+
+    name = "base"
+
+    @property
+    def key(self) -> str:
+        """Identifies the store the data lives in, for per-store state files"""
+        return self.name
+
+    # Cards
+    @abstractmethod
+    def get_card(self, card_id: str) -> Optional[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def save_cards(self, cards: List[Dict[str, Any]]) -> int:
+        """Upsert cards in as few writes as the store allows"""
+
+    @abstractmethod
+    def stream_cards(self) -> Iterator[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def search_cards(self, name_prefix: str = "", element: Optional[str] = None,
+                     card_type: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def count_cards(self) -> int: ...
+
+    # Decks
+    @abstractmethod
+    def get_deck(self, deck_id: str) -> Optional[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def save_deck(self, deck: Dict[str, Any]) -> bool: ...
+
+    @abstractmethod
+    def get_user_decks(self, user_id: str) -> List[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def delete_deck(self, deck_id: str, user_id: str) -> bool: ...
+
+    # Users
+    @abstractmethod
+    def get_user(self, user_id: str) -> Optional[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def record_activity(self, entries: List[ActivityEntry]) -> int:
+        """Set last_active and add message_count for up to MAX_BATCH_SIZE users in one write"""
+
+    @abstractmethod
+    def health_check(self, timeout: float = 5.0) -> bool:
+        """Cheap read that raises if the store can't be used"""
+
+    def close(self):
+        """Release connections"""
+
+
+class FirestoreBackend(StorageBackend):
+    """Storage on the Firestore cards, decks and users collections"""
+
+    name = "firestore"
+
+    def __init__(self, db=None):
+        self._db = db
+
+    @property
+    def db(self):
+        if self._db is None:
+            from config.firebase_config import firebase_manager
+            self._db = firebase_manager.db
+        return self._db
+
+    @staticmethod
+    def _to_record(doc) -> Optional[Dict[str, Any]]:
+        if not doc.exists:
+            return None
+        data = doc.to_dict() or {}
+        data.setdefault('id', doc.id)
+        return data
+
+    def get_card(self, card_id: str) -> Optional[Dict[str, Any]]:
+        return self._to_record(self.db.collection(CARDS_COLLECTION).document(card_id).get())
+
+    def save_cards(self, cards: List[Dict[str, Any]]) -> int:
+        collection = self.db.collection(CARDS_COLLECTION)
+        for start in range(0, len(cards), MAX_BATCH_SIZE):
+            batch = self.db.batch()
+            for card in cards[start:start + MAX_BATCH_SIZE]:
+                batch.set(collection.document(card['id']), card, merge=True)
+            batch.commit()
+        return len(cards)
+
+    def stream_cards(self) -> Iterator[Dict[str, Any]]:
+        for doc in self.db.collection(CARDS_COLLECTION).stream():
+            record = self._to_record(doc)
+            if record:
+                yield record
+
+    def search_cards(self, name_prefix: str = "", element: Optional[str] = None,
+                     card_type: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        query = self.db.collection(CARDS_COLLECTION)
+        if element:
+            query = query.where('element', '==', element.upper())
+        if card_type:
+            query = query.where('card_type', '==', card_type.upper())
+        prefix = normalize_name(name_prefix)
+        # Firestore can't match a normalized prefix; narrow in Python
+        cards = [self._to_record(doc) for doc in query.stream()]
+        cards = sorted((card for card in cards if card and normalize_name(card.get('name', '')).startswith(prefix)),
+                       key=lambda card: card.get('name', ''))
+        return cards[:limit] if limit else cards
+
+    def count_cards(self) -> int:
+        return sum(1 for _ in self.db.collection(CARDS_COLLECTION).select([]).stream())
+
+    def get_deck(self, deck_id: str) -> Optional[Dict[str, Any]]:
+        return self._to_record(self.db.collection(DECKS_COLLECTION).document(deck_id).get())
+
+    def save_deck(self, deck: Dict[str, Any]) -> bool:
+        self.db.collection(DECKS_COLLECTION).document(deck['id']).set(deck)
+        return True
+
+    def get_user_decks(self, user_id: str) -> List[Dict[str, Any]]:
+        docs = self.db.collection(DECKS_COLLECTION).where('user_id', '==', user_id).stream()
+        return sorted(filter(None, map(self._to_record, docs)), key=lambda deck: deck.get('name', ''))
+
+    def delete_deck(self, deck_id: str, user_id: str) -> bool:
+        ref = self.db.collection(DECKS_COLLECTION).document(deck_id)
+        deck = self._to_record(ref.get())
+        if not deck or deck.get('user_id') != user_id:
+            return False
+        ref.delete()
+        return True
+
+    def get_user(self, user_id: str) -> Optional[Dict[str, Any]]:
+        return self._to_record(self.db.collection(USERS_COLLECTION).document(user_id).get())
+
+    def record_activity(self, entries: List[ActivityEntry]) -> int:
+        from firebase_admin import firestore
+
+        collection = self.db.collection(USERS_COLLECTION)
+        batch = self.db.batch()
+        for user_id, entry in entries:
+            batch.set(collection.document(user_id), {
+                'last_active': entry['last_active'],
+                'message_count': firestore.Increment(entry['message_count']),
+            }, merge=True)
+        batch.commit()
+        return len(entries)
+
+    def health_check(self, timeout: float = 5.0) -> bool:
+        self.db.collection(CARDS_COLLECTION).limit(1).get(timeout=timeout)
+        return True
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if hasattr(value, 'to_dict'):
+        return value.to_dict()
+    return str(value)
+
+
+def _dumps(record: Dict[str, Any]) -> str:
+    return json.dumps(record, ensure_ascii=False, default=_json_default)
+
+
+def _prefix_upper_bound(prefix: str) -> str:
+    """Smallest string greater than every string starting with prefix"""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cards (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    name_key TEXT NOT NULL,
+    element TEXT,
+    card_type TEXT,
+    cost INTEGER,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_cards_name_key ON cards (name_key);
+CREATE INDEX IF NOT EXISTS idx_cards_element ON cards (element);
+CREATE INDEX IF NOT EXISTS idx_cards_card_type ON cards (card_type);
+
+CREATE TABLE IF NOT EXISTS decks (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    name TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_decks_user_id ON decks (user_id, name);
+
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    last_active TEXT,
+    message_count INTEGER NOT NULL DEFAULT 0,
+    data TEXT
+);
+"""
+
+
+class SQLiteBackend(StorageBackend):
+    """Local storage in a SQLite database in WAL mode
+
+    Each thread gets its own connection, so reads from the database
+    thread pool run concurrently with writes. Cards are indexed on
+    normalized name, element and type; decks on their owner.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str = DEFAULT_SQLITE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.executescript(SQLITE_SCHEMA)
+
+    @property
+    def key(self) -> str:
+        digest = hashlib.sha1(os.path.abspath(self.path).encode('utf-8')).hexdigest()[:10]
+        return f"{self.name}_{digest}"
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _query(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        return self._connection().execute(sql, params).fetchall()
+
+    @staticmethod
+    def _records(rows) -> List[Dict[str, Any]]:
+        return [json.loads(row[0]) for row in rows]
+
+    def _one(self, sql: str, params: tuple) -> Optional[Dict[str, Any]]:
+        rows = self._query(sql, params)
+        return json.loads(rows[0][0]) if rows else None
+
+    def get_card(self, card_id: str) -> Optional[Dict[str, Any]]:
+        return self._one("SELECT data FROM cards WHERE id = ?", (card_id,))
+
+    def save_cards(self, cards: List[Dict[str, Any]]) -> int:
+        rows = [(card['id'], card.get('name', ''), normalize_name(card.get('name', '')),
+                 (card.get('element') or '').upper() or None, (card.get('card_type') or '').upper() or None,
+                 card.get('cost'), _dumps(card)) for card in cards]
+        with self._connection() as conn:
+            conn.executemany("INSERT OR REPLACE INTO cards (id, name, name_key, element, card_type, cost, data) "
+                             "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def stream_cards(self) -> Iterator[Dict[str, Any]]:
+        for row in self._connection().execute("SELECT data FROM cards"):
+            yield json.loads(row[0])
+
+    def search_cards(self, name_prefix: str = "", element: Optional[str] = None,
+                     card_type: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        clauses, params = [], []
+        prefix = normalize_name(name_prefix)
+        if prefix:
+            # A range instead of LIKE so the name_key index is used
+            clauses.append("name_key >= ? AND name_key < ?")
+            params += [prefix, _prefix_upper_bound(prefix)]
+        if element:
+            clauses.append("element = ?")
+            params.append(element.upper())
+        if card_type:
+            clauses.append("card_type = ?")
+            params.append(card_type.upper())
+        sql = "SELECT data FROM cards"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY name"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return self._records(self._query(sql, tuple(params)))
+
+    def count_cards(self) -> int:
+        return self._query("SELECT COUNT(*) FROM cards")[0][0]
+
+    def get_deck(self, deck_id: str) -> Optional[Dict[str, Any]]:
+        return self._one("SELECT data FROM decks WHERE id = ?", (deck_id,))
+
+    def save_deck(self, deck: Dict[str, Any]) -> bool:
+        with self._connection() as conn:
+            conn.execute("INSERT OR REPLACE INTO decks (id, user_id, name, data) VALUES (?, ?, ?, ?)",
+                         (deck['id'], deck['user_id'], deck.get('name'), _dumps(deck)))
+        return True
+
+    def get_user_decks(self, user_id: str) -> List[Dict[str, Any]]:
+        return self._records(self._query("SELECT data FROM decks WHERE user_id = ? ORDER BY name", (user_id,)))
+
+    def delete_deck(self, deck_id: str, user_id: str) -> bool:
+        with self._connection() as conn:
+            cursor = conn.execute("DELETE FROM decks WHERE id = ? AND user_id = ?", (deck_id, user_id))
+        return cursor.rowcount > 0
+
+    def get_user(self, user_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._query("SELECT data, last_active, message_count FROM users WHERE id = ?", (user_id,))
+        if not rows:
+            return None
+        data, last_active, message_count = rows[0]
+        user = json.loads(data) if data else {}
+        user.update({'id': user_id, 'last_active': last_active, 'message_count': message_count})
+        return user
+
+    def record_activity(self, entries: List[ActivityEntry]) -> int:
+        rows = [(user_id, _json_default(entry['last_active']), entry['message_count']) for user_id, entry in entries]
+        with self._connection() as conn:
+            conn.executemany(
+                "INSERT INTO users (id, last_active, message_count) VALUES (?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET last_active = excluded.last_active, "
+                "message_count = message_count + excluded.message_count", rows)
+        return len(rows)
+
+    def health_check(self, timeout: float = 5.0) -> bool:
+        self._query("SELECT 1 FROM cards LIMIT 1")
+        return True
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.ProgrammingError:
+                    # Created on another thread that is still alive; closed on exit
+                    pass
+            self._connections.clear()
+        self._local = threading.local()
+
+
+BACKENDS = {'firestore': FirestoreBackend, 'sqlite': SQLiteBackend}
+
+_storage: Optional[StorageBackend] = None
+_storage_lock = threading.Lock()
+
+
+def create_backend(name: str, **kwargs) -> StorageBackend:
+    """Build a storage backend by name ('firestore' or 'sqlite')"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown storage backend '{name}', expected one of {', '.join(BACKENDS)}")
+    return BACKENDS[name](**kwargs)
+
+
+def get_storage() -> StorageBackend:
+    """The storage backend selected by STORAGE_BACKEND, with every call timed in metrics"""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                from config.runtime_settings import STORAGE_BACKEND, SQLITE_PATH
+                kwargs = {'path': SQLITE_PATH} if STORAGE_BACKEND == 'sqlite' else {}
+                _storage = TimedStorage(create_backend(STORAGE_BACKEND, **kwargs))
+                logger.info(f"Using {_storage.name} storage backend")
+    return _storage
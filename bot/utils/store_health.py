@@ -0,0 +1,143 @@
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Readiness states
+STARTING = "starting"
+READY = "ready"
+DEGRADED = "degraded"
+UNAVAILABLE = "unavailable"
+
+
+class StoreHealth:
+    """Warm-up and health probing for the storage backend
+
+    For Firestore, warm_up() initializes firebase_manager, fetches the
+    OAuth token and opens the gRPC channel with a one-document read, so
+    the first user query doesn't pay for them and a dead database is
+    found at startup. Local backends are probed, and Firebase is still
+    initialized for the deck, user and data processor code that goes
+    through db_manager; if that fails only those features are lost. The
+    outcome is kept as a readiness state: ready, degraded (answering but
+    slow) or unavailable.
+    """
+
+    def __init__(self, probe_timeout: float = 5.0, slow_threshold: float = 1.0):
+        self.probe_timeout = probe_timeout
+        self.slow_threshold = slow_threshold
+        self.state = STARTING
+        self.last_error: Optional[str] = None
+        self.last_latency: Optional[float] = None
+        self.last_probe_at: Optional[datetime] = None
+        self.warm_up_time: Optional[float] = None
+        self.firebase_ready = False
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.state in (READY, DEGRADED)
+
+    def _set_state(self, state: str, error: Optional[str] = None):
+        with self._lock:
+            self.state = state
+            self.last_error = error
+
+    def warm_up(self, manager=None, storage=None) -> bool:
+        """Initialize the store connection and probe it; blocking"""
+        start = time.perf_counter()
+        name = "Firestore"
+        try:
+            if storage is None:
+                from bot.utils.storage import get_storage
+                storage = get_storage()
+            if manager is None:
+                from config.firebase_config import firebase_manager
+                manager = firebase_manager
+
+            if storage.name != "firestore":
+                name = storage.name
+                # Decks, users and the data processor still use db_manager on Firestore
+                self._initialize_firebase(manager)
+                return self.probe_storage(storage)
+
+            self.firebase_ready = bool(manager.initialize())
+            if not self.firebase_ready:
+                self._set_state(UNAVAILABLE, "Firebase initialization failed")
+                return False
+
+            self._warm_token()
+            return self.probe(manager.db)
+        except Exception as e:
+            self._set_state(UNAVAILABLE, str(e))
+            logger.error(f"Error warming up {name}: {e}")
+            return False
+        finally:
+            self.warm_up_time = time.perf_counter() - start
+            logger.info(f"{name} warm-up finished in {self.warm_up_time:.2f}s ({self.state})")
+
+    def _initialize_firebase(self, manager):
+        """Firebase for the code not on the storage backend; its failure doesn't fail the store"""
+        try:
+            self.firebase_ready = bool(manager.initialize())
+        except Exception as e:
+            logger.error(f"Error initializing Firebase: {e}")
+            self.firebase_ready = False
+        if not self.firebase_ready:
+            logger.warning("Firebase is not available; decks, user statistics and the data processor will fail")
+
+    @staticmethod
+    def _warm_token():
+        """Fetch the OAuth access token now instead of on the first query"""
+        try:
+            import firebase_admin
+            firebase_admin.get_app().credential.get_access_token()
+        except Exception as e:
+            # The probe that follows reports whether the store is usable
+            logger.warning(f"Could not pre-fetch Firebase access token: {e}")
+
+    def probe(self, db) -> bool:
+        """Read a single card to check the database answers; blocking"""
+        from bot.utils.storage import FirestoreBackend
+        return self.probe_storage(FirestoreBackend(db))
+
+    def probe_storage(self, storage) -> bool:
+        """Run the backend's own health check; blocking"""
+        return self._probe(storage.name, lambda: storage.health_check(self.probe_timeout))
+
+    def _probe(self, name: str, check) -> bool:
+        start = time.perf_counter()
+        try:
+            check()
+        except Exception as e:
+            self.last_latency = time.perf_counter() - start
+            self.last_probe_at = datetime.now()
+            self._set_state(UNAVAILABLE, str(e))
+            logger.error(f"{name} health probe failed: {e}")
+            return False
+
+        self.last_latency = time.perf_counter() - start
+        self.last_probe_at = datetime.now()
+        if self.last_latency > self.slow_threshold:
+            self._set_state(DEGRADED)
+            logger.warning(f"{name} health probe slow: {self.last_latency:.2f}s")
+        else:
+            self._set_state(READY)
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'state': self.state,
+            'last_error': self.last_error,
+            'firebase_ready': self.firebase_ready,
+            'last_latency_ms': round(self.last_latency * 1000, 1) if self.last_latency is not None else None,
+            'last_probe_at': self.last_probe_at.isoformat() if self.last_probe_at else None,
+            'warm_up_time_ms': round(self.warm_up_time * 1000, 1) if self.warm_up_time is not None else None,
+        }
+
+
+# Global store health instance
+store_health = StoreHealth()
@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Any, List, Optional, Awaitable
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+logger = logging.getLogger(__name__)
+
+# Updates let past the base class semaphore per concurrent slot, to wait on
+# their user/chat locks. PTB starts a task for every fetched update anyway, so
+# this only bounds the lock bookkeeping; the fetcher never blocks on it.
+PENDING_UPDATES_PER_SLOT = 16
+
+
+def update_label(update: object) -> str:
+    """Short label naming what kind of handler an update goes to"""
+    if not isinstance(update, Update):
+        return "other"
+    if update.callback_query:
+        data = update.callback_query.data or ""
+        return f"callback:{data.split('_', 1)[0]}_" if data else "callback"
+    if update.inline_query:
+        return "inline_query"
+    message = update.effective_message
+    if message and message.text and message.text.startswith("/"):
+        command = message.text.split()[0].split("@")[0]
+        return f"command:{command}"
+    if message:
+        return "message"
+    return "other"
+
+
+def ordering_keys(update: object) -> List[str]:
+    """Keys whose updates must be handled one at a time, in arrival order"""
+    keys = []
+    if isinstance(update, Update):
+        if update.effective_user:
+            keys.append(f"user:{update.effective_user.id}")
+        if update.effective_chat:
+            keys.append(f"chat:{update.effective_chat.id}")
+    # Fixed order so two updates never wait on each other's locks
+    return sorted(keys)
+
+
+class WaitStats:
+    """Wait time statistics for one update label"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def add(self, wait: float):
+        self.count += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'avg_wait_ms': round(self.total_wait / self.count * 1000, 2) if self.count else 0.0,
+            'max_wait_ms': round(self.max_wait * 1000, 2),
+        }
+
+
+class PerChatUpdateProcessor(BaseUpdateProcessor):
+    """Processes updates concurrently while keeping each user and chat ordered
+
+    Updates from different users run in parallel, up to the concurrency
+    limit. Updates that share a user or chat wait for the earlier ones to
+    finish first, so deck mutations from one user can't race. A user
+    flooding the bot only waits on their own lock and does not hold a
+    concurrency slot while waiting. queue_depth counts every update that
+    has not started yet, including those still waiting on the base class
+    semaphore.
+    """
+
+    def __init__(self, max_concurrent_updates: int, max_pending_updates: Optional[int] = None):
+        self._limit = max_concurrent_updates
+        super().__init__(max_pending_updates or max_concurrent_updates * PENDING_UPDATES_PER_SLOT)
+        self._slots = asyncio.BoundedSemaphore(max_concurrent_updates)
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._lock_users: Dict[str, int] = {}
+        # Enqueue time of each update that has not started, by coroutine id
+        self._queued_at: Dict[int, float] = {}
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.in_flight = 0
+        self.processed = 0
+        self._wait_stats: Dict[str, WaitStats] = {}
+
+    @property
+    def max_concurrent_updates(self) -> int:
+        return self._limit
+
+    def _acquire_lock(self, key: str) -> asyncio.Lock:
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        self._lock_users[key] = self._lock_users.get(key, 0) + 1
+        return lock
+
+    def _release_lock(self, key: str):
+        self._lock_users[key] -= 1
+        if not self._lock_users[key]:
+            del self._lock_users[key]
+            del self._locks[key]
+
+    async def process_update(self, update: object, coroutine: "Awaitable[Any]") -> None:
+        """Count the update as queued before it waits on the base class semaphore
+
+        PTB marks this method final, but it is the only hook that runs
+        before that semaphore; the base implementation is still called.
+        """
+        self.queue_depth += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        self._queued_at[id(coroutine)] = time.perf_counter()
+        try:
+            await super().process_update(update, coroutine)
+        finally:
+            if self._queued_at.pop(id(coroutine), None) is not None:
+                # Cancelled while waiting: the handler coroutine never ran
+                self.queue_depth -= 1
+                if asyncio.iscoroutine(coroutine):
+                    coroutine.close()
+
+    async def do_process_update(self, update: object, coroutine: "Awaitable[Any]") -> None:
+        keys = ordering_keys(update)
+        locks = [self._acquire_lock(key) for key in keys]
+        acquired = []
+        try:
+            for lock in locks:
+                await lock.acquire()
+                acquired.append(lock)
+            async with self._slots:
+                self.queue_depth -= 1
+                self._record_wait(update, time.perf_counter() - self._queued_at.pop(id(coroutine)))
+                self.in_flight += 1
+                try:
+                    await coroutine
+                finally:
+                    self.in_flight -= 1
+                    self.processed += 1
+        finally:
+            for lock in acquired:
+                lock.release()
+            for key in keys:
+                self._release_lock(key)
+
+    def _record_wait(self, update: object, wait: float):
+        label = update_label(update)
+        stats = self._wait_stats.get(label)
+        if stats is None:
+            stats = self._wait_stats[label] = WaitStats()
+        stats.add(wait)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'max_concurrent_updates': self._limit,
+            'queue_depth': self.queue_depth,
+            'max_queue_depth': self.max_queue_depth,
+            'in_flight': self.in_flight,
+            'processed': self.processed,
+            'wait_by_handler': {label: stats.to_dict() for label, stats in self._wait_stats.items()},
+        }
+
+    async def initialize(self) -> None:
+        """Nothing to set up; locks are created on demand"""
+
+    async def shutdown(self) -> None:
+        """Nothing to free; locks go away with their last waiter"""
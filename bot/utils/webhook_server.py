@@ -0,0 +1,144 @@
+import asyncio
+import hmac
+import json
+import logging
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from telegram import Update
+
+logger = logging.getLogger(__name__)
+
+# Telegram updates are small; anything bigger is not a Bot API request
+MAX_BODY_SIZE = 1024 * 1024
+
+SECRET_HEADER = 'x-telegram-bot-api-secret-token'
+
+# Readiness endpoint for load balancers and deploy checks
+HEALTH_PATH = '/healthz'
+
+REASONS = {200: 'OK', 400: 'Bad Request', 403: 'Forbidden', 404: 'Not Found',
+           405: 'Method Not Allowed', 503: 'Service Unavailable'}
+
+
+class WebhookServer:
+    """Minimal asyncio HTTP server that receives Telegram webhook updates
+
+    Each POST to url_path is decoded into an Update and put on the
+    application's update queue, the same queue polling feeds. Connections
+    are kept alive so Telegram can reuse them. GET /healthz answers 200
+    or 503 from the health_check callable.
+    """
+
+    def __init__(self, application, listen: str = '127.0.0.1', port: int = 8443,
+                 url_path: str = '/telegram', secret_token: str = '',
+                 health_check: Optional[Callable[[], bool]] = None):
+        self.application = application
+        self.listen = listen
+        self.port = port
+        self.url_path = '/' + url_path.lstrip('/')
+        self.secret_token = secret_token
+        self.health_check = health_check
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Set[asyncio.Task] = set()
+        self.updates_received = 0
+
+    @property
+    def running(self) -> bool:
+        return self._server is not None
+
+    async def start(self):
+        """Start listening for webhook requests"""
+        self._server = await asyncio.start_server(self._handle_connection, self.listen, self.port)
+        # Port 0 picks a free port; report the real one
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Webhook server listening on {self.listen}:{self.port}{self.url_path}")
+
+    async def stop(self):
+        """Stop accepting requests and close open connections"""
+        if self._server is None:
+            return
+        self._server.close()
+        await self._server.wait_closed()
+        for task in list(self._connections):
+            task.cancel()
+        if self._connections:
+            await asyncio.gather(*self._connections, return_exceptions=True)
+        self._server = None
+        logger.info("Webhook server stopped")
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                status = await self._handle_request(method, path, headers, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                self._write_response(writer, status, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.CancelledError, ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            logger.error(f"Error handling webhook connection: {e}")
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        """Read one HTTP request; None when the client closed the connection"""
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        parts = request_line.decode('latin-1').split()
+        if len(parts) != 3:
+            raise ConnectionError("Malformed request line")
+        method, path, _ = parts
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get('content-length', '0') or 0)
+        if length > MAX_BODY_SIZE:
+            raise ConnectionError("Request body too large")
+        body = await reader.readexactly(length) if length else b''
+        return method, path.split('?', 1)[0], headers, body
+
+    async def _handle_request(self, method: str, path: str, headers: Dict[str, str], body: bytes) -> int:
+        if path == HEALTH_PATH and method == 'GET':
+            return 200 if self.health_check is None or self.health_check() else 503
+        if path != self.url_path:
+            return 404
+        if method != 'POST':
+            return 405
+        if self.secret_token and not hmac.compare_digest(headers.get(SECRET_HEADER, ''), self.secret_token):
+            logger.warning("Rejected webhook request with invalid secret token")
+            return 403
+
+        try:
+            update = Update.de_json(json.loads(body), self.application.bot)
+        except Exception as e:
+            logger.error(f"Invalid webhook update: {e}")
+            return 400
+
+        await self.application.update_queue.put(update)
+        self.updates_received += 1
+        return 200
+
+    @staticmethod
+    def _write_response(writer: asyncio.StreamWriter, status: int, keep_alive: bool):
+        connection = 'keep-alive' if keep_alive else 'close'
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Length: 0\r\n"
+            f"Connection: {connection}\r\n\r\n".encode('latin-1')
+        )
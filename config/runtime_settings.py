@@ -0,0 +1,31 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Run Mode: "polling" (default) or "webhook"
+RUN_MODE = os.getenv('RUN_MODE', 'polling').strip().lower()
+
+# Webhook Configuration
+WEBHOOK_URL = os.getenv('WEBHOOK_URL', '').rstrip('/')
+WEBHOOK_LISTEN = os.getenv('WEBHOOK_LISTEN', '127.0.0.1')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', '8443'))
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/telegram')
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET', '')
+
+# Number of updates processed at the same time; each user's updates stay ordered
+CONCURRENT_UPDATES = int(os.getenv('CONCURRENT_UPDATES', '16'))
+
+# Storage backend: "firestore" (default) or "sqlite" for a local database
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'firestore').strip().lower()
+SQLITE_PATH = os.getenv('SQLITE_PATH', os.path.join('data', 'genshin_tcg.db'))
+
+# Prometheus metrics endpoint (GET /metrics); 0 disables it
+METRICS_LISTEN = os.getenv('METRICS_LISTEN', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))
+
+# Telegram user ids allowed to use admin commands such as /profile (comma-separated)
+ADMIN_USER_IDS = {user_id.strip() for user_id in os.getenv('ADMIN_USER_IDS', '').split(',') if user_id.strip()}
+
+# Log the stack of code blocking the event loop longer than this many seconds; 0 disables the watchdog
+LOOP_STALL_THRESHOLD = float(os.getenv('LOOP_STALL_THRESHOLD', '0'))
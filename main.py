@@ -1,13 +1,34 @@
 import logging
 import asyncio
+from telegram import Update
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, CallbackQueryHandler, InlineQueryHandler
 from config.settings import TELEGRAM_BOT_TOKEN, DEBUG
+from config.runtime_settings import (
+    RUN_MODE, WEBHOOK_URL, WEBHOOK_LISTEN, WEBHOOK_PORT, WEBHOOK_PATH, WEBHOOK_SECRET, CONCURRENT_UPDATES,
+    STORAGE_BACKEND, METRICS_LISTEN, METRICS_PORT, ADMIN_USER_IDS, LOOP_STALL_THRESHOLD
+)
 from config.firebase_config import firebase_manager
 from bot.handlers.start import start_command, help_command, stats_command, button_callback
 from bot.handlers.search import search_command, inline_query_handler, card_callback_handler
 from bot.handlers.deck_builder import deck_command
 from bot.handlers.rules import rules_command, rules_callback_handler
 from scraper.data_processor import data_processor
+from scraper.image_pipeline import image_pipeline
+from bot.utils.card_catalog import card_catalog
+from bot.utils.catalog_snapshot import catalog_snapshot
+from bot.utils.store_health import store_health
+from bot.utils.background_jobs import job_manager, report_stage
+from bot.utils.async_database import async_db_manager
+from bot.utils.activity_tracker import activity_tracker
+from bot.utils.cache import cached_db_manager
+from bot.utils.webhook_server import WebhookServer
+from bot.utils.update_processor import PerChatUpdateProcessor
+from bot.utils.send_scheduler import SendScheduler
+from bot.utils.media_cache import file_id_cache
+from bot.utils.metrics import instrument_handlers, metrics
+from bot.utils.metrics_server import MetricsServer
+from bot.utils.loop_watchdog import LoopWatchdog
+from bot.utils.profiler import loop_profiler, format_top
 import sys
 import os
 
@@ -23,11 +44,31 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# Seconds between progress edits of the admin scrape message
+SCRAPE_PROGRESS_INTERVAL = 5
+
+# Seconds to wait for the store watch to deliver the full cards collection
+CATALOG_SYNC_TIMEOUT = 60
+
+# Default length of a /profile session in seconds
+DEFAULT_PROFILE_SECONDS = 30
+
+# Telegram rejects messages longer than this
+MAX_MESSAGE_LENGTH = 4096
+
 class GenshinTCGBot:
     """Main bot class"""
     
     def __init__(self):
         self.application = None
+        self.webhook_server = None
+        self.metrics_server = None
+        self.loop_watchdog = None
+        self.update_processor = None
+        self.send_scheduler = None
+        self.store_available = False
+        self.snapshot_loaded = False
+        self.refresh_task = None
         self.initialized = False
     
     async def initialize(self):
@@ -40,21 +81,35 @@ class GenshinTCGBot:
                 logger.error("TELEGRAM_BOT_TOKEN not found in environment variables!")
                 return False
             
-            # Initialize Firebase
-            logger.info("Initializing Firebase...")
-            if not firebase_manager.initialize():
-                logger.error("Failed to initialize Firebase!")
-                return False
+            # Cards from the local snapshot serve search before Firestore answers
+            self.snapshot_loaded = catalog_snapshot.load(card_catalog)
+            
+            # Initialize the storage backend (for Firestore: fetch its token and
+            # probe the database) while the Telegram application is being built
+            logger.info(f"Initializing {STORAGE_BACKEND} storage...")
+            store_warm_up = asyncio.get_running_loop().run_in_executor(None, store_health.warm_up, firebase_manager)
             
             # Create application
             logger.info("Creating Telegram application...")
-            self.application = Application.builder().token(TELEGRAM_BOT_TOKEN).build()
+            if RUN_MODE == "webhook" and not WEBHOOK_URL:
+                logger.error("WEBHOOK_URL is required when RUN_MODE is webhook!")
+                return False
+            self.build_application()
             
             # Register handlers
             self.register_handlers()
             
-            # Initialize sample data if database is empty
-            await self.initialize_sample_data()
+            self.store_available = await store_warm_up
+            if not self.store_available:
+                if not self.snapshot_loaded:
+                    logger.error(f"Storage is not available: {store_health.last_error}")
+                    return False
+                logger.warning("Storage unavailable, serving cards from the local catalog snapshot")
+            
+            # Without a snapshot there is nothing to serve yet, so wait for the store
+            # this once; otherwise the catalog is refreshed in the background
+            if self.store_available and not self.snapshot_loaded:
+                await self.refresh_catalog()
             
             self.initialized = True
             logger.info("Bot initialization completed successfully!")
@@ -76,6 +131,7 @@ class GenshinTCGBot:
             self.application.add_handler(CommandHandler("deck", deck_command))
             self.application.add_handler(CommandHandler("rules", rules_command))
             self.application.add_handler(CommandHandler("stats", stats_command))
+            self.application.add_handler(CommandHandler("profile", self.profile_command))
             
             # Callback query handlers
             self.application.add_handler(CallbackQueryHandler(button_callback, pattern="^action_"))
@@ -93,6 +149,9 @@ class GenshinTCGBot:
             # Error handler
             self.application.add_error_handler(self.error_handler)
             
+            # Record latency and errors of every handler registered above
+            instrument_handlers(self.application)
+            
             logger.info("All handlers registered successfully!")
             
         except Exception as e:
@@ -102,14 +161,18 @@ class GenshinTCGBot:
     async def initialize_sample_data(self):
         """Initialize sample data if database is empty"""
         try:
+            if not store_health.firebase_ready:
+                # The data processor reads and writes through db_manager on Firestore
+                logger.warning("Firebase is not available, skipping sample data check")
+                return
             logger.info("Checking if sample data initialization is needed...")
             
             # Check if we have any cards in the database
-            stats = data_processor.get_processing_stats()
+            stats = await async_db_manager.run(data_processor.get_processing_stats)
             
             if stats['total_cards'] == 0:
                 logger.info("Database is empty, loading sample cards...")
-                result = data_processor.load_sample_cards()
+                result = await async_db_manager.run(data_processor.load_sample_cards)
                 
                 if result['success']:
                     logger.info(f"Successfully loaded {result['cards_saved']} sample cards")
@@ -121,6 +184,80 @@ class GenshinTCGBot:
         except Exception as e:
             logger.error(f"Error initializing sample data: {e}")
     
+    def build_application(self, token: str = None, request=None, rate_limit: bool = True) -> Application:
+        """Build the Telegram application; request replaces the Bot API transport (load tests)"""
+        builder = Application.builder().token(token or TELEGRAM_BOT_TOKEN)
+        if rate_limit:
+            # Outbound requests are paced to stay under Telegram's flood limits
+            self.send_scheduler = SendScheduler()
+            builder = builder.rate_limiter(self.send_scheduler)
+        if request is not None:
+            builder = builder.request(request).get_updates_request(request)
+        if RUN_MODE == "webhook":
+            builder = builder.updater(None)
+        if CONCURRENT_UPDATES > 1:
+            # Different users run in parallel; each user's updates stay in order
+            self.update_processor = PerChatUpdateProcessor(CONCURRENT_UPDATES)
+            builder = builder.concurrent_updates(self.update_processor)
+        self.application = builder.build()
+        self.register_metrics()
+        return self.application
+    
+    def register_metrics(self):
+        """Export the update processor, read-through cache and send scheduler counters"""
+        caches = {'decks': cached_db_manager.decks, 'cards': cached_db_manager.cards}
+        for field in ('hits', 'misses', 'evictions'):
+            metrics.register_gauge(f"tcgbot_cache_{field}_total", f"Read-through cache {field}",
+                                   lambda field=field: {name: getattr(cache, field) for name, cache in caches.items()},
+                                   label='cache', counter=True)
+        
+        processor = self.update_processor
+        if processor is not None:
+            metrics.register_gauge("tcgbot_update_queue_depth", "Updates received but not yet started",
+                                   lambda: processor.queue_depth)
+            metrics.register_gauge("tcgbot_update_in_flight", "Updates being processed",
+                                   lambda: processor.in_flight)
+            for field, description in (('avg', "Average"), ('max', "Longest")):
+                metrics.register_gauge(
+                    f"tcgbot_update_wait_{field}_seconds", f"{description} wait for a processing slot per handler",
+                    lambda field=field: {label: stats[f'{field}_wait_ms'] / 1000
+                                         for label, stats in processor.get_stats()['wait_by_handler'].items()},
+                    label='handler')
+        
+        scheduler = self.send_scheduler
+        if scheduler is not None:
+            metrics.register_gauge("tcgbot_send_pending", "Bot API requests waiting in the send scheduler",
+                                   lambda: scheduler.pending)
+            metrics.register_gauge("tcgbot_send_retries_total", "Bot API requests retried after a flood limit",
+                                   lambda: scheduler.retries, counter=True)
+            metrics.register_gauge("tcgbot_send_dropped_edits_total", "Message edits dropped by the send scheduler",
+                                   lambda: scheduler.dropped_edits, counter=True)
+    
+    def is_ready(self) -> bool:
+        """Whether the bot can answer users: the store answers or the catalog snapshot is loaded"""
+        return self.initialized and (store_health.ready or self.snapshot_loaded)
+    
+    async def refresh_catalog(self):
+        """Reload the card catalog from storage, keep it in sync and update the local snapshot"""
+        try:
+            # Initialize sample data if database is empty
+            await self.initialize_sample_data()
+            
+            logger.info("Loading card catalog...")
+            if STORAGE_BACKEND == "firestore":
+                # The watch's first snapshot is the full collection, so it doubles as the load
+                loaded = card_catalog.watch_store() and await async_db_manager.run(
+                    card_catalog.wait_until_synced, CATALOG_SYNC_TIMEOUT)
+            else:
+                # Only Firestore pushes changes; local stores are written by this process
+                loaded = await async_db_manager.run(card_catalog.load_from_store)
+            if loaded:
+                await async_db_manager.run(catalog_snapshot.save, card_catalog)
+            else:
+                logger.warning("Card catalog could not be loaded from storage")
+        except Exception as e:
+            logger.error(f"Error refreshing card catalog: {e}")
+    
     async def handle_deck_callbacks(self, update, context):
         """Handle deck-related callback queries"""
         try:
@@ -132,8 +269,7 @@ class GenshinTCGBot:
             
             if callback_data.startswith("deck_show_"):
                 deck_id = callback_data.replace("deck_show_", "")
-                from bot.utils.database import db_manager
-                deck = db_manager.get_deck(deck_id)
+                deck = await async_db_manager.get_deck(deck_id)
                 
                 if deck and deck.user_id == user_id:
                     from bot.handlers.deck_builder import handle_deck_show
@@ -149,9 +285,7 @@ class GenshinTCGBot:
             
             elif callback_data.startswith("deck_delete_confirmed_"):
                 deck_id = callback_data.replace("deck_delete_confirmed_", "")
-                from bot.utils.database import db_manager
-                
-                if db_manager.delete_deck(deck_id, user_id):
+                if await async_db_manager.delete_deck(deck_id, user_id):
                     await query.edit_message_text(
                         "✅ **Deck deleted successfully!**\n\n"
                         "Use `/deck list` to see your remaining decks.",
@@ -166,9 +300,11 @@ class GenshinTCGBot:
                     deck_id = parts[0]
                     card_id = "_".join(parts[1:])
                     
-                    from bot.utils.database import db_manager
-                    deck = db_manager.get_deck(deck_id)
-                    card = db_manager.get_card(card_id)
+                    # The deck is edited and saved, so read it fresh rather than from the cache
+                    deck, card = await asyncio.gather(
+                        async_db_manager.get_deck_for_update(deck_id),
+                        async_db_manager.get_card(card_id)
+                    )
                     
                     if deck and card and deck.user_id == user_id:
                         from bot.handlers.deck_builder import add_card_to_deck
@@ -178,6 +314,7 @@ class GenshinTCGBot:
                         
                         mock_update = MockUpdate(query.message)
                         await add_card_to_deck(mock_update, deck, card, 1)
+                        cached_db_manager.invalidate_deck(deck_id)
                     else:
                         await query.edit_message_text("❌ Deck or card not found.")
                         
@@ -196,36 +333,29 @@ class GenshinTCGBot:
             
             # Simple admin check (in production, use proper admin system)
             if callback_data == "admin_scrape_cards":
+                running_job = job_manager.running("scrape_cards")
+                if running_job:
+                    await query.edit_message_text(
+                        f"⏳ **Card scraping is already running!**\n\n"
+                        f"Job: `{running_job.id}`",
+                        parse_mode='Markdown'
+                    )
+                    return
+                
+                # Run scraping in background so updates keep being processed
+                job = job_manager.submit("scrape_cards", self.scrape_cards)
+                
                 await query.edit_message_text(
-                    "🔄 **Starting card scraping process...**\n\n"
-                    "This may take several minutes. Please wait...",
+                    f"🔄 **Starting card scraping process...**\n\n"
+                    f"Job: `{job.id}`\n"
+                    f"This may take several minutes. Progress will be shown here.",
                     parse_mode='Markdown'
                 )
                 
-                # Run scraping in background
-                result = data_processor.scrape_and_process_all_cards()
-                
-                if result['success']:
-                    await query.edit_message_text(
-                        f"✅ **Card scraping completed!**\n\n"
-                        f"📊 **Results:**\n"
-                        f"• Cards processed: {result['cards_processed']}\n"
-                        f"• Cards saved: {result['cards_saved']}\n"
-                        f"• Errors: {len(result['errors'])}\n\n"
-                        f"Use `/search` to test the new cards!",
-                        parse_mode='Markdown'
-                    )
-                else:
-                    error_summary = "\n".join(result['errors'][:3])
-                    await query.edit_message_text(
-                        f"❌ **Card scraping failed!**\n\n"
-                        f"**Errors:**\n{error_summary}\n\n"
-                        f"Check logs for more details.",
-                        parse_mode='Markdown'
-                    )
+                context.application.create_task(self.report_scrape_progress(query, job))
             
             elif callback_data == "admin_load_samples":
-                result = data_processor.load_sample_cards()
+                result = await async_db_manager.run(data_processor.load_sample_cards)
                 
                 if result['success']:
                     await query.edit_message_text(
@@ -243,15 +373,78 @@ class GenshinTCGBot:
             logger.error(f"Error handling admin callback: {e}")
             await query.edit_message_text("❌ An error occurred.")
     
+    def scrape_cards(self):
+        """Scrape job: scrape and save cards, then pre-generate card art variants"""
+        result = data_processor.scrape_and_process_all_cards()
+        if result.get('success'):
+            # Saved cards reach the catalog asynchronously through its store
+            # watch, so pass the scraped cards too; art already in the image
+            # cache is not downloaded again
+            report_stage("images")
+            images = image_pipeline.process_cards(list(result.get('cards') or []) + card_catalog.filter())
+            result['images_processed'] = images['images_processed']
+            result['image_errors'] = images['errors']
+        return result
+    
+    async def report_scrape_progress(self, query, job):
+        """Edit the admin message with scrape progress until the job finishes"""
+        try:
+            job_future = asyncio.wrap_future(job.future)
+            last_text = None
+            
+            while True:
+                try:
+                    await asyncio.wait_for(asyncio.shield(job_future), timeout=SCRAPE_PROGRESS_INTERVAL)
+                    break
+                except asyncio.TimeoutError:
+                    pass
+                
+                progress = job.progress.snapshot()
+                text = (
+                    f"🔄 **Card scraping in progress...**\n\n"
+                    f"Job: `{job.id}`\n"
+                    f"• Pages fetched: {progress.get('pages_fetched', 0)}\n"
+                    f"• Cards parsed: {progress.get('cards_parsed', 0)}\n"
+                    f"• Cards saved: {progress.get('cards_saved', 0)}\n"
+                    f"• Images processed: {progress.get('images_processed', 0)}"
+                )
+                if text != last_text:
+                    await query.edit_message_text(text, parse_mode='Markdown')
+                    last_text = text
+            
+            result = job.result
+            if job.status == "completed" and result and result['success']:
+                await query.edit_message_text(
+                    f"✅ **Card scraping completed!**\n\n"
+                    f"📊 **Results:**\n"
+                    f"• Cards processed: {result['cards_processed']}\n"
+                    f"• Cards saved: {result['cards_saved']}\n"
+                    f"• Images processed: {result.get('images_processed', 0)}\n"
+                    f"• Errors: {len(result['errors']) + len(result.get('image_errors', []))}\n\n"
+                    f"Use `/search` to test the new cards!",
+                    parse_mode='Markdown'
+                )
+            else:
+                errors = result['errors'] if result else [job.error or "Unknown error"]
+                error_summary = "\n".join(errors[:3])
+                await query.edit_message_text(
+                    f"❌ **Card scraping failed!**\n\n"
+                    f"**Errors:**\n{error_summary}\n\n"
+                    f"Check logs for more details.",
+                    parse_mode='Markdown'
+                )
+                
+        except Exception as e:
+            logger.error(f"Error reporting scrape progress: {e}")
+    
     async def handle_text_message(self, update, context):
         """Handle regular text messages"""
         try:
             user_id = str(update.effective_user.id)
             message_text = update.message.text.lower().strip()
             
-            # Update user activity
-            from bot.utils.database import db_manager
-            db_manager.update_user_activity(user_id)
+            # Update user activity (written to the database in periodic batches)
+            activity_tracker.record(user_id)
             
             # Handle common queries
             if any(keyword in message_text for keyword in ['help', 'commands', 'what can you do']):
@@ -289,6 +482,50 @@ class GenshinTCGBot:
                 parse_mode='Markdown'
             )
     
+    async def profile_command(self, update, context):
+        """Admin command: /profile [seconds] records a cProfile of the event loop"""
+        try:
+            if str(update.effective_user.id) not in ADMIN_USER_IDS:
+                await update.message.reply_text("❌ This command is only available to bot admins.")
+                return
+            
+            try:
+                seconds = float(context.args[0]) if context.args else DEFAULT_PROFILE_SECONDS
+            except ValueError:
+                await update.message.reply_text("Usage: /profile [seconds]")
+                return
+            seconds = max(1.0, min(seconds, loop_profiler.max_seconds))
+            
+            if loop_profiler.running:
+                await update.message.reply_text("⏳ A profile is already running.")
+                return
+            
+            await update.message.reply_text(f"🔬 Profiling the event loop for {seconds:.0f}s...")
+            # Profile in a task so this chat's next updates aren't held up
+            context.application.create_task(self.report_profile(update.message, seconds))
+            
+        except Exception as e:
+            logger.error(f"Error in profile command: {e}")
+    
+    async def report_profile(self, message, seconds: float):
+        """Run a profile session and reply with the hottest functions"""
+        try:
+            result = await loop_profiler.profile(seconds)
+            if not result['success']:
+                await message.reply_text(f"❌ Profiling failed: {result['error']}")
+                return
+            
+            text = f"✅ Profile saved to {result['path']}\n"
+            if self.loop_watchdog:
+                stats = self.loop_watchdog.get_stats()
+                text += f"Event loop stalls so far: {stats['stalls']} (longest {stats['longest_ms']:.0f} ms)\n"
+            text += "\n" + format_top(result['top'])
+            # Plain text: function names are full of Markdown characters
+            await message.reply_text(text[:MAX_MESSAGE_LENGTH])
+            
+        except Exception as e:
+            logger.error(f"Error reporting profile: {e}")
+    
     async def error_handler(self, update, context):
         """Handle errors"""
         try:
@@ -315,22 +552,40 @@ class GenshinTCGBot:
             # Start the bot
             await self.application.initialize()
             await self.application.start()
-            await self.application.updater.start_polling()
-            
-            logger.info("Bot is now running! Press Ctrl+C to stop.")
+            if RUN_MODE == "webhook":
+                await self.start_webhook()
+            else:
+                await self.application.updater.start_polling()
+            activity_tracker.start()
+            if LOOP_STALL_THRESHOLD > 0:
+                # Logs the stack of any synchronous code holding the loop past the threshold
+                self.loop_watchdog = LoopWatchdog(LOOP_STALL_THRESHOLD)
+                self.loop_watchdog.start()
+            if METRICS_PORT:
+                self.metrics_server = MetricsServer(listen=METRICS_LISTEN, port=METRICS_PORT)
+                await self.metrics_server.start()
+            if self.store_available and self.snapshot_loaded:
+                self.refresh_task = asyncio.create_task(self.refresh_catalog())
+            
+            logger.info(f"Bot is now running ({RUN_MODE})! Press Ctrl+C to stop.")
             
             # Keep the bot running
             import signal
-            import asyncio
             
             # Set up signal handlers for graceful shutdown
+            stop_event = asyncio.Event()
+            loop = asyncio.get_running_loop()
             stop_signals = (signal.SIGTERM, signal.SIGINT)
             for sig in stop_signals:
-                signal.signal(sig, lambda s, f: asyncio.create_task(self.application.stop()))
+                try:
+                    loop.add_signal_handler(sig, stop_event.set)
+                except NotImplementedError:
+                    # Windows event loops don't support add_signal_handler
+                    signal.signal(sig, lambda s, f: loop.call_soon_threadsafe(stop_event.set))
             
             # Keep running until interrupted
             try:
-                await asyncio.Event().wait()
+                await stop_event.wait()
             except asyncio.CancelledError:
                 pass
             
@@ -340,11 +595,48 @@ class GenshinTCGBot:
             logger.error(f"Error running bot: {e}")
         finally:
             # Cleanup
+            if self.refresh_task:
+                self.refresh_task.cancel()
+            card_catalog.stop_watching()
+            if self.store_available:
+                # Keep changes pushed by the store watch for the next cold start
+                catalog_snapshot.save(card_catalog)
+            job_manager.shutdown()
+            await activity_tracker.stop()
+            async_db_manager.shutdown()
+            file_id_cache.save()
+            if self.webhook_server:
+                await self.webhook_server.stop()
+            if self.metrics_server:
+                await self.metrics_server.stop()
+            if self.loop_watchdog:
+                await self.loop_watchdog.stop()
             if self.application:
-                await self.application.updater.stop()
-                await self.application.stop()
+                if self.application.updater and self.application.updater.running:
+                    await self.application.updater.stop()
+                if self.application.running:
+                    await self.application.stop()
                 await self.application.shutdown()
             logger.info("Bot shutdown completed")
+    
+    async def start_webhook(self):
+        """Receive updates through the built-in webhook server"""
+        self.webhook_server = WebhookServer(
+            self.application,
+            listen=WEBHOOK_LISTEN,
+            port=WEBHOOK_PORT,
+            url_path=WEBHOOK_PATH,
+            secret_token=WEBHOOK_SECRET,
+            health_check=self.is_ready
+        )
+        await self.webhook_server.start()
+        
+        await self.application.bot.set_webhook(
+            url=f"{WEBHOOK_URL}{self.webhook_server.url_path}",
+            secret_token=WEBHOOK_SECRET or None,
+            allowed_updates=Update.ALL_TYPES
+        )
+        logger.info(f"Webhook set to {WEBHOOK_URL}{self.webhook_server.url_path}")
 
 async def main():
     """Main function"""
@@ -0,0 +1,77 @@
+import logging
+from typing import Dict, Any, Iterable, Iterator, List
+
+from models.compact import CARD_SLOT_FIELDS, INTERNED_FIELDS, CompactCard, intern_value, present_fields
+
+logger = logging.getLogger(__name__)
+
+_CORE_FIELDS = ('id', 'name', 'card_type', 'cost', 'description')
+_KNOWN_FIELDS = frozenset(_CORE_FIELDS + CARD_SLOT_FIELDS)
+
+
+def iter_card_dicts(items: Iterable[Any]) -> Iterator[Dict[str, Any]]:
+    """Card dicts from plain dicts or Firestore document snapshots, streamed"""
+    for item in items:
+        if isinstance(item, dict):
+            yield item
+            continue
+        data = item.to_dict()
+        if data is None:
+            continue
+        data.setdefault('id', item.id)
+        yield data
+
+
+def _validate(data: Dict[str, Any]) -> bool:
+    return bool(data.get('id') and data.get('name') and data.get('card_type'))
+
+
+def create_cards(items: Iterable[Any], trusted: bool = True, factory=None) -> List[Any]:
+    """Build many cards at once
+
+    Items may be dicts or Firestore snapshots and are consumed as a
+    stream. By default cards are CompactCards built straight into their
+    slots; store data is trusted, so the per-card checks of the factory
+    are skipped and only records missing a required field are logged and
+    dropped (pass trusted=False to also drop empty ones).
+    With a factory (e.g. CardFactory) each card goes through
+    factory.create_card, for callers that need the model classes.
+    """
+    dicts = iter_card_dicts(items)
+    if not trusted:
+        dicts = (data for data in dicts if _validate(data))
+    if factory is not None:
+        return [card for card in map(factory.create_card, dicts) if card is not None]
+
+    new_card = CompactCard.__new__
+    # One interned card_type object per type for the whole batch
+    card_types: Dict[str, str] = {}
+    cards = []
+    for data in dicts:
+        try:
+            card_id, name, card_type = data['id'], data['name'], data['card_type']
+        except KeyError as e:
+            # One malformed document must not abort loading the whole catalog
+            logger.warning(f"Skipping card record {data.get('id', 'unknown')} without {e}")
+            continue
+        card = new_card(CompactCard)
+        card.card_type = card_types.get(card_type) or card_types.setdefault(card_type, intern_value(card_type))
+        card.id = card_id
+        card.name = name
+        card.cost = data.get('cost', 0)
+        card.description = data.get('description', "")
+        card.element = intern_value(data.get('element'))
+        card.weapon = intern_value(data.get('weapon'))
+        card.hp = data.get('hp')
+        card.max_energy = data.get('max_energy')
+        skills = data.get('skills')
+        card.skills = tuple(skills) if skills else ()
+        card.image_url = data.get('image_url')
+        card._present = present_fields(data)
+        if not _KNOWN_FIELDS.issuperset(data):
+            card.extra = {key: intern_value(value) if key in INTERNED_FIELDS else value
+                          for key, value in data.items() if key not in _KNOWN_FIELDS}
+        else:
+            card.extra = None
+        cards.append(card)
+    return cards
@@ -0,0 +1,154 @@
+import sys
+from typing import Dict, Any, FrozenSet, Optional, Tuple
+
+# Low-cardinality string fields shared by many cards; one copy of each value is kept
+INTERNED_FIELDS = ('card_type', 'element', 'weapon', 'faction', 'rarity', 'subtype')
+
+# Optional fields stored in slots; anything else goes to `extra`
+CARD_SLOT_FIELDS = ('element', 'weapon', 'hp', 'max_energy', 'skills', 'image_url')
+
+# Fields a card dict may leave out; to_dict() writes back the ones it had
+OPTIONAL_CARD_FIELDS = ('cost', 'description') + CARD_SLOT_FIELDS
+
+# One shared frozenset per combination of optional fields seen
+_FIELD_SETS: Dict[FrozenSet[str], FrozenSet[str]] = {}
+
+
+def intern_value(value: Any) -> Any:
+    """Intern strings so equal values share one object"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def present_fields(data: Dict[str, Any]) -> FrozenSet[str]:
+    """The optional fields present in a card dict, shared between cards of the same shape"""
+    fields = frozenset(field for field in OPTIONAL_CARD_FIELDS if field in data)
+    return _FIELD_SETS.setdefault(fields, fields)
+
+
+class CompactCard:
+    """Slotted, memory-compact card for large in-memory catalogs
+
+    Holds the fields of every card type (CharacterCard attributes are
+    None on other cards), so code reading card.element or card.hp works
+    unchanged. Repeated strings such as element, weapon and card_type are
+    interned, skills are stored as a tuple and unknown fields are kept in
+    `extra`. Cards built from a dict remember which optional fields it
+    had, so to_dict() round-trips store data, including empty skills
+    lists and None values.
+    """
+
+    __slots__ = ('id', 'name', 'card_type', 'cost', 'description') + CARD_SLOT_FIELDS + ('extra', '_present')
+
+    def __init__(self, id: str, name: str, card_type: str, cost: int = 0, description: str = "",
+                 element: Optional[str] = None, weapon: Optional[str] = None, hp: Optional[int] = None,
+                 max_energy: Optional[int] = None, skills: Tuple = (), image_url: Optional[str] = None,
+                 extra: Optional[Dict[str, Any]] = None):
+        self.id = id
+        self.name = name
+        self.card_type = intern_value(card_type)
+        self.cost = cost
+        self.description = description
+        self.element = intern_value(element)
+        self.weapon = intern_value(weapon)
+        self.hp = hp
+        self.max_energy = max_energy
+        self.skills = tuple(skills) if skills else ()
+        self.image_url = image_url
+        # Only allocate a dict for cards that actually have extra fields
+        self.extra = {key: intern_value(value) if key in INTERNED_FIELDS else value
+                      for key, value in extra.items()} if extra else None
+        # Optional fields to write back; None writes the ones that are set
+        self._present: Optional[FrozenSet[str]] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CompactCard":
+        known = {'id', 'name', 'card_type', 'cost', 'description'}.union(CARD_SLOT_FIELDS)
+        extra = {key: value for key, value in data.items() if key not in known}
+        card = cls(
+            id=data['id'],
+            name=data['name'],
+            card_type=data['card_type'],
+            cost=data.get('cost', 0),
+            description=data.get('description', ""),
+            element=data.get('element'),
+            weapon=data.get('weapon'),
+            hp=data.get('hp'),
+            max_energy=data.get('max_energy'),
+            skills=data.get('skills') or (),
+            image_url=data.get('image_url'),
+            extra=extra,
+        )
+        card._present = present_fields(data)
+        return card
+
+    @classmethod
+    def from_card(cls, card) -> "CompactCard":
+        """Compact copy of any card model instance"""
+        return cls.from_dict(card.to_dict() if hasattr(card, 'to_dict') else dict(vars(card)))
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            'id': self.id,
+            'name': self.name,
+            'card_type': self.card_type,
+        }
+        present = self._present
+        for field in OPTIONAL_CARD_FIELDS:
+            value = getattr(self, field)
+            if present is None:
+                # Not built from a dict: write the fields that are set
+                if value is None or (field == 'skills' and not value):
+                    continue
+            elif field not in present:
+                continue
+            data[field] = list(value) if field == 'skills' else value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __getattr__(self, name: str):
+        # Type-specific fields that have no slot live in `extra`
+        extra = object.__getattribute__(self, 'extra')
+        if extra and name in extra:
+            return extra[name]
+        raise AttributeError(name)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, CompactCard):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return f"CompactCard(id={self.id!r}, name={self.name!r}, card_type={self.card_type!r})"
+
+
+class CompactDeckCard:
+    """Slotted deck entry: one card and its number of copies"""
+
+    __slots__ = ('card_id', 'card_name', 'card_type', 'quantity')
+
+    def __init__(self, card_id: str, card_name: str, card_type: str, quantity: int = 1):
+        self.card_id = card_id
+        self.card_name = card_name
+        self.card_type = intern_value(card_type)
+        self.quantity = quantity
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CompactDeckCard":
+        return cls(data['card_id'], data['card_name'], data['card_type'], data.get('quantity', 1))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'card_id': self.card_id,
+            'card_name': self.card_name,
+            'card_type': self.card_type,
+            'quantity': self.quantity,
+        }
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, CompactDeckCard):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return f"CompactDeckCard(card_id={self.card_id!r}, quantity={self.quantity})"
@@ -0,0 +1,136 @@
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Any, Iterable, List, Optional
+
+
+@dataclass
+class _CardInfo:
+    card_type: str
+    element: Optional[str] = None
+    cost: Optional[int] = None
+
+
+class DeckAggregates:
+    """Running totals for a deck's card list
+
+    Keeps the total count, character count, per-card copy counts and
+    element/cost histograms up to date in O(1) per add or remove, so deck
+    validation and summaries never walk the card list. Deck entries only
+    carry id, type and quantity, so element and cost are looked up in the
+    card catalog.
+    """
+
+    def __init__(self, cards: Iterable[Any] = (), catalog=None):
+        self.total_cards = 0
+        self.character_count = 0
+        self.copies: Counter = Counter()
+        self.elements: Counter = Counter()
+        self.costs: Counter = Counter()
+        self._info: Dict[str, _CardInfo] = {}
+        cards = list(cards)
+        if cards and catalog is None:
+            from bot.utils.card_catalog import card_catalog as catalog
+        for entry in cards:
+            # Cards missing from the catalog are counted without element or cost
+            card = catalog.get(entry.card_id)
+            self.add(entry.card_id, entry.card_type, getattr(entry, 'quantity', 1),
+                     getattr(card, 'element', None), getattr(card, 'cost', None))
+
+    @classmethod
+    def from_deck(cls, deck, catalog=None) -> "DeckAggregates":
+        return cls(deck.cards, catalog)
+
+    def add(self, card_id: str, card_type: str, quantity: int = 1,
+            element: Optional[str] = None, cost: Optional[int] = None):
+        """Count quantity more copies of a card"""
+        info = self._info.get(card_id)
+        if info is None:
+            info = self._info[card_id] = _CardInfo((card_type or '').upper(), element, cost)
+        self.copies[card_id] += quantity
+        self.total_cards += quantity
+        if info.card_type == 'CHARACTER':
+            self.character_count += quantity
+        if info.element:
+            self.elements[info.element] += quantity
+        if info.cost is not None:
+            self.costs[info.cost] += quantity
+
+    def remove(self, card_id: str, quantity: int = 1) -> int:
+        """Uncount up to quantity copies of a card; returns how many were removed"""
+        info = self._info.get(card_id)
+        if info is None:
+            return 0
+        quantity = min(quantity, self.copies[card_id])
+        self.copies[card_id] -= quantity
+        self.total_cards -= quantity
+        if info.card_type == 'CHARACTER':
+            self.character_count -= quantity
+        if info.element:
+            self.elements[info.element] -= quantity
+            if not self.elements[info.element]:
+                del self.elements[info.element]
+        if info.cost is not None:
+            self.costs[info.cost] -= quantity
+            if not self.costs[info.cost]:
+                del self.costs[info.cost]
+        if not self.copies[card_id]:
+            del self.copies[card_id]
+            del self._info[card_id]
+        return quantity
+
+    @property
+    def action_count(self) -> int:
+        return self.total_cards - self.character_count
+
+    def can_add(self, card_id: str, card_type: str, quantity: int = 1,
+                rules: Optional[Dict[str, Any]] = None) -> bool:
+        """Whether adding copies keeps the deck within the rules"""
+        rules = rules or _deck_rules()
+        is_character = (card_type or '').upper() == 'CHARACTER'
+        if self.copies[card_id] + quantity > rules['max_copies_per_card']:
+            return False
+        if is_character:
+            return self.character_count + quantity <= rules['max_characters']
+        return self.action_count + quantity <= rules['max_cards']
+
+    def validate(self, rules: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Check the deck against DECK_RULES using only the aggregates
+
+        A deck is valid with exactly max_characters characters, exactly
+        max_cards action cards and no card over max_copies_per_card.
+        """
+        rules = rules or _deck_rules()
+        errors: List[str] = []
+
+        if self.character_count != rules['max_characters']:
+            errors.append(f"Deck needs {rules['max_characters']} character cards ({self.character_count} added)")
+
+        if self.action_count != rules['max_cards']:
+            errors.append(f"Deck needs {rules['max_cards']} action cards ({self.action_count} added)")
+
+        max_copies = rules['max_copies_per_card']
+        for card_id, count in self.copies.items():
+            if count > max_copies:
+                errors.append(f"Too many copies of {card_id} ({count}/{max_copies})")
+
+        return {
+            'is_valid': not errors,
+            'errors': errors,
+            'total_cards': self.total_cards,
+            'character_count': self.character_count,
+            'action_count': self.action_count,
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'total_cards': self.total_cards,
+            'character_count': self.character_count,
+            'action_count': self.action_count,
+            'elements': dict(self.elements),
+            'costs': dict(sorted(self.costs.items())),
+        }
+
+
+def _deck_rules() -> Dict[str, Any]:
+    from config.settings import DECK_RULES
+    return DECK_RULES
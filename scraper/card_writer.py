@@ -0,0 +1,142 @@
+import logging
+import time
+from typing import List, Dict, Any, Optional
+
+from bot.utils.background_jobs import report_progress
+from bot.utils.storage import MAX_BATCH_SIZE
+from scraper.incremental import CardChangeTracker, card_hashes_path
+
+logger = logging.getLogger(__name__)
+
+
+class CardBatchWriter:
+    """Saves cards to the storage backend in batched commits
+
+    Cards are grouped into write batches of up to the API limit. A failing
+    batch is retried, then split in half until the failing cards are
+    isolated, so one bad document does not sink the rest of the import.
+    With track_changes and no change_tracker, card hashes are kept in a
+    file per store, so switching backends writes every card again.
+    """
+
+    def __init__(self, db=None, batch_size: int = MAX_BATCH_SIZE, max_retries: int = 3,
+                 retry_delay: float = 1.0, change_tracker: Optional[CardChangeTracker] = None, storage=None,
+                 track_changes: bool = False):
+        if storage is None and db is not None:
+            from bot.utils.storage import FirestoreBackend
+            storage = FirestoreBackend(db)
+        self._storage = storage
+        self.batch_size = min(batch_size, MAX_BATCH_SIZE)
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self._change_tracker = change_tracker
+        self.track_changes = track_changes
+
+    @property
+    def storage(self):
+        if self._storage is None:
+            from bot.utils.storage import get_storage
+            self._storage = get_storage()
+        return self._storage
+
+    @property
+    def change_tracker(self) -> Optional[CardChangeTracker]:
+        if self._change_tracker is None and self.track_changes:
+            self._change_tracker = CardChangeTracker(card_hashes_path(self.storage.key))
+        return self._change_tracker
+
+    @staticmethod
+    def _card_data(card) -> Dict[str, Any]:
+        return card.to_dict() if hasattr(card, 'to_dict') else dict(card)
+
+    def save_cards(self, cards: List[Any], result: Optional[Dict[str, Any]] = None,
+                   force: bool = False) -> Dict[str, Any]:
+        """Upsert cards and record a per-card outcome
+
+        Fills the processor's result dict (cards_processed, cards_saved,
+        errors) and adds cards_unchanged plus an outcomes map of
+        card id -> 'saved' | 'unchanged' | 'failed'. Unchanged cards are
+        skipped unless force is set.
+        """
+        if result is None:
+            result = {'success': False, 'cards_processed': 0, 'cards_saved': 0, 'errors': []}
+        result.setdefault('cards_unchanged', 0)
+        outcomes = result.setdefault('outcomes', {})
+
+        to_write = []
+        for card in cards:
+            data = self._card_data(card)
+            result['cards_processed'] += 1
+            if not data.get('id'):
+                result['errors'].append(f"Card without id: {data.get('name', 'unknown')}")
+                continue
+            if not force and self.change_tracker is not None and not self.change_tracker.has_changed(data):
+                outcomes[data['id']] = 'unchanged'
+                result['cards_unchanged'] += 1
+                continue
+            to_write.append(data)
+
+        for start in range(0, len(to_write), self.batch_size):
+            self._commit_chunk(to_write[start:start + self.batch_size], result, self.max_retries)
+
+        if self.change_tracker is not None:
+            self.change_tracker.save()
+
+        result['success'] = not any(outcome == 'failed' for outcome in outcomes.values())
+        logger.info(f"Batch save: {result['cards_saved']} saved, {result['cards_unchanged']} unchanged, "
+                    f"{len(result['errors'])} errors")
+        return result
+
+    def _commit_chunk(self, chunk: List[Dict[str, Any]], result: Dict[str, Any], attempts: int):
+        error = self._commit_with_retry(chunk, attempts)
+        if error is None:
+            for data in chunk:
+                result['outcomes'][data['id']] = 'saved'
+            result['cards_saved'] += len(chunk)
+            report_progress('cards_saved', len(chunk))
+            if self.change_tracker is not None:
+                self.change_tracker.mark_saved(chunk)
+            self._invalidate_renders(chunk)
+            if self.storage.name != 'firestore':
+                # Firestore pushes saves to the catalog; other stores don't
+                from bot.utils.card_catalog import card_catalog
+                card_catalog.upsert_records(chunk)
+            return
+
+        if len(chunk) == 1:
+            card_id = chunk[0]['id']
+            result['outcomes'][card_id] = 'failed'
+            result['errors'].append(f"Error saving card {card_id}: {error}")
+            logger.error(f"Error saving card {card_id}: {error}")
+            return
+
+        # Isolate the failing cards by splitting the batch; transient errors
+        # were already retried, so the halves get a single attempt
+        middle = len(chunk) // 2
+        self._commit_chunk(chunk[:middle], result, 1)
+        self._commit_chunk(chunk[middle:], result, 1)
+
+    @staticmethod
+    def _invalidate_renders(chunk: List[Dict[str, Any]]):
+        """Make the bot re-render saved cards instead of serving cached messages"""
+        from bot.utils.render_cache import card_render_cache
+        for data in chunk:
+            card_render_cache.invalidate(data['id'])
+
+    def _commit_with_retry(self, chunk: List[Dict[str, Any]], attempts: int) -> Optional[str]:
+        """Commit one batch, returning the last error if every attempt fails"""
+        error = None
+        for attempt in range(attempts):
+            try:
+                self.storage.save_cards(chunk)
+                return None
+            except Exception as e:
+                error = str(e)
+                logger.warning(f"Batch of {len(chunk)} cards failed (attempt {attempt + 1}): {e}")
+                if attempt + 1 < attempts:
+                    time.sleep(self.retry_delay * (2 ** attempt))
+        return error
+
+
+# Global card writer instance
+card_writer = CardBatchWriter(track_changes=True)
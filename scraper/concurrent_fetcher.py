@@ -0,0 +1,211 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Callable, Iterable, Tuple
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from bot.utils.background_jobs import report_progress
+from scraper.incremental import PageCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (compatible; GenshinTCGBot/1.0)"
+
+
+@dataclass
+class PageResult:
+    """Outcome of fetching a single page"""
+    url: str
+    status_code: int = 0
+    text: str = ""
+    headers: Optional[Dict[str, str]] = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and 200 <= self.status_code < 300
+
+
+class HostRateLimiter:
+    """Spaces out requests to the same host across worker threads; 0 requests/s means no spacing"""
+
+    def __init__(self, requests_per_second: float):
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot: Dict[str, float] = {}
+
+    def wait(self, url: str):
+        """Block until the next request slot for the url's host"""
+        if not self.interval:
+            return
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class ConcurrentPageFetcher:
+    """Fetches wiki pages concurrently over pooled keep-alive connections
+
+    Pages are handed back as soon as they arrive, so parsing runs in a
+    pipeline with the remaining downloads instead of after all of them.
+    With a page cache, requests are conditional and unchanged pages are
+    not parsed again.
+
+    Load on the wiki is bounded by max_workers requests in flight. Set
+    requests_per_second to also cap the request rate per host; a cap
+    below max_workers / page latency serializes the workers again.
+    """
+
+    def __init__(self, max_workers: int = 8, requests_per_second: float = 0.0,
+                 timeout: float = 15.0, retries: int = 2, user_agent: str = DEFAULT_USER_AGENT,
+                 page_cache: Optional[PageCache] = None):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.page_cache = page_cache
+        self.rate_limiter = HostRateLimiter(requests_per_second)
+        self.session = self._create_session(retries, user_agent)
+
+    def _create_session(self, retries: int, user_agent: str) -> requests.Session:
+        """Session with a connection pool sized for the worker count"""
+        session = requests.Session()
+        retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=("GET", "HEAD"))
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.max_workers, max_retries=retry)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update({'User-Agent': user_agent})
+        return session
+
+    def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> PageResult:
+        """Fetch one page, respecting the per-host rate limit"""
+        if headers is None and self.page_cache is not None:
+            headers = self.page_cache.conditional_headers(url)
+        self.rate_limiter.wait(url)
+        start = time.perf_counter()
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+            return PageResult(
+                url=url,
+                status_code=response.status_code,
+                text=response.text,
+                headers=dict(response.headers),
+                elapsed=time.perf_counter() - start
+            )
+        except Exception as e:
+            logger.error(f"Error fetching {url}: {e}")
+            return PageResult(url=url, error=str(e), elapsed=time.perf_counter() - start)
+
+    def fetch_all(self, urls: Iterable[str]) -> Iterable[PageResult]:
+        """Fetch pages concurrently, yielding each as soon as it completes"""
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="fetch") as executor:
+            futures = [executor.submit(self.fetch, url) for url in dict.fromkeys(urls)]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def crawl(self, start_urls: Iterable[str],
+              parse_page: Callable[[PageResult], Tuple[List[Dict[str, Any]], List[str]]],
+              max_pages: Optional[int] = None) -> Dict[str, Any]:
+        """Fetch and parse pages in a pipeline
+
+        parse_page receives each fetched page and returns the cards found
+        on it plus any further page urls to fetch (e.g. card pages linked
+        from a category page). Parsing runs on the calling thread while
+        the workers keep downloading. Pages the cache reports as unchanged
+        are not parsed; their previously found links are still followed.
+
+        Parsed pages are only staged in the page cache, with the ids of
+        their cards in page_cards. Call commit_pages() once the cards are
+        stored, so a page whose cards failed to save is parsed again.
+        """
+        result = {
+            'success': False,
+            'pages_fetched': 0,
+            'pages_unchanged': 0,
+            'cards': [],
+            'page_cards': {},
+            'errors': []
+        }
+
+        seen = set()
+        pending = set()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="fetch") as executor:
+            def enqueue(urls):
+                for url in urls:
+                    if url in seen or (max_pages is not None and len(seen) >= max_pages):
+                        continue
+                    seen.add(url)
+                    pending.add(executor.submit(self.fetch, url))
+
+            enqueue(start_urls)
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.discard(future)
+                    page = future.result()
+                    result['pages_fetched'] += 1
+                    report_progress('pages_fetched')
+
+                    if self.page_cache is not None and self.page_cache.is_unchanged(page):
+                        result['pages_unchanged'] += 1
+                        report_progress('pages_unchanged')
+                        enqueue(self.page_cache.get_links(page.url))
+                        continue
+
+                    if not page.ok:
+                        result['errors'].append(f"{page.url}: {page.error or page.status_code}")
+                        continue
+
+                    try:
+                        cards, links = parse_page(page)
+                        result['cards'].extend(cards)
+                        report_progress('cards_parsed', len(cards))
+                        result['page_cards'][page.url] = [card.get('id') for card in cards]
+                        if self.page_cache is not None:
+                            self.page_cache.stage(page, links)
+                        enqueue(links)
+                    except Exception as e:
+                        logger.error(f"Error parsing {page.url}: {e}")
+                        result['errors'].append(f"{page.url}: {e}")
+
+        result['success'] = result['pages_fetched'] > 0 and len(result['errors']) < result['pages_fetched']
+        logger.info(f"Crawled {result['pages_fetched']} pages ({result['pages_unchanged']} unchanged), "
+                    f"parsed {len(result['cards'])} cards")
+        return result
+
+    def commit_pages(self, result: Dict[str, Any], outcomes: Optional[Dict[str, str]] = None) -> int:
+        """Record crawled pages in the page cache once their cards are stored
+
+        outcomes is the card id -> outcome map from CardBatchWriter.save_cards;
+        a page is committed only if every card parsed from it was saved or
+        unchanged. Without outcomes every parsed page is committed.
+        """
+        if self.page_cache is None:
+            return 0
+
+        stored = ('saved', 'unchanged')
+        urls = [url for url, card_ids in result.get('page_cards', {}).items()
+                if outcomes is None or all(outcomes.get(card_id) in stored for card_id in card_ids)]
+        committed = self.page_cache.commit(urls)
+        self.page_cache.save()
+
+        skipped = len(result.get('page_cards', {})) - committed
+        if skipped:
+            logger.info(f"{skipped} pages with unsaved cards will be parsed again next crawl")
+        return committed
+
+    def close(self):
+        self.session.close()
+
@@ -0,0 +1,153 @@
+import hashlib
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from io import BytesIO
+from typing import List, Dict, Any, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+from bot.utils.background_jobs import report_progress
+from scraper.concurrent_fetcher import ConcurrentPageFetcher
+from bot.utils.json_files import load_json, save_json
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_IMAGE_DIR = os.path.join("data", "images")
+
+# Bounding boxes; images are scaled down to fit, keeping their aspect ratio.
+# Telegram wants inline thumbnails no larger than 320px.
+VARIANTS: Dict[str, Tuple[int, int]] = {
+    'thumb': (320, 320),
+    'preview': (480, 800),
+}
+
+JPEG_QUALITY = 85
+
+# Background for card art with transparency, since JPEG has no alpha
+BACKGROUND_COLOR = (255, 255, 255)
+
+
+def render_variant(source: Image.Image, size: Tuple[int, int]) -> Image.Image:
+    """Scale an image down to fit size and flatten it for JPEG"""
+    image = source.copy()
+    image.thumbnail(size, Image.LANCZOS)
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        flattened = Image.new('RGB', image.size, BACKGROUND_COLOR)
+        flattened.paste(image, mask=image.getchannel('A'))
+        return flattened
+    return image.convert('RGB')
+
+
+def _image_url(card) -> Optional[str]:
+    """image_url of a Card or of a card dict from the scraper"""
+    return card.get('image_url') if isinstance(card, dict) else getattr(card, 'image_url', None)
+
+
+class ImagePipeline:
+    """Downloads card art and pre-generates size-normalized variants
+
+    Variants are stored in a content-addressed cache under cache_dir,
+    named after the hash of the source image, so identical art shared by
+    several cards is processed once and files never go stale. An index
+    maps each image URL to its variants; URLs whose variants are already
+    on disk are not downloaded again.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_IMAGE_DIR, variants: Optional[Dict[str, Tuple[int, int]]] = None,
+                 max_workers: int = 4, fetcher: Optional[ConcurrentPageFetcher] = None):
+        self.cache_dir = cache_dir
+        self.variants = variants or VARIANTS
+        self.max_workers = max_workers
+        self._fetcher = fetcher
+        self._lock = threading.Lock()
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self._index: Dict[str, Dict[str, Any]] = load_json(self.index_path)
+
+    @property
+    def fetcher(self) -> ConcurrentPageFetcher:
+        if self._fetcher is None:
+            self._fetcher = ConcurrentPageFetcher(max_workers=self.max_workers)
+        return self._fetcher
+
+    def _variant_file(self, source_hash: str, name: str) -> str:
+        width, height = self.variants[name]
+        return os.path.join(source_hash[:2], f"{source_hash}_{name}_{width}x{height}.jpg")
+
+    def variant_path(self, image_url: str, variant: str) -> Optional[str]:
+        """Local path of a pre-generated variant, if it exists"""
+        entry = self._index.get(image_url)
+        if not entry or variant not in entry.get('variants', {}):
+            return None
+        path = os.path.join(self.cache_dir, entry['variants'][variant])
+        return path if os.path.exists(path) else None
+
+    def _is_cached(self, image_url: str) -> bool:
+        return all(self.variant_path(image_url, name) for name in self.variants)
+
+    def _download(self, image_url: str) -> bytes:
+        self.fetcher.rate_limiter.wait(image_url)
+        response = self.fetcher.session.get(image_url, timeout=self.fetcher.timeout)
+        response.raise_for_status()
+        return response.content
+
+    def process_image(self, image_url: str) -> str:
+        """Download one image and write its variants; returns 'cached' or 'processed'"""
+        if self._is_cached(image_url):
+            return 'cached'
+
+        data = self._download(image_url)
+        source_hash = hashlib.sha256(data).hexdigest()
+        variants = {}
+        with Image.open(BytesIO(data)) as source:
+            source = ImageOps.exif_transpose(source)
+            for name, size in self.variants.items():
+                relative = self._variant_file(source_hash, name)
+                path = os.path.join(self.cache_dir, relative)
+                if not os.path.exists(path):
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    # Workers may render the same art for different URLs at once
+                    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                    render_variant(source, size).save(tmp_path, 'JPEG', quality=JPEG_QUALITY, optimize=True)
+                    os.replace(tmp_path, path)
+                variants[name] = relative
+
+        with self._lock:
+            self._index[image_url] = {'source_hash': source_hash, 'variants': variants}
+        return 'processed'
+
+    def process_cards(self, cards: List[Any]) -> Dict[str, Any]:
+        """Generate variants for the art of every card that has an image_url"""
+        result = {'success': True, 'images_processed': 0, 'images_cached': 0, 'errors': []}
+        urls = sorted({url for url in map(_image_url, cards) if url})
+        if not urls:
+            return result
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self.process_image, url): url for url in urls}
+            for future in as_completed(futures):
+                url = futures[future]
+                try:
+                    outcome = future.result()
+                except Exception as e:
+                    result['errors'].append(f"Error processing image {url}: {e}")
+                    logger.error(f"Error processing image {url}: {e}")
+                    continue
+                result[f'images_{outcome}'] += 1
+                report_progress(f'images_{outcome}')
+
+        self.save()
+        result['success'] = not result['errors']
+        logger.info(f"Image pipeline: {result['images_processed']} processed, "
+                    f"{result['images_cached']} cached, {len(result['errors'])} errors")
+        return result
+
+    def save(self):
+        with self._lock:
+            save_json(self.index_path, self._index)
+
+
+# Global image pipeline instance
+image_pipeline = ImagePipeline()
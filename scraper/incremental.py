@@ -0,0 +1,164 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+from bot.utils.json_files import load_json, save_json
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_CACHE_PATH = os.path.join("data", "page_cache.json")
+DEFAULT_CARD_HASHES_PATH = os.path.join("data", "card_hashes.json")
+
+# Fields that change on every save and say nothing about the card itself
+VOLATILE_CARD_FIELDS = ('created_at', 'updated_at', 'last_updated', 'scraped_at')
+
+
+def card_hashes_path(store_key: str) -> str:
+    """Card hash file for one store, so switching backends doesn't skip cards the new store lacks"""
+    if store_key == 'firestore':
+        # Hashes recorded before stores were told apart were Firestore's
+        return DEFAULT_CARD_HASHES_PATH
+    return os.path.join("data", f"card_hashes_{store_key}.json")
+
+
+def content_hash(text: str) -> str:
+    """Stable hash of page or card content"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class PageCache:
+    """Persistent per-URL validators and content hashes for wiki pages
+
+    Stores the ETag, Last-Modified and a hash of the body for every page
+    so the next scrape can send conditional requests and skip parsing
+    pages whose content did not change.
+    """
+
+    def __init__(self, path: str = DEFAULT_PAGE_CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = load_json(path)
+        self._staged: Dict[str, Dict[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since headers for a cached url"""
+        entry = self._entries.get(url)
+        if not entry:
+            return {}
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def is_unchanged(self, page) -> bool:
+        """Whether a fetched page matches what was parsed last time"""
+        entry = self._entries.get(page.url)
+        if not entry:
+            return False
+        if page.status_code == 304:
+            return True
+        return entry.get('content_hash') == content_hash(page.text)
+
+    def get_links(self, url: str) -> List[str]:
+        """Links found on the page when it was last parsed"""
+        entry = self._entries.get(url)
+        return list(entry.get('links', [])) if entry else []
+
+    @staticmethod
+    def _entry(page, links: Optional[List[str]]) -> Dict[str, Any]:
+        headers = {k.lower(): v for k, v in (page.headers or {}).items()}
+        return {
+            'etag': headers.get('etag'),
+            'last_modified': headers.get('last-modified'),
+            'content_hash': content_hash(page.text),
+            'links': list(links or []),
+            'fetched_at': datetime.now().isoformat(),
+        }
+
+    def update(self, page, links: Optional[List[str]] = None):
+        """Record a freshly parsed page"""
+        entry = self._entry(page, links)
+        with self._lock:
+            self._entries[page.url] = entry
+
+    def stage(self, page, links: Optional[List[str]] = None):
+        """Hold a parsed page until commit(), e.g. until its cards are saved"""
+        entry = self._entry(page, links)
+        with self._lock:
+            self._staged[page.url] = entry
+
+    def commit(self, urls: List[str]) -> int:
+        """Record staged pages; pages left staged are parsed again next time"""
+        committed = 0
+        with self._lock:
+            for url in urls:
+                entry = self._staged.pop(url, None)
+                if entry is not None:
+                    self._entries[url] = entry
+                    committed += 1
+        return committed
+
+    def save(self):
+        with self._lock:
+            save_json(self.path, self._entries)
+
+
+class CardChangeTracker:
+    """Remembers the content hash of every saved card
+
+    Used to write only cards whose normalized content changed since the
+    last successful save.
+    """
+
+    def __init__(self, path: str = DEFAULT_CARD_HASHES_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._hashes: Dict[str, str] = load_json(path)
+
+    @staticmethod
+    def normalize(card_data: Dict[str, Any]) -> str:
+        """Canonical JSON for a card dict, ignoring volatile fields"""
+        def clean(value):
+            if isinstance(value, str):
+                return " ".join(value.split())
+            if isinstance(value, dict):
+                return {k: clean(v) for k, v in value.items()}
+            if isinstance(value, (list, tuple)):
+                return [clean(v) for v in value]
+            return value
+
+        data = {k: clean(v) for k, v in card_data.items() if k not in VOLATILE_CARD_FIELDS}
+        return json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+
+    def card_hash(self, card_data: Dict[str, Any]) -> str:
+        return content_hash(self.normalize(card_data))
+
+    def has_changed(self, card_data: Dict[str, Any]) -> bool:
+        return self._hashes.get(card_data.get('id')) != self.card_hash(card_data)
+
+    def filter_changed(self, cards: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Cards that are new or differ from their last saved version"""
+        return [card for card in cards if self.has_changed(card)]
+
+    def mark_saved(self, cards: List[Dict[str, Any]]):
+        """Record cards as written to the store"""
+        with self._lock:
+            for card in cards:
+                self._hashes[card['id']] = self.card_hash(card)
+
+    def forget(self, card_id: str):
+        with self._lock:
+            self._hashes.pop(card_id, None)
+
+    def save(self):
+        with self._lock:
+            save_json(self.path, self._hashes)
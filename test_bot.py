@@ -74,7 +74,35 @@ def test_imports():
         ("bot.handlers.deck_builder", "bot/handlers/deck_builder.py"),
         ("bot.handlers.rules", "bot/handlers/rules.py"),
         ("scraper.wiki_scraper", "scraper/wiki_scraper.py"),
-        ("scraper.data_processor", "scraper/data_processor.py")
+        ("scraper.data_processor", "scraper/data_processor.py"),
+        ("bot.utils.card_catalog", "bot/utils/card_catalog.py"),
+        ("bot.utils.fuzzy_index", "bot/utils/fuzzy_index.py"),
+        ("bot.utils.background_jobs", "bot/utils/background_jobs.py"),
+        ("scraper.concurrent_fetcher", "scraper/concurrent_fetcher.py"),
+        ("scraper.incremental", "scraper/incremental.py"),
+        ("scraper.card_writer", "scraper/card_writer.py"),
+        ("bot.utils.async_database", "bot/utils/async_database.py"),
+        ("bot.utils.activity_tracker", "bot/utils/activity_tracker.py"),
+        ("bot.utils.cache", "bot/utils/cache.py"),
+        ("bot.utils.webhook_server", "bot/utils/webhook_server.py"),
+        ("config.runtime_settings", "config/runtime_settings.py"),
+        ("bot.utils.update_processor", "bot/utils/update_processor.py"),
+        ("bot.utils.send_scheduler", "bot/utils/send_scheduler.py"),
+        ("bot.utils.render_cache", "bot/utils/render_cache.py"),
+        ("bot.utils.inline_results", "bot/utils/inline_results.py"),
+        ("bot.utils.media_cache", "bot/utils/media_cache.py"),
+        ("scraper.image_pipeline", "scraper/image_pipeline.py"),
+        ("models.deck_aggregates", "models/deck_aggregates.py"),
+        ("models.compact", "models/compact.py"),
+        ("models.card_loader", "models/card_loader.py"),
+        ("bot.utils.catalog_snapshot", "bot/utils/catalog_snapshot.py"),
+        ("bot.utils.store_health", "bot/utils/store_health.py"),
+        ("bot.utils.storage", "bot/utils/storage.py"),
+        ("bot.utils.metrics", "bot/utils/metrics.py"),
+        ("bot.utils.metrics_server", "bot/utils/metrics_server.py"),
+        ("bot.utils.loop_watchdog", "bot/utils/loop_watchdog.py"),
+        ("bot.utils.profiler", "bot/utils/profiler.py"),
+        ("bot.utils.json_files", "bot/utils/json_files.py")
     ]
     
     for module_name, file_path in project_modules:
@@ -447,7 +475,35 @@ def test_file_structure():
         "bot/utils/database.py",
         "bot/utils/validators.py",
         "scraper/wiki_scraper.py",
-        "scraper/data_processor.py"
+        "scraper/data_processor.py",
+        "bot/utils/card_catalog.py",
+        "bot/utils/fuzzy_index.py",
+        "bot/utils/background_jobs.py",
+        "scraper/concurrent_fetcher.py",
+        "scraper/incremental.py",
+        "scraper/card_writer.py",
+        "bot/utils/async_database.py",
+        "bot/utils/activity_tracker.py",
+        "bot/utils/cache.py",
+        "bot/utils/webhook_server.py",
+        "config/runtime_settings.py",
+        "bot/utils/update_processor.py",
+        "bot/utils/send_scheduler.py",
+        "bot/utils/render_cache.py",
+        "bot/utils/inline_results.py",
+        "bot/utils/media_cache.py",
+        "scraper/image_pipeline.py",
+        "models/deck_aggregates.py",
+        "models/compact.py",
+        "models/card_loader.py",
+        "bot/utils/catalog_snapshot.py",
+        "bot/utils/store_health.py",
+        "bot/utils/storage.py",
+        "bot/utils/metrics.py",
+        "bot/utils/metrics_server.py",
+        "bot/utils/loop_watchdog.py",
+        "bot/utils/profiler.py",
+        "bot/utils/json_files.py"
     ]
     
     for file_path in required_files:
@@ -460,6 +516,1740 @@ def test_file_structure():
     
     return all(test[1] for test in tests)
 
+def test_card_catalog():
+    """Test in-memory card catalog indexes"""
+    print_test_header("Card Catalog")
+    
+    tests = []
+    
+    try:
+        from types import SimpleNamespace
+        from bot.utils.card_catalog import CardCatalog
+        from models.compact import CompactCard
+        
+        catalog = CardCatalog()
+        catalog.load([
+            CompactCard(id="diluc", name="Diluc", card_type="CHARACTER", cost=0,
+                        element="PYRO", weapon="CLAYMORE", hp=10, max_energy=3),
+            CompactCard(id="xingqiu", name="Xingqiu", card_type="CHARACTER", cost=0,
+                        element="HYDRO", weapon="SWORD", hp=10, max_energy=2),
+            CompactCard(id="sacrificial_greatsword", name="Sacrificial Greatsword", card_type="EQUIPMENT", cost=3),
+        ])
+        
+        # Test exact and prefix lookups
+        try:
+            tests.append(("Exact name lookup", catalog.get_by_name("  DILUC ").id == "diluc"))
+            tests.append(("Name prefix lookup", [c.id for c in catalog.search("xing")] == ["xingqiu"]))
+            tests.append(("Word prefix lookup", [c.id for c in catalog.search("greatsw")] == ["sacrificial_greatsword"]))
+        except Exception as e:
+            tests.append(("Catalog lookups", False, str(e)))
+        
+        # Test filtered lookups
+        try:
+            tests.append(("Element filter", [c.id for c in catalog.filter(element="pyro")] == ["diluc"]))
+            tests.append(("Type and cost filter", len(catalog.filter(card_type="EQUIPMENT", cost=3)) == 1))
+        except Exception as e:
+            tests.append(("Catalog filters", False, str(e)))
+        
+        # Test index maintenance
+        try:
+            catalog.remove("diluc")
+            tests.append(("Card removal", catalog.get("diluc") is None and not catalog.search("dil")))
+        except Exception as e:
+            tests.append(("Card removal", False, str(e)))
+        
+        # Test store watch: the first snapshot loads everything at once
+        try:
+            class StandInSnapshot:
+                def __init__(self, data):
+                    self.id = data['id']
+                    self._data = data
+                
+                def to_dict(self):
+                    return dict(self._data)
+            
+            def change(kind, data):
+                return SimpleNamespace(type=SimpleNamespace(name=kind), document=StandInSnapshot(data))
+            
+            docs = [StandInSnapshot({'id': f"card_{i}", 'name': f"Card {i}", 'card_type': "EVENT"}) for i in range(50)]
+            watched = CardCatalog(compact=True)
+            watched._on_snapshot(docs, [change('ADDED', doc._data) for doc in docs], None)
+            tests.append(("Initial snapshot loaded once", len(watched) == 50 and watched.version == 1
+                          and watched.wait_until_synced(0)))
+            watched._on_snapshot(docs, [change('MODIFIED', {'id': "card_1", 'name': "Renamed", 'card_type': "EVENT"})], None)
+            tests.append(("Later snapshots apply changes", watched.get("card_1").name == "Renamed" and watched.version == 2))
+            
+            # Stopping the watch releases a thread still waiting for the first snapshot
+            import threading
+            import time
+            waiting = CardCatalog()
+            result = []
+            waiter = threading.Thread(target=lambda: result.append(waiting.wait_until_synced(30)))
+            start = time.perf_counter()
+            waiter.start()
+            waiting.stop_watching()
+            waiter.join(5)
+            tests.append(("Stopped watch releases waiter", result == [False] and time.perf_counter() - start < 1))
+        except Exception as e:
+            tests.append(("Catalog store watch", False, str(e)))
+            
+    except Exception as e:
+        tests.append(("Card catalog setup", False, str(e)))
+    
+    # Print results
+    for test_name, success, *details in tests:
+        print_test_result(test_name, success, details[0] if details else "")
+    
+    return all(test[1] for test in tests)
+
+def test_fuzzy_index():
+    """Test n-gram fuzzy index"""
+    print_test_header("Fuzzy Index")
+    
+    tests = []
+    
+    try:
+        from bot.utils.fuzzy_index import FuzzyIndex
+        
+        index = FuzzyIndex()
+        index.build([
+            ("diluc", "Diluc"),
+            ("sacrificial_greatsword", "Sacrificial Greatsword"),
+            ("gilded_dreams", "Gilded Dreams"),
+        ])
+        
+        # Test typo tolerance
+        try:
+            results = index.search("sacrifical greatswrd", limit=1)
+            tests.append(("Typo match", results and results[0][0] == "sacrificial_greatsword"))
+        except Exception as e:
+            tests.append(("Typo match", False, str(e)))
+        
+        # Test candidate pruning
+        try:
+            candidates = index.candidates("diluk", limit=1)
+            tests.append(("Candidate shortlist", "diluc" in candidates and "gilded_dreams" not in candidates))
+        except Exception as e:
+            tests.append(("Candidate shortlist", False, str(e)))
+        
+        # Test removal
+        try:
+            index.remove("diluc")
+            tests.append(("Index removal", not index.search("diluc", score_cutoff=90)))
+        except Exception as e:
+            tests.append(("Index removal", False, str(e)))
+        
+        # Test against a full scan when many names share a word
+        try:
+            from fuzzywuzzy import fuzz, process
+            
+            prefixes = ["Mondstadt", "Liyue", "Emblem of", "Heart of", "Sacrificial", "Gilded"]
+            nouns = ["Greatsword", "Catalyst", "Polearm", "Dreams", "Fury", "Resonance", "Harbor", "Kitchen",
+                     "Knights", "Tavern", "Banquet", "Heritage", "Chalice", "Flame", "Sigil", "Bow"]
+            suffixes = ["", "of Seals", "of the Abyss", "Rite", "Prime", "Echoes", "Reborn"]
+            names = {f"card_{i}": name for i, name in enumerate(
+                " ".join(part for part in (prefix, noun, suffix) if part)
+                for prefix in prefixes for noun in nouns for suffix in suffixes)}
+            shared = FuzzyIndex()
+            shared.build(names.items())
+            
+            mismatched = [
+                query for query in ["mondstadt", "of", "bow", "heart of", "sacrifical greatswrd", "liyue kitchn", "abyss"]
+                if [score for _, score, _ in process.extract(query, names, scorer=fuzz.WRatio, limit=5)]
+                != [score for _, score in shared.search(query, limit=5)]
+            ]
+            tests.append(("Same top scores as full scan", not mismatched, f"Differs for {mismatched}" if mismatched else ""))
+        except Exception as e:
+            tests.append(("Same top scores as full scan", False, str(e)))
+            
+    except Exception as e:
+        tests.append(("Fuzzy index setup", False, str(e)))
+    
+    # Print results
+    for test_name, success, *details in tests:
+        print_test_result(test_name, success, details[0] if details else "")
+    
+    return all(test[1] for test in tests)
+
+def test_background_jobs():
+    """Test background job manager"""
+    print_test_header("Background Jobs")
+    
+    tests = []
+    
+    try:
+        from bot.utils.background_jobs import JobManager, report_progress
+        
+        manager = JobManager()
+        
+        def sample_job():
+            report_progress("pages_fetched", 3)
+            return {'success': True}
+        
+        # Test job completion and progress
+        try:
+            job = manager.submit("sample", sample_job)
+            job.future.result(timeout=5)
+            tests.append(("Job completion", job.status == "completed" and job.result['success']))
+            tests.append(("Job progress", job.progress.get("pages_fetched") == 3))
+        except Exception as e:
+            tests.append(("Job completion", False, str(e)))
+        
+        # Test job failure handling
+        try:
+            job = manager.submit("failing", lambda: 1 / 0)
+            job.future.result(timeout=5)
+            tests.append(("Job failure", job.status == "failed" and job.error is not None))
+        except Exception as e:
+            tests.append(("Job failure", False, str(e)))
+        
+        manager.shutdown()
+            
+    except Exception as e:
+        tests.append(("Background jobs setup", False, str(e)))
+    
+    # Print results
+    for test_name, success, *details in tests:
+        print_test_result(test_name, success, details[0] if details else "")
+    
+    return all(test[1] for test in tests)
+
+def test_concurrent_fetcher():
+    """Test concurrent wiki fetch pipeline against a local HTTP stand-in"""
+    print_test_header("Concurrent Fetcher")
+    
+    tests = []
+    
+    try:
+        import threading
+        from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+        from bs4 import BeautifulSoup
+        from scraper.concurrent_fetcher import ConcurrentPageFetcher
+        
+        # Recorded wiki HTML served by the stand-in
+        pages = {
+            "/wiki/Character_Cards": (
+                '<div class="category-page__members">'
+                '<a href="/wiki/Diluc">Diluc</a><a href="/wiki/Xingqiu">Xingqiu</a>'
+                '<a href="/wiki/Missing">Missing</a></div>'
+            ),
+            "/wiki/Diluc": '<h1 class="page-header__title">Diluc</h1><td data-source="element">Pyro</td>',
+            "/wiki/Xingqiu": '<h1 class="page-header__title">Xingqiu</h1><td data-source="element">Hydro</td>',
+        }
+        
+        class WikiStandIn(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = pages.get(self.path)
+                self.send_response(200 if body else 404)
+                self.send_header("Content-Type", "text/html")
+                self.end_headers()
+                self.wfile.write((body or "").encode())
+            
+            def log_message(self, *args):
+                pass
+        
+        server = ThreadingHTTPServer(("127.0.0.1", 0), WikiStandIn)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        
+        def parse_page(page):
+            soup = BeautifulSoup(page.text, "html.parser")
+            links = [base_url + a["href"] for a in soup.select(".category-page__members a")]
+            title = soup.select_one(".page-header__title")
+            cards = [{'name': title.get_text(), 'element': soup.td.get_text().upper()}] if title else []
+            return cards, links
+        
+        try:
+            fetcher = ConcurrentPageFetcher(max_workers=4, requests_per_second=0)
+            result = fetcher.crawl([base_url + "/wiki/Character_Cards"], parse_page)
+            fetcher.close()
+            
+            names = sorted(card['name'] for card in result['cards'])
+            tests.append(("Pipeline crawl", result['pages_fetched'] == 4 and names == ["Diluc", "Xingqiu"]))
+            tests.append(("Failed page reported", len(result['errors']) == 1))
+        except Exception as e:
+            tests.append(("Pipeline crawl", False, str(e)))
+        finally:
+            server.shutdown()
+            
+    except Exception as e:
+        tests.append(("Concurrent fetcher setup", False, str(e)))
+    
+    # Print results
+    for test_name, success, *details in tests:
+        print_test_result(test_name, success, details[0] if details else "")
+    
+    return all(test[1] for test in tests)
+
+def test_incremental_scraping():
+    """Test conditional requests, page cache and card change tracking"""
+    print_test_header("Incremental Scraping")
+    
+    tests = []
+    
+    try:
+        import hashlib
+        import tempfile
+        import threading
+        from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+        from scraper.concurrent_fetcher import ConcurrentPageFetcher
+        from scraper.incremental import PageCache, CardChangeTracker
+        
+        pages = {
+            "/wiki/Cards": '<a href="/wiki/Diluc">Diluc</a>',
+            "/wiki/Diluc": '<h1>Diluc</h1>',
+        }
+        
+        class WikiStandIn(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = pages[self.path].encode()
+                etag = '"%s"' % hashlib.md5(body).hexdigest()
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, *args):
+                pass
+        
+        server = ThreadingHTTPServer(("127.0.0.1", 0), WikiStandIn)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        
+        def parse_page(page):
+            links = [base_url + "/wiki/Diluc"] if page.url.endswith("/Cards") else []
+            cards = [] if links else [{'id': 'diluc', 'name': page.text}]
+            return cards, links
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_path = os.path.join(tmp_dir, "page_cache.json")
+            
+            # Test conditional re-scrape
+            try:
+                fetcher = ConcurrentPageFetcher(requests_per_second=0, page_cache=PageCache(cache_path))
+                first = fetcher.crawl([base_url + "/wiki/Cards"], parse_page)
+                
+                # Diluc failed to save, so only the category page is recorded
+                fetcher.commit_pages(first, {'diluc': 'failed'})
+                fetcher = ConcurrentPageFetcher(requests_per_second=0, page_cache=PageCache(cache_path))
+                retry = fetcher.crawl([base_url + "/wiki/Cards"], parse_page)
+                tests.append(("First scrape parses pages", len(first['cards']) == 1))
+                tests.append(("Pages with failed cards re-parsed", retry['pages_unchanged'] == 1 and len(retry['cards']) == 1))
+                
+                fetcher.commit_pages(retry, {'diluc': 'saved'})
+                fetcher = ConcurrentPageFetcher(requests_per_second=0, page_cache=PageCache(cache_path))
+                second = fetcher.crawl([base_url + "/wiki/Cards"], parse_page)
+                tests.append(("Unchanged pages skipped", second['pages_unchanged'] == 2 and not second['cards']))
+                
+                pages["/wiki/Diluc"] = '<h1>Diluc Ragnvindr</h1>'
+                third = fetcher.crawl([base_url + "/wiki/Cards"], parse_page)
+                tests.append(("Changed page re-parsed", len(third['cards']) == 1 and third['pages_unchanged'] == 1))
+            except Exception as e:
+                tests.append(("Conditional re-scrape", False, str(e)))
+            finally:
+                server.shutdown()
+            
+            # Test card change tracking
+            try:
+                tracker = CardChangeTracker(os.path.join(tmp_dir, "card_hashes.json"))
+                card = {'id': 'diluc', 'name': 'Diluc', 'cost': 0}
+                tracker.mark_saved([card])
+                unchanged = dict(card, name=' Diluc ', updated_at='2025-01-01')
+                changed = dict(card, cost=1)
+                tests.append(("Card change tracking", tracker.filter_changed([unchanged, changed]) == [changed]))
+            except Exception as e:
+                tests.append(("Card change tracking", False, str(e)))
+            
+    except Exception as e:
+        tests.append(("Incremental scraping setup", False, str(e)))
+    
+    # Print results
+    for test_name, success, *details in tests:
+        print_test_result(test_name, success, details[0] if details else "")
+    
+    return all(test[1] for test in tests)
+
+def test_card_batch_writer():
+    """Test batched card saves against an in-memory Firestore stand-in"""
+    print_test_header("Card Batch Writer")
+    
+    tests = []
+    
+    try:
+        import tempfile
+        from scraper.card_writer import CardBatchWriter
+        from scraper.incremental import CardChangeTracker
+        
+        class StandInBatch:
+            def __init__(self, store):
+                self.store = store
+                self.writes = []
+            
+            def set(self, ref, data, merge=False):
+                self.writes.append((ref, data))
+            
+            def commit(self):
+                if any(ref == "bad" for ref, _ in self.writes):
+                    raise ValueError("invalid document")
+                self.store.commits += 1
+                self.store.docs.update(dict(self.writes))
+        
+        class StandInCollection:
+            def document(self, doc_id):
+                return doc_id
+        
+        class StandInFirestore:
+            def __init__(self):
+                self.docs = {}
+                self.commits = 0
+            
+            def batch(self):
+                return StandInBatch(self)
+            
+            def collection(self, name):
+                return StandInCollection()
+        
+        cards = [{'id': f"card_{i}", 'name': f"Card {i}"} for i in range(25)]
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tracker = CardChangeTracker(os.path.join(tmp_dir, "card_hashes.json"))
+            
+            # Test batching
+            try:
+                store = StandInFirestore()
+                writer = CardBatchWriter(db=store, batch_size=10, retry_delay=0, change_tracker=tracker)
+                result = writer.save_cards(cards)
+                tests.append(("Cards saved in batches", result['cards_saved'] == 25 and store.commits == 3))
+            except Exception as e:
+                tests.append(("Cards saved in batches", False, str(e)))
+            
+            # Test unchanged cards are skipped
+            try:
+                result = writer.save_cards(cards + [{'id': 'card_new', 'name': 'New'}])
+                tests.append(("Unchanged cards skipped", result['cards_saved'] == 1 and result['cards_unchanged'] == 25))
+            except Exception as e:
+                tests.append(("Unchanged cards skipped", False, str(e)))
+            
+            # Test partial failure isolation
+            try:
+                writer = CardBatchWriter(db=StandInFirestore(), batch_size=10, retry_delay=0)
+                result = writer.save_cards(cards[:9] + [{'id': 'bad', 'name': 'Bad'}])
+                tests.append(("Failed card isolated",
+                              result['cards_saved'] == 9 and result['outcomes']['bad'] == 'failed'
+                              and len(result['errors']) == 1))
+            except Exception as e:
+                tests.append(("Failed card isolated", False, str(e)))
+            
+    except Exception as e:
+        tests.append(("Card batch writer setup", False, str(e)))
+    
+    # Print results
+    for test_name, success, *details in tests:
+        print_test_result(test_name, success, details[0] if details else "")
+    
+    return all(test[1] for test in tests)
+
+def test_async_database():
+    """Test async facade over db_manager"""
+    print_test_header("Async Database")
+    
+    tests = []
+    
+    try:
+        import asyncio
+        import threading
+        import time
+        from bot.utils.async_database import AsyncDatabaseManager
+        
+        class StandInManager:
+            def get_deck(self, deck_id):
+                time.sleep(0.2)
+                return {'id': deck_id, 'thread': threading.current_thread().name}
+            
+            def delete_deck(self, deck_id, user_id):
+                return deck_id == "deck1" and user_id == "123"
+        
+        manager = AsyncDatabaseManager(manager=StandInManager(), max_workers=4)
+        
+        # Test calls run off the event loop, concurrently
+        try:
+            async def load_decks():
+                start = time.perf_counter()
+                decks = await asyncio.gather(*(manager.get_deck(f"deck{i}") for i in range(4)))
+                return decks, time.perf_counter() - start
+            
+            decks, elapsed = asyncio.run(load_decks())
+            tests.append(("Calls run on worker threads", all(d['thread'].startswith("db") for d in decks)))
+            tests.append(("Calls run concurrently", elapsed < 0.6))
+        except Exception as e:
+            tests.append(("Async calls", False, str(e)))
+        
+        # Test arguments are passed through
+        try:
+            deleted = asyncio.run(manager.delete_deck("deck1", user_id="123"))
+            tests.append(("Arguments passed through", deleted is True))
+        except Exception as e:
+            tests.append(("Arguments passed through", False, str(e)))
+        
+        manager.shutdown()
+            
+    except Exception as e:
+        tests.append(("Async database setup", False, str(e)))
+    
+    # Print results
+    for test_name, success, *details in tests:
+        print_test_result(test_name, success, details[0] if details else "")
+    
+    return all(test[1] for test in tests)
+
+def test_activity_tracker():
+    """Test write-behind user activity buffer"""
+    print_test_header("Activity Tracker")
+    
+    tests = []
+    
+    try:
+        from bot.utils.activity_tracker import ActivityTracker
+        
+        class StandInBatch:
+            def __init__(self, store):
+                self.store = store
+            
+            def set(self, ref, data, merge=False):
+                self.store.docs[ref] = data
+            
+            def commit(self):
+                self.store.commits += 1
+        
+        class StandInCollection:
+            def document(self, doc_id):
+                return doc_id
+        
+        class StandInFirestore:
+            def __init__(self):
+                self.docs = {}
+                self.commits = 0
+            
+            def batch(self):
+                return StandInBatch(self)
+            
+            def collection(self, name):
+                return StandInCollection()
+        
+        store = StandInFirestore()
+        tracker = ActivityTracker(db=store)
+        
+        # Test activity is buffered
+        try:
+            for _ in range(5):
+                tracker.record("111")
+            tracker.record("222")
+            tests.append(("Activity buffered in memory", len(tracker) == 2 and store.commits == 0))
+        except Exception as e:
+            tests.append(("Activity buffered in memory", False, str(e)))
+        
+        # Test batched flush
+        try:
+            written = tracker.flush()
+            tests.append(("One write per active user", written == 2 and store.commits == 1 and len(tracker) == 0))
+            tests.append(("Empty flush skipped", tracker.flush() == 0 and store.commits == 1))
+        except Exception as e:
+            tests.append(("Batched flush", False, str(e)))
+            
+    except Exception as e:
+        tests.append(("Activity tracker setup", False, str(e)))
+    
+    # Print results
+    for test_name, success, *details in tests:
+        print_test_result(test_name, success, details[0] if details else "")
+    
+    return all(test[1] for test in tests)
+
+def test_read_through_cache():
+    """Test TTL/LRU read-through cache for decks and cards"""
+    print_test_header("Read-Through Cache")
+    
+    tests = []
+    
+    try:
+        from bot.utils.cache import TTLCache, CachedDatabaseManager
+        
+        # Test LRU eviction and TTL expiry
+        try:
+            now = [0.0]
+            cache = TTLCache(max_size=2, ttl=10, clock=lambda: now[0])
+            cache.set("a", 1)
+            cache.set("b", 2)
+            cache.get("a")
+            cache.set("c", 3)
+            tests.append(("LRU eviction", cache.get("b") is None and cache.get("a") == 1 and cache.evictions == 1))
+            
+            now[0] = 11
+            tests.append(("TTL expiry", cache.get("a") is None and cache.expirations == 1))
+        except Exception as e:
+            tests.append(("TTL cache", False, str(e)))
+        
+        # Test read-through and invalidation
+        try:
+            class StandInManager:
+                def __init__(self):
+                    self.reads = 0
+                
+                def get_deck(self, deck_id):
+                    self.reads += 1
+                    return {'id': deck_id}
+                
+                def delete_deck(self, deck_id, user_id):
+                    return True
+            
+            manager = StandInManager()
+            cached = CachedDatabaseManager(manager=manager)
+            cached.get_deck("deck1")
+            cached.get_deck("deck1")
+            tests.append(("Read-through hit", manager.reads == 1 and cached.decks.hits == 1))
+            
+            cached.delete_deck("deck1", "123")
+            cached.get_deck("deck1")
+            tests.append(("Invalidation on delete", manager.reads == 2))
+            
+            fresh = cached.get_deck_for_update("deck1")
+            tests.append(("Fresh read for update", manager.reads == 3 and fresh is not cached.get_deck("deck1")))
+        except Exception as e:
+            tests.append(("Read-through cache", False, str(e)))
+            
+    except Exception as e:
+        tests.append(("Cache setup", False, str(e)))
+    
+    # Print results
+    for test_name, success, *details in tests:
+        print_test_result(test_name, success, details[0] if details else "")
+    
+    return all(test[1] for test in tests)
+
+def test_webhook_server():
+    """Test webhook server with a recorded Telegram update"""
+    print_test_header("Webhook Server")
+    
+    tests = []
+    
+    try:
+        import asyncio
+        import json
+        import urllib.request
+        import urllib.error
+        from telegram import Update
+        from telegram.ext import Application
+        from bot.utils.webhook_server import WebhookServer
+        
+        recorded_update = {
+            "update_id": 100001,
+            "message": {
+                "message_id": 42,
+                "date": 1753368900,
+                "chat": {"id": 123456, "type": "private", "first_name": "Traveler"},
+                "from": {"id": 123456, "is_bot": False, "first_name": "Traveler"},
+                "text": "/search Diluc",
+                "entities": [{"type": "bot_command", "offset": 0, "length": 7}]
+            }
+        }
+        
+        def post(url, secret):
+            request = urllib.request.Request(
+                url, data=json.dumps(recorded_update).encode(), method="POST",
+                headers={"Content-Type": "application/json", "X-Telegram-Bot-Api-Secret-Token": secret}
+            )
+            try:
+                return urllib.request.urlopen(request, timeout=5).status
+            except urllib.error.HTTPError as e:
+                return e.code
+        
+        async def run_server():
+            application = Application.builder().token("123456:TEST").updater(None).build()
+            server = WebhookServer(application, port=0, url_path="/telegram", secret_token="s3cret")
+            await server.start()
+            url = f"http://127.0.0.1:{server.port}/telegram"
+            loop = asyncio.get_running_loop()
+            try:
+                accepted = await loop.run_in_executor(None, post, url, "s3cret")
+                rejected = await loop.run_in_executor(None, post, url, "wrong")
+            finally:
+                await server.stop()
+            return application.update_queue, accepted, rejected
+        
+        try:
+            queue, accepted, rejected = asyncio.run(run_server())
+            update = queue.get_nowait()
+            tests.append(("Update accepted", accepted == 200 and queue.empty()))
+            tests.append(("Update decoded", isinstance(update, Update) and update.message.text == "/search Diluc"))
+            tests.append(("Invalid secret rejected", rejected == 403))
+        except Exception as e:
+            tests.append(("Webhook request handling", False, str(e)))
+            
+    except Exception as e:
+        tests.append(("Webhook server setup", False, str(e)))
+    
+    # Print results
+    for test_name, success, *details in tests:
+        print_test_result(test_name, success, details[0] if details else "")
+    
+    return all(test[1] for test in tests)
+
+def test_update_processor():
+    """Test concurrent update processing with per-user ordering"""
+    print_test_header("Update Processor")
+    
+    tests = []
+    
+    try:
+        import asyncio
+        import time
+        from telegram import Update
+        from bot.utils.update_processor import PerChatUpdateProcessor, ordering_keys, update_label
+        
+        def make_update(update_id, user_id, text):
+            return Update.de_json({
+                "update_id": update_id,
+                "message": {
+                    "message_id": update_id,
+                    "date": 1753368900,
+                    "chat": {"id": user_id, "type": "private", "first_name": "Traveler"},
+                    "from": {"id": user_id, "is_bot": False, "first_name": "Traveler"},
+                    "text": text
+                }
+            }, None)
+        
+        update = make_update(1, 111, "/deck@GenshinTCGBot")
+        tests.append(("Ordering keys", ordering_keys(update) == ["chat:111", "user:111"]))
+        tests.append(("Handler label", update_label(update) == "command:/deck"))
+        
+        async def run_updates():
+            processor = PerChatUpdateProcessor(4)
+            handled = []
+            
+            async def handle(update):
+                # Earlier updates sleep longer, so only the lock keeps them ordered
+                await asyncio.sleep(0.05 - update.update_id // 3 * 0.015)
+                handled.append((update.effective_user.id, update.update_id))
+            
+            # Three users sending three messages each
+            updates = [make_update(i, 100 + i % 3, "hi") for i in range(9)]
+            start = time.perf_counter()
+            await asyncio.gather(*(processor.process_update(u, handle(u)) for u in updates))
+            return processor, handled, time.perf_counter() - start
+        
+        try:
+            processor, handled, elapsed = asyncio.run(run_updates())
+            per_user = {}
+            for user_id, update_id in handled:
+                per_user.setdefault(user_id, []).append(update_id)
+            stats = processor.get_stats()
+            tests.append(("All updates processed", stats['processed'] == 9 and stats['in_flight'] == 0))
+            tests.append(("Per-user order kept", all(ids == sorted(ids) for ids in per_user.values())))
+            tests.append(("Users processed in parallel", elapsed < 0.2, f"{elapsed:.3f}s"))
+            tests.append(("Queue drained", stats['queue_depth'] == 0 and not processor._locks))
+            tests.append(("Wait stats recorded", stats['wait_by_handler']['message']['count'] == 9))
+        except Exception as e:
+            tests.append(("Concurrent processing", False, str(e)))
+        
+        async def run_backlog():
+            # One slot and one pending update, so four wait on the base class semaphore
+            processor = PerChatUpdateProcessor(1, max_pending_updates=1)
+            
+            async def handle(update):
+                await asyncio.sleep(0.02)
+            
+            updates = [make_update(i, 200 + i, "hi") for i in range(5)]
+            await asyncio.gather(*(processor.process_update(u, handle(u)) for u in updates))
+            
+            waiting = [asyncio.create_task(processor.process_update(u, handle(u))) for u in updates[:3]]
+            await asyncio.sleep(0.005)
+            for task in waiting:
+                task.cancel()
+            await asyncio.gather(*waiting, return_exceptions=True)
+            return processor
+        
+        try:
+            processor = asyncio.run(run_backlog())
+            stats = processor.get_stats()
+            tests.append(("Backlog counted before base semaphore", stats['max_queue_depth'] == 4,
+                          f"max_queue_depth={stats['max_queue_depth']}"))
+            tests.append(("Cancelled updates leave the queue", stats['queue_depth'] == 0 and stats['in_flight'] == 0
+                          and not processor._queued_at and not processor._locks))
+        except Exception as e:
+            tests.append(("Queue depth", False, str(e)))
+            
+    except Exception as e:
+        tests.append(("Update processor setup", False, str(e)))
+    
+    # Print results
+    for test_name, success, *details in tests:
+        print_test_result(test_name, success, details[0] if details else "")
+    
+    return all(test[1] for test in tests)
+
+def test_send_scheduler():
+    """Test outbound send scheduling, flood control and edit coalescing"""
+    print_test_header("Send Scheduler")
+    
+    tests = []
+    
+    try:
+        import asyncio
+        import time
+        from telegram.error import BadRequest, RetryAfter
+        from bot.utils.send_scheduler import SendScheduler, WindowLimiter
+        
+        async def run_limiter():
+            limiter = WindowLimiter(5, 0.1)
+            start = time.perf_counter()
+            for _ in range(15):
+                await limiter.acquire()
+            return time.perf_counter() - start
+        
+        elapsed = asyncio.run(run_limiter())
+        tests.append(("Window limit enforced", 0.19 <= elapsed < 0.5, f"{elapsed:.3f}s"))
+        
+        async def run_scheduler():
+            scheduler = SendScheduler(private_max_rate=1, private_time_period=0.05, max_retries=2)
+            calls = []
+            flood = {"remaining": 1}
+            
+            async def callback(endpoint, data):
+                calls.append((endpoint, data.get("text")))
+                if data.get("text") == "flood" and flood["remaining"]:
+                    flood["remaining"] -= 1
+                    raise RetryAfter(0)
+                if data.get("text") == "same":
+                    raise BadRequest("Message is not modified: specified new message content is the same")
+                return True
+            
+            def request(endpoint, **data):
+                return scheduler.process_request(callback, (endpoint, data), {}, endpoint, data, None)
+            
+            edit = {"chat_id": 42, "message_id": 7}
+            # Three progress edits queued at once: only the last one is sent
+            await asyncio.gather(*(request("editMessageText", text=f"Progress {i}", **edit) for i in range(3)))
+            # Repeating the last edit never reaches the API
+            await request("editMessageText", text="Progress 2", **edit)
+            flood_result = await request("sendMessage", chat_id=42, text="flood")
+            not_modified = await request("editMessageText", chat_id=42, message_id=8, text="same")
+            return scheduler, calls, flood_result, not_modified
+        
+        try:
+            scheduler, calls, flood_result, not_modified = asyncio.run(run_scheduler())
+            stats = scheduler.get_stats()
+            edits = [text for endpoint, text in calls if endpoint == "editMessageText"]
+            tests.append(("Queued edits coalesced", edits[:2] == ["Progress 0", "Progress 2"] and stats['coalesced_edits'] == 1))
+            tests.append(("No-op edits dropped", stats['dropped_edits'] == 2 and edits.count("Progress 2") == 1))
+            tests.append(("Retry after flood control", flood_result is True and stats['retries'] == 1))
+            tests.append(("Not modified treated as success", not_modified is True))
+            tests.append(("Queue drained", stats['pending'] == 0 and not scheduler._latest_edit))
+        except Exception as e:
+            tests.append(("Request scheduling", False, str(e)))
+            
+    except Exception as e:
+        tests.append(("Send scheduler setup", False, str(e)))
+    
+    # Print results
+    for test_name, success, *details in tests:
+        print_test_result(test_name, success, details[0] if details else "")
+    
+    return all(test[1] for test in tests)
+
+def test_render_cache():
+    """Test pre-rendered card message cache"""
+    print_test_header("Render Cache")
+    
+    tests = []
+    
+    try:
+        from types import SimpleNamespace
+        from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+        from bot.utils.card_catalog import CardCatalog
+        from bot.utils.render_cache import CardRenderCache, RenderedMessage
+        
+        diluc = SimpleNamespace(id="diluc", name="Diluc", card_type="CHARACTER", cost=0, element="PYRO")
+        catalog = CardCatalog()
+        catalog.load([diluc])
+        cache = CardRenderCache(catalog=catalog)
+        renders = []
+        
+        def render_detail(card):
+            renders.append(card.id)
+            keyboard = InlineKeyboardMarkup([[InlineKeyboardButton("📊 Stats", callback_data=f"card_stats_{card.id}")]])
+            return RenderedMessage(f"🎴 **{card.name}**\nCost: {card.cost}", 'Markdown', keyboard)
+        
+        try:
+            first = cache.get_or_render(diluc, "detail", render_detail)
+            second = cache.get_or_render(diluc, "detail", render_detail)
+            tests.append(("Rendered once", renders == ["diluc"] and second is first))
+            tests.append(("Message kwargs", first.as_kwargs()['reply_markup'].inline_keyboard[0][0].text == "📊 Stats"))
+            
+            cache.get_or_render(diluc, "stats", render_detail)
+            tests.append(("Views cached separately", len(renders) == 2))
+            
+            # Re-saving the card (writer invalidation or catalog update) forces a re-render
+            cache.invalidate("diluc")
+            cache.get_or_render(diluc, "detail", render_detail)
+            updated = SimpleNamespace(id="diluc", name="Diluc", card_type="CHARACTER", cost=1, element="PYRO")
+            catalog.upsert(updated)
+            rerendered = cache.get_or_render(updated, "detail", render_detail)
+            tests.append(("Invalidated on card change", len(renders) == 4 and "Cost: 1" in rerendered.text))
+            tests.append(("Cache stats", cache.get_stats()['hits'] == 1))
+        except Exception as e:
+            tests.append(("Render caching", False, str(e)))
+            
+    except Exception as e:
+        tests.append(("Render cache setup", False, str(e)))
+    
+    # Print results
+    for test_name, success, *details in tests:
+        print_test_result(test_name, success, details[0] if details else "")
+    
+    return all(test[1] for test in tests)
+
+def test_inline_results():
+    """Test inline query result cache and pagination"""
+    print_test_header("Inline Results")
+    
+    tests = []
+    
+    try:
+        import asyncio
+        from types import SimpleNamespace
+        from telegram import InlineQueryResultArticle, InputTextMessageContent
+        from bot.utils.card_catalog import CardCatalog
+        from bot.utils.inline_results import InlineResultCache, INLINE_CACHE_TIME
+        
+        catalog = CardCatalog()
+        catalog.load([SimpleNamespace(id=f"card_{i}", name=f"Card {i}", card_type="ACTION", cost=1, element=None)
+                      for i in range(45)])
+        cache = InlineResultCache(page_size=20, catalog=catalog)
+        builds = []
+        
+        def build():
+            builds.append(1)
+            return [InlineQueryResultArticle(id=card.id, title=card.name,
+                                             input_message_content=InputTextMessageContent(card.name))
+                    for card in catalog.search("card", limit=100)]
+        
+        try:
+            first, offset = cache.get_page("Card", "", build, element=None)
+            second, offset2 = cache.get_page("  card ", offset, build, element=None)
+            last, offset3 = cache.get_page("card", offset2, build, element=None)
+            tests.append(("Pages split", [len(first), len(second), len(last)] == [20, 20, 5]))
+            tests.append(("Next offsets", (offset, offset2, offset3) == ("20", "40", "")))
+            tests.append(("Results built once", len(builds) == 1))
+            
+            cache.get_page("card", "", build, element="PYRO")
+            tests.append(("Filters keyed separately", len(builds) == 2))
+            
+            catalog.remove("card_0")
+            cache.get_page("card", "", build, element=None)
+            tests.append(("Rebuilt after catalog change", len(builds) == 3))
+            
+            answers = []
+            
+            class FakeInlineQuery:
+                query = "card"
+                offset = "40"
+                
+                async def answer(self, results, **kwargs):
+                    answers.append((results, kwargs))
+            
+            asyncio.run(cache.answer(FakeInlineQuery(), build, element=None))
+            results, kwargs = answers[0]
+            tests.append(("Inline answer", len(results) == 4 and kwargs['next_offset'] == ""
+                          and kwargs['cache_time'] == INLINE_CACHE_TIME))
+        except Exception as e:
+            tests.append(("Inline pagination", False, str(e)))
+            
+    except Exception as e:
+        tests.append(("Inline results setup", False, str(e)))
+    
+    # Print results
+    for test_name, success, *details in tests:
+        print_test_result(test_name, success, details[0] if details else "")
+    
+    return all(test[1] for test in tests)
+
+def test_file_id_cache():
+    """Test persistent Telegram file_id cache for card images"""
+    print_test_header("File ID Cache")
+    
+    tests = []
+    
+    try:
+        import asyncio
+        import os
+        import tempfile
+        from types import SimpleNamespace
+        from telegram import InlineQueryResultCachedPhoto, InlineQueryResultPhoto
+        from bot.utils.media_cache import FileIdCache
+        
+        image = "https://example.com/cards/diluc.png"
+        
+        class FakeBot:
+            id = 123456
+            
+            def __init__(self):
+                self.sent = []
+            
+            async def send_photo(self, chat_id, photo, **kwargs):
+                self.sent.append(photo)
+                size = SimpleNamespace(file_id=f"file_{len(self.sent)}", file_unique_id="unique_diluc")
+                return SimpleNamespace(photo=[size])
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "file_ids.json")
+            cache = FileIdCache(path)
+            bot = FakeBot()
+            
+            try:
+                asyncio.run(cache.send_photo(bot, 42, image, caption="Diluc"))
+                asyncio.run(cache.send_photo(bot, 42, image, caption="Diluc"))
+                tests.append(("First send transfers image", bot.sent[0] == image))
+                tests.append(("Later sends reuse file_id", bot.sent[1] == "file_1" and cache.reuses == 1))
+                
+                cached = cache.inline_photo(bot.id, "diluc", image, title="Diluc")
+                uncached = cache.inline_photo(bot.id, "keqing", "https://example.com/cards/keqing.png")
+                tests.append(("Inline cached photo", isinstance(cached, InlineQueryResultCachedPhoto)
+                              and cached.photo_file_id == "file_1"))
+                tests.append(("Inline photo by URL", isinstance(uncached, InlineQueryResultPhoto)))
+                tests.append(("Cached per bot", cache.get(999, image) is None))
+                
+                cache.save()
+                tests.append(("Persisted across restarts", FileIdCache(path).get(bot.id, image) == "file_1"))
+            except Exception as e:
+                tests.append(("File ID caching", False, str(e)))
+            
+    except Exception as e:
+        tests.append(("File ID cache setup", False, str(e)))
+    
+    # Print results
+    for test_name, success, *details in tests:
+        print_test_result(test_name, success, details[0] if details else "")
+    
+    return all(test[1] for test in tests)
+
+def test_image_pipeline():
+    """Test card art thumbnail generation and content-addressed cache"""
+    print_test_header("Image Pipeline")
+    
+    tests = []
+    
+    try:
+        import os
+        import tempfile
+        from io import BytesIO
+        from types import SimpleNamespace
+        from PIL import Image
+        from scraper.image_pipeline import ImagePipeline
+        
+        art = BytesIO()
+        Image.new("RGBA", (840, 1440), (200, 80, 40, 128)).save(art, "PNG")
+        downloads = []
+        
+        def get(url, timeout=None):
+            downloads.append(url)
+            return SimpleNamespace(content=art.getvalue(), raise_for_status=lambda: None)
+        
+        fetcher = SimpleNamespace(rate_limiter=SimpleNamespace(wait=lambda url: None),
+                                  session=SimpleNamespace(get=get), timeout=5)
+        cards = [
+            SimpleNamespace(id="diluc", image_url="https://example.com/diluc.png"),
+            SimpleNamespace(id="diluc_alt", image_url="https://example.com/diluc_alt.png"),
+            SimpleNamespace(id="no_art", image_url=None),
+            # Freshly scraped cards arrive as dicts
+            {'id': "klee", 'image_url': "https://example.com/klee.png"},
+        ]
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            pipeline = ImagePipeline(cache_dir=tmp, max_workers=2, fetcher=fetcher)
+            
+            try:
+                result = pipeline.process_cards(cards)
+                tests.append(("Images processed", result['success'] and result['images_processed'] == 3))
+                
+                thumb = pipeline.variant_path("https://example.com/diluc.png", "thumb")
+                preview = pipeline.variant_path("https://example.com/diluc.png", "preview")
+                with Image.open(thumb) as image:
+                    tests.append(("Thumbnail size", image.size == (187, 320) and image.format == "JPEG"))
+                with Image.open(preview) as image:
+                    tests.append(("Preview size", image.size == (467, 800)))
+                
+                # Same art under two URLs is stored once
+                files = [f for _, _, names in os.walk(tmp) for f in names if f.endswith(".jpg")]
+                tests.append(("Content-addressed storage", len(files) == 2
+                              and pipeline.variant_path("https://example.com/diluc_alt.png", "thumb") == thumb))
+                
+                again = ImagePipeline(cache_dir=tmp, fetcher=fetcher).process_cards(cards)
+                tests.append(("Cached images skipped", again['images_cached'] == 3 and len(downloads) == 3))
+            except Exception as e:
+                tests.append(("Image processing", False, str(e)))
+            
+    except Exception as e:
+        tests.append(("Image pipeline setup", False, str(e)))
+    
+    # Print results
+    for test_name, success, *details in tests:
+        print_test_result(test_name, success, details[0] if details else "")
+    
+    return all(test[1] for test in tests)
+
+def test_deck_aggregates():
+    """Test running deck aggregates and validation from them"""
+    print_test_header("Deck Aggregates")
+    
+    tests = []
+    
+    try:
+        from types import SimpleNamespace
+        from models.deck_aggregates import DeckAggregates
+        
+        from models.compact import CompactCard, CompactDeckCard
+        
+        rules = {'max_cards': 30, 'max_characters': 3, 'max_copies_per_card': 2}
+        catalog = {
+            "diluc": CompactCard("diluc", "Diluc", "CHARACTER", 0, element="PYRO"),
+            "sweet_madame": CompactCard("sweet_madame", "Sweet Madame", "ACTION", 0),
+        }
+        # Deck entries carry no element or cost; those come from the catalog
+        deck = SimpleNamespace(cards=[
+            CompactDeckCard("diluc", "Diluc", "CHARACTER", 1),
+            CompactDeckCard("sweet_madame", "Sweet Madame", "ACTION", 2),
+        ])
+        aggregates = DeckAggregates.from_deck(deck, catalog)
+        
+        try:
+            tests.append(("Counts from deck", aggregates.total_cards == 3 and aggregates.character_count == 1
+                          and aggregates.elements == {"PYRO": 1} and aggregates.costs == {0: 3}))
+            
+            aggregates.add("xingqiu", "CHARACTER", 1, "HYDRO", 0)
+            aggregates.add("paimon", "ACTION", 2, None, 3)
+            tests.append(("Incremental add", aggregates.total_cards == 6 and aggregates.copies["paimon"] == 2))
+            tests.append(("Histograms", aggregates.elements == {"PYRO": 1, "HYDRO": 1}
+                          and aggregates.get_stats()['costs'] == {0: 4, 3: 2}))
+            tests.append(("Copy limit check", not aggregates.can_add("paimon", "ACTION", 1, rules)
+                          and aggregates.can_add("fischl", "CHARACTER", 1, rules)
+                          and not aggregates.can_add("fischl", "CHARACTER", 2, rules)))
+            
+            validation = aggregates.validate(rules)
+            tests.append(("Incomplete deck is invalid", not validation['is_valid'] and len(validation['errors']) == 2))
+            
+            aggregates.add("paimon", "ACTION", 1)
+            validation = aggregates.validate(rules)
+            tests.append(("Too many copies rejected", not validation['is_valid'] and len(validation['errors']) == 3))
+            
+            removed = aggregates.remove("paimon", 3)
+            aggregates.remove("xingqiu")
+            tests.append(("Incremental remove", removed == 3 and aggregates.total_cards == 3
+                          and "paimon" not in aggregates.copies and 3 not in aggregates.costs
+                          and aggregates.elements == {"PYRO": 1}))
+        except Exception as e:
+            tests.append(("Deck aggregate updates", False, str(e)))
+        
+        # Same answers as counting the card list on every check
+        try:
+            import random
+            
+            def walk_validate(entries):
+                characters = sum(qty for _, card_type, qty in entries if card_type == "CHARACTER")
+                actions = sum(qty for _, card_type, qty in entries if card_type != "CHARACTER")
+                return (characters == rules['max_characters'] and actions == rules['max_cards']
+                        and all(qty <= rules['max_copies_per_card'] for *_, qty in entries))
+            
+            rng = random.Random(17)
+            pool = [(f"char_{i}", "CHARACTER") for i in range(6)] + [(f"action_{i}", "ACTION") for i in range(20)]
+            mismatches = []
+            for _ in range(300):
+                entries = {}
+                for card_id, card_type in rng.sample(pool, rng.randint(0, len(pool))):
+                    entries[card_id] = (card_id, card_type, rng.randint(1, 3))
+                if rng.random() < 0.5:
+                    # A full deck, so valid ones are exercised too
+                    entries = {f"char_{i}": (f"char_{i}", "CHARACTER", 1) for i in range(3)}
+                    entries.update({f"action_{i}": (f"action_{i}", "ACTION", 2) for i in range(15)})
+                    card_id, card_type = rng.choice(pool)
+                    entries[card_id] = (card_id, card_type, rng.choice([1, 2, 3]))
+                deck = SimpleNamespace(cards=[CompactDeckCard(card_id, card_id, card_type, qty)
+                                              for card_id, card_type, qty in entries.values()])
+                if DeckAggregates.from_deck(deck, {}).validate(rules)['is_valid'] != walk_validate(list(entries.values())):
+                    mismatches.append(sorted(entries.values()))
+            tests.append(("Matches list walk", not mismatches, *([f"Differs for {mismatches[0]}"] if mismatches else [])))
+        except Exception as e:
+            tests.append(("Matches list walk", False, str(e)))
+        
+        # Same answers as Deck on the same cards
+        try:
+            from models.deck import Deck
+            
+            full = Deck(id="full", name="Full", user_id="123456", cards=[])
+            for i in range(3):
+                full.add_card(f"char_{i}", f"Character {i}", "CHARACTER", 1)
+            for i in range(15):
+                full.add_card(f"action_{i}", f"Action {i}", "ACTION", 2)
+            partial = Deck(id="partial", name="Partial", user_id="123456", cards=[])
+            partial.add_card("char_0", "Character 0", "CHARACTER", 1)
+            partial.add_card("action_0", "Action 0", "ACTION", 2)
+            
+            same = all(
+                DeckAggregates.from_deck(deck, {}).validate(rules)['is_valid'] == deck.validate_deck().get('is_valid')
+                and DeckAggregates.from_deck(deck, {}).total_cards == deck.get_total_cards()
+                and DeckAggregates.from_deck(deck, {}).character_count == deck.get_character_count()
+                for deck in (full, partial)
+            )
+            tests.append(("Matches Deck validation", same))
+        except Exception as e:
+            tests.append(("Matches Deck validation", False, str(e)))
+            
+    except Exception as e:
+        tests.append(("Deck aggregates setup", False, str(e)))
+    
+    # Print results
+    for test_name, success, *details in tests:
+        print_test_result(test_name, success, details[0] if details else "")
+    
+    return all(test[1] for test in tests)
+
+def test_compact_models():
+    """Test slotted compact card and deck entries"""
+    print_test_header("Compact Models")
+    
+    tests = []
+    
+    try:
+        from models.compact import CompactCard, CompactDeckCard
+        
+        character = {
+            'id': 'diluc', 'name': 'Diluc', 'card_type': ''.join(['CHAR', 'ACTER']), 'cost': 0,
+            'description': 'Dawn-Winery Master', 'element': ''.join(['PY', 'RO']), 'weapon': 'CLAYMORE',
+            'hp': 10, 'max_energy': 3, 'skills': [{'name': 'Tempering', 'cost': 3}], 'faction': 'MONDSTADT'
+        }
+        action = {'id': 'paimon', 'name': 'Paimon', 'card_type': 'SUPPORT', 'cost': 3, 'description': 'Companion'}
+        
+        try:
+            card = CompactCard.from_dict(character)
+            other = CompactCard.from_dict(dict(character, id='klee', element=''.join(['PY', 'RO'])))
+            tests.append(("Dict round trip", card.to_dict() == character
+                          and CompactCard.from_dict(action).to_dict() == action))
+            tests.append(("No instance dict", not hasattr(card, '__dict__')))
+            tests.append(("Strings interned", card.element is other.element and card.card_type is other.card_type))
+            tests.append(("Extra fields readable", card.faction == 'MONDSTADT'))
+            tests.append(("Absent fields are None", CompactCard.from_dict(action).element is None))
+            
+            # Scraper records carry empty skills lists and None fields
+            scraped = {'id': 'nahida', 'name': 'Nahida', 'card_type': 'CHARACTER', 'cost': 0, 'description': '',
+                       'element': 'DENDRO', 'weapon': None, 'hp': 10, 'max_energy': 2, 'skills': [],
+                       'image_url': None}
+            tests.append(("Empty and None fields round trip", CompactCard.from_dict(scraped).to_dict() == scraped
+                          and CompactCard.from_dict({'id': 'x', 'name': 'X', 'card_type': 'EVENT'}).to_dict()
+                          == {'id': 'x', 'name': 'X', 'card_type': 'EVENT'}))
+            
+            entry = CompactDeckCard.from_dict({'card_id': 'paimon', 'card_name': 'Paimon',
+                                               'card_type': 'SUPPORT', 'quantity': 2})
+            tests.append(("Deck card round trip", entry.to_dict()['quantity'] == 2
+                          and not hasattr(entry, '__dict__')))
+        except Exception as e:
+            tests.append(("Compact model conversion", False, str(e)))
+            
+    except Exception as e:
+        tests.append(("Compact models setup", False, str(e)))
+    
+    # Print results
+    for test_name, success, *details in tests:
+        print_test_result(test_name, success, details[0] if details else "")
+    
+    return all(test[1] for test in tests)
+
+def test_bulk_card_loading():
+    """Test bulk card creation from store snapshots"""
+    print_test_header("Bulk Card Loading")
+    
+    tests = []
+    
+    try:
+        from types import SimpleNamespace
+        from models.card_loader import create_cards
+        from models.compact import CompactCard
+        from bot.utils.card_catalog import CardCatalog
+        
+        records = [
+            {'name': 'Diluc', 'card_type': 'CHARACTER', 'cost': 0, 'description': '', 'element': 'PYRO',
+             'weapon': 'CLAYMORE', 'hp': 10, 'max_energy': 3, 'skills': []},
+            {'name': 'Paimon', 'card_type': 'SUPPORT', 'cost': 3, 'description': 'Companion', 'faction': 'NONE'},
+            {'name': '', 'card_type': 'EVENT', 'cost': 1, 'description': 'Broken record'},
+        ]
+        snapshots = [SimpleNamespace(id=f"card_{i}", to_dict=lambda data=data: dict(data))
+                     for i, data in enumerate(records)]
+        snapshots.append(SimpleNamespace(id="deleted", to_dict=lambda: None))
+        
+        try:
+            cards = create_cards(iter(snapshots))
+            tests.append(("Streams snapshots", [card.id for card in cards] == ["card_0", "card_1", "card_2"]))
+            tests.append(("Same result as from_dict", all(
+                card == CompactCard.from_dict(dict(data, id=card.id)) for card, data in zip(cards, records))))
+            tests.append(("Extra fields kept", cards[1].faction == 'NONE' and cards[0].extra is None))
+            tests.append(("Untrusted data validated", len(create_cards(snapshots, trusted=False)) == 2))
+            
+            malformed = [{'id': 'no_type', 'name': 'Klee'}, dict(records[0], id='card_0')]
+            tests.append(("Malformed record skipped", [card.name for card in create_cards(malformed)] == ['Diluc']))
+            
+            factory = SimpleNamespace(create_card=lambda data: SimpleNamespace(**data))
+            tests.append(("Factory path", create_cards(snapshots[:2], factory=factory)[0].element == 'PYRO'))
+            
+            catalog = CardCatalog(compact=True)
+            catalog.load(create_cards(snapshots))
+            tests.append(("Catalog search on compact cards",
+                          [card.id for card in catalog.search("dil")] == ["card_0"]))
+        except Exception as e:
+            tests.append(("Bulk card creation", False, str(e)))
+            
+    except Exception as e:
+        tests.append(("Bulk card loading setup", False, str(e)))
+    
+    # Print results
+    for test_name, success, *details in tests:
+        print_test_result(test_name, success, details[0] if details else "")
+    
+    return all(test[1] for test in tests)
+
+def test_catalog_snapshot():
+    """Test local catalog snapshot save and load"""
+    print_test_header("Catalog Snapshot")
+    
+    tests = []
+    
+    try:
+        import os
+        import tempfile
+        from models.compact import CompactCard
+        from bot.utils.card_catalog import CardCatalog
+        from bot.utils.catalog_snapshot import CatalogSnapshot
+        
+        catalog = CardCatalog(compact=True)
+        catalog.load([
+            CompactCard(id="diluc", name="Diluc", card_type="CHARACTER", cost=0, element="PYRO"),
+            CompactCard(id="paimon", name="Paimon", card_type="SUPPORT", cost=3, extra={'faction': 'NONE'}),
+        ])
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "catalog_snapshot.jsonl")
+            
+            try:
+                snapshot = CatalogSnapshot(path)
+                tests.append(("No snapshot yet", not snapshot.load(CardCatalog())))
+                tests.append(("Snapshot saved", snapshot.save(catalog)))
+                tests.append(("Unchanged catalog not rewritten", not snapshot.save(catalog)))
+                
+                restored = CardCatalog(compact=True)
+                tests.append(("Snapshot loaded", CatalogSnapshot(path).load(restored)))
+                tests.append(("Search works from snapshot", [c.id for c in restored.search("pai")] == ["paimon"]
+                              and restored.get("paimon").faction == "NONE"))
+                
+                with open(path, 'rb') as f:
+                    lines = f.readlines()
+                
+                # A record missing its name is skipped, the rest of the snapshot still loads
+                with open(path, 'wb') as f:
+                    f.writelines(lines[:-1] + [b'{"id": "broken", "card_type": "EVENT"}\n'])
+                partial = CardCatalog(compact=True)
+                tests.append(("Malformed record skipped", CatalogSnapshot(path).load(partial)
+                              and len(partial) == 1 and partial.get("broken") is None))
+                
+                with open(path, 'wb') as f:
+                    f.writelines(lines[:-1])
+                tests.append(("Truncated snapshot ignored", not CatalogSnapshot(path).load(CardCatalog())))
+            except Exception as e:
+                tests.append(("Snapshot round trip", False, str(e)))
+            
+    except Exception as e:
+        tests.append(("Catalog snapshot setup", False, str(e)))
+    
+    # Print results
+    for test_name, success, *details in tests:
+        print_test_result(test_name, success, details[0] if details else "")
+    
+    return all(test[1] for test in tests)
+
+def test_store_health():
+    """Test Firestore warm-up, health probe and readiness endpoint"""
+    print_test_header("Store Health")
+    
+    tests = []
+    
+    try:
+        import asyncio
+        import urllib.request
+        import urllib.error
+        from types import SimpleNamespace
+        from telegram.ext import Application
+        from bot.utils.store_health import StoreHealth, READY, DEGRADED, UNAVAILABLE
+        from bot.utils.webhook_server import WebhookServer
+        
+        class FakeQuery:
+            def __init__(self, error=None):
+                self.error = error
+            
+            def limit(self, count):
+                return self
+            
+            def get(self, timeout=None):
+                if self.error:
+                    raise self.error
+                return []
+        
+        def make_manager(initialized=True, error=None):
+            db = SimpleNamespace(collection=lambda name: FakeQuery(error))
+            return SimpleNamespace(initialize=lambda: initialized, db=db)
+        
+        try:
+            health = StoreHealth()
+            tests.append(("Healthy store ready", health.warm_up(make_manager()) and health.state == READY))
+            
+            slow = StoreHealth(slow_threshold=0)
+            tests.append(("Slow store degraded", slow.warm_up(make_manager()) and slow.state == DEGRADED and slow.ready))
+            
+            dead = StoreHealth()
+            tests.append(("Dead store detected", not dead.warm_up(make_manager(error=Exception("403 Missing permissions")))
+                          and dead.state == UNAVAILABLE and "403" in dead.last_error))
+            
+            uninitialized = StoreHealth()
+            tests.append(("Failed initialization", not uninitialized.warm_up(make_manager(initialized=False))
+                          and not uninitialized.ready))
+            tests.append(("Health stats", health.get_stats()['warm_up_time_ms'] is not None))
+            
+            # Local stores still initialize Firebase for db_manager, but don't depend on it
+            local_store = SimpleNamespace(name="sqlite", health_check=lambda timeout: True)
+            local = StoreHealth()
+            tests.append(("Local store without Firebase", local.warm_up(make_manager(initialized=False), storage=local_store)
+                          and local.ready and not local.firebase_ready))
+        except Exception as e:
+            tests.append(("Store health probing", False, str(e)))
+        
+        def get_status(url):
+            try:
+                return urllib.request.urlopen(url, timeout=5).status
+            except urllib.error.HTTPError as e:
+                return e.code
+        
+        async def check_endpoint(ready):
+            application = Application.builder().token("123456:TEST").updater(None).build()
+            server = WebhookServer(application, port=0, health_check=lambda: ready)
+            await server.start()
+            try:
+                url = f"http://127.0.0.1:{server.port}/healthz"
+                return await asyncio.get_running_loop().run_in_executor(None, get_status, url)
+            finally:
+                await server.stop()
+        
+        try:
+            tests.append(("Readiness endpoint", asyncio.run(check_endpoint(True)) == 200
+                          and asyncio.run(check_endpoint(False)) == 503))
+        except Exception as e:
+            tests.append(("Readiness endpoint", False, str(e)))
+            
+    except Exception as e:
+        tests.append(("Store health setup", False, str(e)))
+    
+    # Print results
+    for test_name, success, *details in tests:
+        print_test_result(test_name, success, details[0] if details else "")
+    
+    return all(test[1] for test in tests)
+
+def test_storage_backend():
+    """Test the SQLite storage backend and backend selection"""
+    print_test_header("Storage Backend")
+    
+    tests = []
+    
+    try:
+        import tempfile
+        from datetime import datetime
+        from bot.utils.storage import SQLiteBackend, FirestoreBackend, create_backend
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            storage = SQLiteBackend(os.path.join(tmp_dir, "store", "tcg.db"))
+            cards = [
+                {'id': 'diluc', 'name': 'Diluc', 'card_type': 'CHARACTER', 'element': 'PYRO', 'cost': 0},
+                {'id': 'diona', 'name': 'Diona', 'card_type': 'CHARACTER', 'element': 'CRYO', 'cost': 0},
+                {'id': 'paimon', 'name': 'Paimon', 'card_type': 'SUPPORT', 'cost': 3},
+            ]
+            
+            # Test cards
+            try:
+                saved = storage.save_cards(cards)
+                storage.save_cards([dict(cards[0], cost=1)])
+                tests.append(("Cards saved", saved == 3 and storage.count_cards() == 3
+                              and storage.get_card('diluc')['cost'] == 1))
+                tests.append(("Missing card", storage.get_card('nope') is None))
+                tests.append(("Prefix search", [c['id'] for c in storage.search_cards("di")] == ['diluc', 'diona']))
+                tests.append(("Filtered search", [c['id'] for c in storage.search_cards("di", element="pyro")] == ['diluc']
+                              and [c['id'] for c in storage.search_cards(card_type="support")] == ['paimon']))
+                tests.append(("Cards streamed", sorted(c['id'] for c in storage.stream_cards()) == ['diluc', 'diona', 'paimon']))
+            except Exception as e:
+                tests.append(("SQLite cards", False, str(e)))
+            
+            # Test decks
+            try:
+                storage.save_deck({'id': 'd1', 'user_id': '42', 'name': 'Burn', 'cards': [{'card_id': 'diluc', 'quantity': 1}]})
+                storage.save_deck({'id': 'd2', 'user_id': '42', 'name': 'Aggro', 'cards': []})
+                tests.append(("User decks", [d['id'] for d in storage.get_user_decks('42')] == ['d2', 'd1']
+                              and storage.get_deck('d1')['cards'][0]['card_id'] == 'diluc'))
+                tests.append(("Deck owner checked on delete", not storage.delete_deck('d1', '7')
+                              and storage.delete_deck('d1', '42') and storage.get_deck('d1') is None))
+            except Exception as e:
+                tests.append(("SQLite decks", False, str(e)))
+            
+            # Test user activity
+            try:
+                now = datetime.now()
+                storage.record_activity([('42', {'last_active': now, 'message_count': 2})])
+                storage.record_activity([('42', {'last_active': now, 'message_count': 3})])
+                user = storage.get_user('42')
+                tests.append(("Activity accumulated", user['message_count'] == 5 and user['last_active'] == now.isoformat()))
+            except Exception as e:
+                tests.append(("SQLite users", False, str(e)))
+            
+            # Test schema
+            try:
+                conn = storage._connection()
+                indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+                journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+                tests.append(("Indexes created", {'idx_cards_name_key', 'idx_cards_element', 'idx_cards_card_type',
+                                                  'idx_decks_user_id'} <= indexes))
+                tests.append(("WAL mode", journal_mode == 'wal' and storage.health_check()))
+            except Exception as e:
+                tests.append(("SQLite schema", False, str(e)))
+            
+            # Test card hashes are kept per store
+            try:
+                from scraper.card_writer import CardBatchWriter
+                from scraper.incremental import DEFAULT_CARD_HASHES_PATH
+                
+                other = SQLiteBackend(os.path.join(tmp_dir, "other.db"))
+                paths = {CardBatchWriter(storage=store, track_changes=True).change_tracker.path
+                         for store in (storage, other, FirestoreBackend(db=object()))}
+                tests.append(("Card hashes per store", len(paths) == 3 and DEFAULT_CARD_HASHES_PATH in paths))
+                other.close()
+            except Exception as e:
+                tests.append(("Card hashes per store", False, str(e)))
+            storage.close()
+        
+        # Test backend selection
+        try:
+            tests.append(("Firestore backend selected", isinstance(create_backend('firestore', db=object()), FirestoreBackend)))
+            try:
+                create_backend('mongo')
+                tests.append(("Unknown backend rejected", False))
+            except ValueError:
+                tests.append(("Unknown backend rejected", True))
+        except Exception as e:
+            tests.append(("Backend selection", False, str(e)))
+            
+    except Exception as e:
+        tests.append(("Storage backend setup", False, str(e)))
+    
+    # Print results
+    for test_name, success, *details in tests:
+        print_test_result(test_name, success, details[0] if details else "")
+    
+    return all(test[1] for test in tests)
+
+def test_metrics():
+    """Test handler, storage and Bot API metrics and the Prometheus endpoint"""
+    print_test_header("Metrics")
+    
+    tests = []
+    
+    try:
+        import asyncio
+        import tempfile
+        import urllib.request
+        from types import SimpleNamespace
+        from telegram.ext import Application, CallbackQueryHandler, CommandHandler
+        from bot.utils.metrics import Metrics, TimedStorage, instrument_handlers, callback_prefix
+        from bot.utils.metrics_server import MetricsServer
+        from bot.utils.storage import SQLiteBackend
+        
+        registry = Metrics()
+        
+        # Test handler instrumentation
+        try:
+            async def search_command(update, context):
+                pass
+            
+            async def deck_callbacks(update, context):
+                if update.callback_query.data.startswith("deck_delete_"):
+                    raise ValueError("deck not found")
+            
+            application = Application.builder().token("123456:TEST").build()
+            application.add_handler(CommandHandler("search", search_command))
+            application.add_handler(CallbackQueryHandler(deck_callbacks, pattern="^deck_"))
+            instrument_handlers(application, registry)
+            instrument_handlers(application, registry)
+            search, deck = application.handlers[0]
+            
+            async def run_handlers():
+                await search.callback(SimpleNamespace(callback_query=None), None)
+                for data in ("deck_show_d1", "deck_show_d2", "deck_delete_d1"):
+                    try:
+                        await deck.callback(SimpleNamespace(callback_query=SimpleNamespace(data=data)), None)
+                    except ValueError:
+                        pass
+            
+            asyncio.run(run_handlers())
+            shown = registry.histogram('handler', handler="deck_callbacks", callback="deck_show")
+            deleted = registry.histogram('handler', handler="deck_callbacks", callback="deck_delete")
+            tests.append(("Handlers timed once", registry.histogram('handler', handler="search_command", callback="").count == 1))
+            tests.append(("Callback prefixes labelled", shown.count == 2 and shown.errors == 0 and deleted.errors == 1))
+            tests.append(("Callback prefix", callback_prefix("rules_basics_page_2") == "rules_basics" and callback_prefix(None) == ""))
+        except Exception as e:
+            tests.append(("Handler instrumentation", False, str(e)))
+        
+        # Test storage timing
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                backend = SQLiteBackend(os.path.join(tmp_dir, "tcg.db"))
+                storage = TimedStorage(backend, registry)
+                storage.save_cards([{'id': 'diluc', 'name': 'Diluc', 'card_type': 'CHARACTER'}])
+                streamed = list(storage.stream_cards())
+                backend.close()
+            tests.append(("Storage calls timed", storage.name == "sqlite" and len(streamed) == 1
+                          and registry.histogram('storage', backend="sqlite", operation="save_cards").count == 1
+                          and registry.histogram('storage', backend="sqlite", operation="stream_cards").count == 1))
+        except Exception as e:
+            tests.append(("Storage timing", False, str(e)))
+        
+        # Test Prometheus output
+        try:
+            registry.observe('bot_api', 0.2, method="sendMessage")
+            text = registry.render()
+            tests.append(("Histogram rendered", 'tcgbot_bot_api_duration_seconds_bucket{method="sendMessage",le="0.1"} 0' in text
+                          and 'tcgbot_bot_api_duration_seconds_bucket{method="sendMessage",le="0.25"} 1' in text
+                          and 'tcgbot_bot_api_duration_seconds_count{method="sendMessage"} 1' in text))
+            tests.append(("Errors rendered", 'tcgbot_handler_errors_total{callback="deck_delete",handler="deck_callbacks"} 1' in text))
+        except Exception as e:
+            tests.append(("Prometheus output", False, str(e)))
+        
+        # Test gauges read at scrape time
+        try:
+            depth = [3]
+            registry.register_gauge("tcgbot_update_queue_depth", "Updates waiting", lambda: depth[0])
+            registry.register_gauge("tcgbot_cache_hits_total", "Cache hits", lambda: {'decks': 5, 'cards': 2},
+                                    label='cache', counter=True)
+            registry.register_gauge("tcgbot_broken", "Always fails", lambda: 1 / 0)
+            depth[0] = 4
+            text = registry.render()
+            tests.append(("Gauges rendered", "tcgbot_update_queue_depth 4" in text
+                          and "# TYPE tcgbot_cache_hits_total counter" in text
+                          and 'tcgbot_cache_hits_total{cache="decks"} 5' in text
+                          and "tcgbot_broken" not in text))
+        except Exception as e:
+            tests.append(("Gauges", False, str(e)))
+        
+        async def scrape():
+            server = MetricsServer(registry, port=0)
+            await server.start()
+            try:
+                url = f"http://127.0.0.1:{server.port}/metrics"
+                response = await asyncio.get_running_loop().run_in_executor(None, urllib.request.urlopen, url)
+                return response.status, response.headers['Content-Type'], response.read().decode()
+            finally:
+                await server.stop()
+        
+        try:
+            status, content_type, body = asyncio.run(scrape())
+            tests.append(("Metrics endpoint", status == 200 and content_type.startswith("text/plain")
+                          and "tcgbot_storage_duration_seconds_count" in body))
+        except Exception as e:
+            tests.append(("Metrics endpoint", False, str(e)))
+            
+    except Exception as e:
+        tests.append(("Metrics setup", False, str(e)))
+    
+    # Print results
+    for test_name, success, *details in tests:
+        print_test_result(test_name, success, details[0] if details else "")
+    
+    return all(test[1] for test in tests)
+
+def test_loop_diagnostics():
+    """Test the event loop stall watchdog and the loop profiler"""
+    print_test_header("Loop Diagnostics")
+    
+    tests = []
+    
+    try:
+        import asyncio
+        import tempfile
+        import time
+        from bot.utils.loop_watchdog import LoopWatchdog
+        from bot.utils.profiler import LoopProfiler, format_top
+        
+        def blocking_scrape():
+            time.sleep(0.3)
+        
+        async def run_watchdog():
+            watchdog = LoopWatchdog(threshold=0.1, interval=0.01)
+            watchdog.start()
+            await asyncio.sleep(0.05)
+            blocking_scrape()
+            await asyncio.sleep(0.05)
+            await watchdog.stop()
+            return watchdog
+        
+        # Test stall detection
+        try:
+            watchdog = asyncio.run(run_watchdog())
+            report = watchdog.recent(1)[0] if watchdog.recent(1) else {}
+            tests.append(("Stall detected", watchdog.stalls == 1 and report.get('duration_ms', 0) >= 250))
+            tests.append(("Blocking stack captured", "blocking_scrape" in (report.get('stack') or "")))
+            tests.append(("Watchdog stopped", not watchdog.running and watchdog.get_stats()['longest_ms'] >= 250))
+        except Exception as e:
+            tests.append(("Loop watchdog", False, str(e)))
+        
+        def hot_path():
+            return sum(i * i for i in range(20000))
+        
+        async def run_profile(profiler):
+            async def busy():
+                while True:
+                    hot_path()
+                    await asyncio.sleep(0)
+            
+            task = asyncio.create_task(busy())
+            try:
+                return await asyncio.gather(profiler.profile(0.2), profiler.profile(0.2))
+            finally:
+                task.cancel()
+        
+        # Test profiling
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                profiler = LoopProfiler(output_dir=tmp_dir)
+                result, second = asyncio.run(run_profile(profiler))
+                tests.append(("Profile dumped", result['success'] and os.path.exists(result['path'])))
+                tests.append(("Hot path in profile", any("hot_path" in row[0] for row in result['top'])
+                              and "hot_path" in format_top(result['top'])))
+                tests.append(("One session at a time", not second['success'] and not profiler.running))
+        except Exception as e:
+            tests.append(("Loop profiler", False, str(e)))
+            
+    except Exception as e:
+        tests.append(("Loop diagnostics setup", False, str(e)))
+    
+    # Print results
+    for test_name, success, *details in tests:
+        print_test_result(test_name, success, details[0] if details else "")
+    
+    return all(test[1] for test in tests)
+
 def run_all_tests():
     """Run all tests and provide summary"""
     print("🎴 Genshin Impact TCG Bot - Comprehensive Testing")
@@ -477,7 +2267,31 @@ def run_all_tests():
         ("Deck Operations", test_deck_operations),
         ("Web Scraper", test_scraper),
         ("Bot Handlers", test_handlers),
-        ("Main Bot Class", test_main_bot)
+        ("Main Bot Class", test_main_bot),
+        ("Card Catalog", test_card_catalog),
+        ("Fuzzy Index", test_fuzzy_index),
+        ("Background Jobs", test_background_jobs),
+        ("Concurrent Fetcher", test_concurrent_fetcher),
+        ("Incremental Scraping", test_incremental_scraping),
+        ("Card Batch Writer", test_card_batch_writer),
+        ("Async Database", test_async_database),
+        ("Activity Tracker", test_activity_tracker),
+        ("Read-Through Cache", test_read_through_cache),
+        ("Webhook Server", test_webhook_server),
+        ("Update Processor", test_update_processor),
+        ("Send Scheduler", test_send_scheduler),
+        ("Render Cache", test_render_cache),
+        ("Inline Results", test_inline_results),
+        ("File ID Cache", test_file_id_cache),
+        ("Image Pipeline", test_image_pipeline),
+        ("Deck Aggregates", test_deck_aggregates),
+        ("Compact Models", test_compact_models),
+        ("Bulk Card Loading", test_bulk_card_loading),
+        ("Catalog Snapshot", test_catalog_snapshot),
+        ("Store Health", test_store_health),
+        ("Storage Backend", test_storage_backend),
+        ("Metrics", test_metrics),
+        ("Loop Diagnostics", test_loop_diagnostics)
     ]
     
     for suite_name, test_func in test_suites: